@@ -1,27 +1,171 @@
+import asyncio
 import os
 import io
 import csv
-from flask import Flask, request, redirect, url_for, flash, render_template, session, jsonify, send_from_directory, Response
+import gzip
+import itertools
+import json
+import base64
+import hashlib
+import zlib
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import click
+from flask import Flask, Blueprint, current_app, request, redirect, url_for, flash, render_template, session, jsonify, send_from_directory, Response, stream_with_context, g, has_request_context
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
-from datetime import datetime, date, timedelta
-from sqlalchemy import and_, func
+from urllib.parse import urlencode
+from datetime import datetime, date, timedelta, timezone
+from sqlalchemy import and_, or_, func, event, inspect, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.util import await_only
+from sqlalchemy.orm import contains_eager
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key')
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///users.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SESSION_COOKIE_SECURE'] = False  # False for development (no HTTPS)
-app.config['SESSION_COOKIE_HTTPONLY'] = True  # Prevent JS access
-app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'  # Mitigate CSRF
-app.config['PERMANENT_SESSION_LIFETIME'] = 1800  # 30 minutes
-db = SQLAlchemy(app)
+db = SQLAlchemy()
+
+# Connection pool options for a database URL, configurable from the environment
+def database_engine_options(database_url):
+    engine_options = {
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),  # Seconds before a connection is replaced
+    }
+    if database_url not in ('sqlite://', 'sqlite:///:memory:'):  # In-memory SQLite uses a single static connection
+        engine_options['pool_size'] = int(os.environ.get('DB_POOL_SIZE', 5))
+        engine_options['max_overflow'] = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+        engine_options['pool_timeout'] = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    return engine_options
+
+# Read settings from the environment into a new app's config, then apply overrides
+def configure_app(app, config=None):
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SESSION_COOKIE_SECURE'] = False  # False for development (no HTTPS)
+    app.config['SESSION_COOKIE_HTTPONLY'] = True  # Prevent JS access
+    app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'  # Mitigate CSRF
+    app.config['PERMANENT_SESSION_LIFETIME'] = 1800  # 30 minutes
+
+    # Database URI (the connection pool is configured by database_engine_options)
+    database_url = os.environ.get('DATABASE_URL', 'sqlite:///users.db')
+    if database_url.startswith('postgres://'):
+        database_url = database_url.replace('postgres://', 'postgresql://', 1)  # Heroku-style URLs
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+
+    # Password hashing work factor (werkzeug method string) and the bounded pool that runs it
+    app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256')
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+    app.config['PASSWORD_HASH_QUEUE'] = int(os.environ.get('PASSWORD_HASH_QUEUE', 32))  # Waiting hashes before shedding load
+    app.config['PASSWORD_HASH_TIMEOUT'] = int(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))  # Seconds
+
+    # Response cache for read APIs (set CACHE_REDIS_URL to share it between workers)
+    app.config['CACHE_TTL'] = int(os.environ.get('CACHE_TTL', 60))  # Seconds
+    app.config['CACHE_MAX_ENTRIES'] = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+    app.config['CACHE_REDIS_URL'] = os.environ.get('CACHE_REDIS_URL', '')
+
+    # Change stream (/api/stream): events kept for Last-Event-ID resume, the heartbeat interval, and
+    # how long one stream may hold a WSGI worker thread before the browser reconnects (asgi.py
+    # streams without a thread each). CACHE_REDIS_URL also shares events between workers
+    app.config['STREAM_BUFFER_SIZE'] = int(os.environ.get('STREAM_BUFFER_SIZE', 1000))
+    app.config['STREAM_HEARTBEAT_SECONDS'] = int(os.environ.get('STREAM_HEARTBEAT_SECONDS', 15))
+    app.config['STREAM_WSGI_SECONDS'] = int(os.environ.get('STREAM_WSGI_SECONDS', 30))
+    app.config['STREAM_BATCH_EVENTS'] = int(os.environ.get('STREAM_BATCH_EVENTS', 100))  # Larger batch writes publish one reset
+
+    # Days of leave each employee is entitled to per year unless their ledger row says otherwise
+    app.config['LEAVE_ENTITLEMENT_DAYS'] = int(os.environ.get('LEAVE_ENTITLEMENT_DAYS', 20))
+
+    # Background jobs: runner threads per process, queue cap, and where export files are written
+    app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+    app.config['JOB_MAX_QUEUED'] = int(os.environ.get('JOB_MAX_QUEUED', 100))
+    app.config['JOB_STALE_SECONDS'] = int(os.environ.get('JOB_STALE_SECONDS', 300))  # Running jobs without a heartbeat are requeued
+    app.config['JOB_RESULTS_DIR'] = os.environ.get('JOB_RESULTS_DIR', os.path.join(app.instance_path, 'jobs'))
+    app.config['JOB_RESULT_TTL_SECONDS'] = int(os.environ.get('JOB_RESULT_TTL_SECONDS', 86400))  # Result files are deleted this long after the job finishes
+
+    # Attendance archive: months kept in the live table (counting REFERENCE_DATE's month) and where
+    # `flask archive-attendance` writes the closed months it moves out
+    app.config['ATTENDANCE_LIVE_MONTHS'] = int(os.environ.get('ATTENDANCE_LIVE_MONTHS', 3))
+    app.config['ATTENDANCE_ARCHIVE_DIR'] = os.environ.get('ATTENDANCE_ARCHIVE_DIR',
+                                                          os.path.join(app.instance_path, 'archive'))
+
+    # Request profiling: slow query threshold, N+1 detection and access to /metrics
+    app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN', '')  # Bearer token for scrapers; else login
+    app.config['SLOW_QUERY_MS'] = int(os.environ.get('SLOW_QUERY_MS', 100))
+    app.config['N_PLUS_ONE_THRESHOLD'] = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 10))  # Same statement per request
+
+    # JSON encoder for API responses: auto (orjson when installed), orjson or stdlib
+    app.config['JSON_PROVIDER'] = os.environ.get('JSON_PROVIDER', 'auto').lower()
+
+    # Async read path (asgi.py): connection pool of the async driver, per process
+    app.config['ASYNC_DB_POOL_SIZE'] = int(os.environ.get('ASYNC_DB_POOL_SIZE', 10))
+    app.config['ASYNC_DB_MAX_OVERFLOW'] = int(os.environ.get('ASYNC_DB_MAX_OVERFLOW', 0))
+    app.config['ASYNC_DB_POOL_TIMEOUT'] = int(os.environ.get('ASYNC_DB_POOL_TIMEOUT', 30))  # Seconds
+
+    # Whether the SQLite FTS5 tables exist: detected on the first search (init-db sets it directly)
+    app.config['FTS_ENABLED'] = None
+
+    app.config.update(config or {})
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS',
+                          database_engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+
+# Tune every new SQLite connection of an app's engines for concurrent readers and writers.
+# Registered per engine by create_app, so other engines in the process are left alone
+def configure_sqlite_engine(app, engine):
+    if engine.dialect.name != 'sqlite':
+        return
+    busy_timeout = app.config['SQLITE_BUSY_TIMEOUT_MS']
+
+    @event.listens_for(engine, 'connect')
+    def _configure_sqlite_connection(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')  # Readers no longer block on the writer
+        cursor.execute('PRAGMA synchronous=NORMAL')  # Safe with WAL, avoids an fsync per commit
+        cursor.execute(f'PRAGMA busy_timeout={busy_timeout}')
+        cursor.close()
+
+# Flask's JSON provider with orjson doing the encoding; output matches the stdlib provider
+# (sorted keys, dates via the same default hook) apart from non-ASCII left unescaped
+class OrjsonProvider(DefaultJSONProvider):
+    def __init__(self, app, orjson):
+        super().__init__(app)
+        self.orjson = orjson
+        self.options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps(self, obj, **kwargs):
+        return self.orjson.dumps(obj, default=self.default, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        return self.orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = self.orjson.dumps(obj, default=self.default, option=self.options | self.orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+# Pick the JSON provider named by JSON_PROVIDER, falling back to the stdlib one
+def create_json_provider(app):
+    if app.config['JSON_PROVIDER'] in ('auto', 'orjson'):
+        try:
+            import orjson
+            return OrjsonProvider(app, orjson)
+        except ImportError:
+            if app.config['JSON_PROVIDER'] == 'orjson':
+                logger.error("orjson is not installed, using the stdlib JSON provider")
+    return DefaultJSONProvider(app)
 
 # User model
 class User(db.Model):
@@ -39,369 +183,1496 @@ class Employee(db.Model):
     department = db.Column(db.String(50), nullable=False)
     location = db.Column(db.String(50), nullable=False)
     avatar = db.Column(db.String(255), nullable=True)
+    __table_args__ = (
+        db.Index('idx_employee_department', 'department'),
+        db.Index('idx_employee_location', 'location'),
+        db.Index('idx_employee_name_id', 'name', 'id'),
+    )
 
 # Attendance model
 class Attendance(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    employee_id = db.Column(db.String(10), nullable=False)
-    name = db.Column(db.String(100), nullable=False)
-    department = db.Column(db.String(50), nullable=False)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), nullable=False)
     clock_in = db.Column(db.String(10), nullable=True)
     clock_out = db.Column(db.String(10), nullable=True)
     status = db.Column(db.String(20), nullable=False)
     date = db.Column(db.Date, nullable=False, default=lambda: datetime.utcnow().date())
-    image = db.Column(db.String(255), nullable=True)
-    __table_args__ = (db.Index('idx_date_status', 'date', 'status'),)
+    employee = db.relationship('Employee')
+    __table_args__ = (
+        db.Index('idx_date_status', 'date', 'status'),
+        db.Index('uq_attendance_employee_date', 'employee_id', 'date', unique=True),
+    )
 
 # LeaveRequest model
 class LeaveRequest(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     request_id = db.Column(db.String(10), unique=True, nullable=False)
-    employee_name = db.Column(db.String(100), nullable=False)
-    department = db.Column(db.String(50), nullable=False)
-    employee_image = db.Column(db.String(255), nullable=True)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), nullable=False, index=True)
     leave_type = db.Column(db.String(50), nullable=False)
     start_date = db.Column(db.Date, nullable=False)
     end_date = db.Column(db.Date, nullable=False)
     days = db.Column(db.Integer, nullable=False)
     status = db.Column(db.String(20), nullable=False, default='pending')
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    employee = db.relationship('Employee')
+
+    __table_args__ = (
+        db.Index('idx_leave_created_id', 'created_at', 'id'),
+        db.Index('idx_leave_status_created_id', 'status', 'created_at', 'id'),
+        db.Index('idx_leave_employee_start_end', 'employee_id', 'start_date', 'end_date'),
+        db.Index('idx_leave_status_start_end', 'status', 'start_date', 'end_date', 'employee_id'),
+        db.Index('idx_leave_status_days', 'status', 'days'),
+    )
+
+# Per-day, per-department, per-status attendance rollup (kept in sync with Attendance)
+class AttendanceDailyStat(db.Model):
+    date = db.Column(db.Date, primary_key=True)
+    department = db.Column(db.String(50), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+# Apply a count delta to a single rollup bucket on the flushing connection
+def apply_attendance_rollup_delta(connection, day, department, status, delta):
+    table = AttendanceDailyStat.__table__
+    bucket = and_(table.c.date == day, table.c.department == department, table.c.status == status)
+    result = connection.execute(table.update().where(bucket).values(count=table.c.count + delta))
+    if result.rowcount == 0 and delta > 0:
+        connection.execute(table.insert().values(date=day, department=department, status=status, count=delta))
+
+# Apply summed deltas {(date, department, status): delta} as one executemany UPDATE of the existing
+# buckets and one INSERT of the new ones, so a batch costs the same three statements at any size
+def apply_attendance_rollup_deltas(connection, deltas):
+    deltas = {bucket: delta for bucket, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    table = AttendanceDailyStat.__table__
+    existing = {tuple(row) for row in connection.execute(
+        db.select(table.c.date, table.c.department, table.c.status).where(
+            table.c.date.in_({day for day, _, _ in deltas}),
+            table.c.department.in_({department for _, department, _ in deltas})
+        )
+    )}
+    updates = [{'b_date': day, 'b_department': department, 'b_status': status, 'b_delta': delta}
+               for (day, department, status), delta in deltas.items() if (day, department, status) in existing]
+    if updates:
+        bucket = and_(table.c.date == db.bindparam('b_date'), table.c.department == db.bindparam('b_department'),
+                      table.c.status == db.bindparam('b_status'))
+        connection.execute(table.update().where(bucket).values(count=table.c.count + db.bindparam('b_delta')),
+                           updates)
+    inserts = [{'date': day, 'department': department, 'status': status, 'count': delta}
+               for (day, department, status), delta in deltas.items()
+               if delta > 0 and (day, department, status) not in existing]
+    if inserts:
+        connection.execute(table.insert(), inserts)
+
+# Previous value of an attribute within the current flush
+def _previous_value(target, attr):
+    history = inspect(target).attrs[attr].history
+    return history.deleted[0] if history.deleted else getattr(target, attr)
+
+# Department of an employee, read on the flushing connection
+def _employee_department(connection, employee_pk):
+    table = Employee.__table__
+    return connection.execute(db.select(table.c.department).where(table.c.id == employee_pk)).scalar()
+
+@event.listens_for(Attendance, 'after_insert')
+def _attendance_inserted(mapper, connection, target):
+    department = _employee_department(connection, target.employee_id)
+    apply_attendance_rollup_delta(connection, target.date, department, target.status, 1)
+
+@event.listens_for(Attendance, 'after_update')
+def _attendance_updated(mapper, connection, target):
+    old_key = tuple(_previous_value(target, attr) for attr in ('date', 'employee_id', 'status'))
+    new_key = (target.date, target.employee_id, target.status)
+    if old_key != new_key:
+        apply_attendance_rollup_delta(connection, old_key[0], _employee_department(connection, old_key[1]), old_key[2], -1)
+        apply_attendance_rollup_delta(connection, new_key[0], _employee_department(connection, new_key[1]), new_key[2], 1)
+
+@event.listens_for(Attendance, 'after_delete')
+def _attendance_deleted(mapper, connection, target):
+    day, employee_pk, status = (_previous_value(target, attr) for attr in ('date', 'employee_id', 'status'))
+    apply_attendance_rollup_delta(connection, day, _employee_department(connection, employee_pk), status, -1)
+
+# Moving an employee to another department moves their live attendance between rollup buckets.
+# Archived months stay as they are: their rows count under the department they were archived with
+@event.listens_for(Employee, 'after_update')
+def _employee_updated(mapper, connection, target):
+    old_department = _previous_value(target, 'department')
+    if old_department == target.department:
+        return
+    table = Attendance.__table__
+    rows = connection.execute(
+        db.select(table.c.date, table.c.status, func.count(table.c.id))
+        .where(table.c.employee_id == target.id)
+        .group_by(table.c.date, table.c.status)
+    ).all()
+    for day, status, count in rows:
+        apply_attendance_rollup_delta(connection, day, old_department, status, -count)
+        apply_attendance_rollup_delta(connection, day, target.department, status, count)
+
+# Closed months of attendance moved out of the live table into read-only gzipped CSV files
+class AttendanceArchive(db.Model):
+    month = db.Column(db.Date, primary_key=True)  # First day of the month
+    path = db.Column(db.String(255), nullable=False)  # File name in ATTENDANCE_ARCHIVE_DIR
+    rows = db.Column(db.Integer, nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+# Per-employee, per-year leave ledger: entitlement and approved days used (kept in sync with LeaveRequest)
+class LeaveBalance(db.Model):
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)
+    entitlement = db.Column(db.Integer, nullable=False)
+    used = db.Column(db.Integer, nullable=False, default=0)
+
+# Running LeaveBalance sums per year and department, so organisation and department leave stats
+# read one row per department instead of joining every employee (kept in sync with LeaveBalance)
+class LeaveBalanceTotal(db.Model):
+    year = db.Column(db.Integer, primary_key=True)
+    department = db.Column(db.String(50), primary_key=True)
+    balances = db.Column(db.Integer, nullable=False, default=0)  # LeaveBalance rows
+    entitlement = db.Column(db.Integer, nullable=False, default=0)
+    used = db.Column(db.Integer, nullable=False, default=0)
+
+# Employees and pending leave requests per department (kept in sync with Employee and LeaveRequest)
+class DepartmentTotal(db.Model):
+    department = db.Column(db.String(50), primary_key=True)
+    employees = db.Column(db.Integer, nullable=False, default=0)
+    pending_requests = db.Column(db.Integer, nullable=False, default=0)
+
+# Add deltas to the counter columns of one totals row, creating the row when it is missing
+def add_to_totals(connection, model, key, **deltas):
+    if not any(deltas.values()):
+        return
+    table = model.__table__
+    row = and_(*(table.c[name] == value for name, value in key.items()))
+    result = connection.execute(
+        table.update().where(row).values(**{name: table.c[name] + delta for name, delta in deltas.items()})
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(**key, **deltas))
+
+# Add summed deltas {key values: {column: delta}} to many totals rows as one executemany UPDATE
+# of the existing rows and one INSERT of the missing ones
+def add_to_totals_many(connection, model, key_names, deltas):
+    deltas = {key: changes for key, changes in deltas.items() if any(changes.values())}
+    if not deltas:
+        return
+    table = model.__table__
+    keys = [table.c[name] for name in key_names]
+    existing = {tuple(row) for row in connection.execute(db.select(*keys).where(
+        *(column.in_({key[i] for key in deltas}) for i, column in enumerate(keys))
+    ))}
+    counters = sorted({name for changes in deltas.values() for name in changes})
+    rows = [(key, {name: changes.get(name, 0) for name in counters}) for key, changes in deltas.items()]
+    updates = [{**{f'b_{name}': value for name, value in zip(key_names, key)},
+                **{f'b_{name}': delta for name, delta in changes.items()}} for key, changes in rows if key in existing]
+    if updates:
+        row = and_(*(column == db.bindparam(f'b_{column.name}') for column in keys))
+        connection.execute(table.update().where(row).values(
+            **{name: table.c[name] + db.bindparam(f'b_{name}') for name in counters}
+        ), updates)
+    inserts = [{**dict(zip(key_names, key)), **changes} for key, changes in rows if key not in existing]
+    if inserts:
+        connection.execute(table.insert(), inserts)
+
+# Days of a leave falling in each calendar year, so a Dec/Jan leave counts against both years
+def leave_days_by_year(start_date, end_date):
+    for year in range(start_date.year, end_date.year + 1):
+        first = max(start_date, date(year, 1, 1))
+        last = min(end_date, date(year, 12, 31))
+        yield year, (last - first).days + 1
+
+# Add used days to one employee-year ledger row on the given connection; returns the change
+# to apply to the LeaveBalanceTotal columns
+def add_leave_balance_days(connection, employee_pk, year, days):
+    table = LeaveBalance.__table__
+    row = and_(table.c.employee_id == employee_pk, table.c.year == year)
+    result = connection.execute(table.update().where(row).values(used=table.c.used + days))
+    if result.rowcount:
+        return {'used': days}
+    if days > 0:
+        entitlement = current_app.config['LEAVE_ENTITLEMENT_DAYS']
+        connection.execute(table.insert().values(employee_id=employee_pk, year=year, entitlement=entitlement, used=days))
+        return {'balances': 1, 'entitlement': entitlement, 'used': days}
+    return {}
+
+# Apply an approved leave (sign=1) or its withdrawal (sign=-1) to the ledger and its department totals
+def apply_leave_balance_delta(connection, employee_pk, start_date, end_date, sign):
+    department = _employee_department(connection, employee_pk)
+    for year, days in leave_days_by_year(start_date, end_date):
+        add_to_totals(connection, LeaveBalanceTotal, {'year': year, 'department': department},
+                      **add_leave_balance_days(connection, employee_pk, year, sign * days))
+
+# Apply summed used-day deltas {(employee_pk, year): days} to the ledger and the totals of each
+# employee's department (departments maps employee_pk to department), a few statements per batch
+def apply_leave_balance_deltas(connection, deltas, departments):
+    deltas = {key: days for key, days in deltas.items() if days}
+    if not deltas:
+        return
+    table = LeaveBalance.__table__
+    existing = {tuple(row) for row in connection.execute(db.select(table.c.employee_id, table.c.year).where(
+        table.c.employee_id.in_({employee_pk for employee_pk, _ in deltas}),
+        table.c.year.in_({year for _, year in deltas})
+    ))}
+    entitlement = current_app.config['LEAVE_ENTITLEMENT_DAYS']
+    updates = []
+    inserts = []
+    totals = {}
+    for (employee_pk, year), days in deltas.items():
+        if (employee_pk, year) in existing:
+            updates.append({'b_employee_id': employee_pk, 'b_year': year, 'b_days': days})
+            change = {'balances': 0, 'entitlement': 0, 'used': days}
+        elif days > 0:
+            inserts.append({'employee_id': employee_pk, 'year': year, 'entitlement': entitlement, 'used': days})
+            change = {'balances': 1, 'entitlement': entitlement, 'used': days}
+        else:
+            continue
+        total = totals.setdefault((year, departments[employee_pk]), {'balances': 0, 'entitlement': 0, 'used': 0})
+        for name, delta in change.items():
+            total[name] += delta
+    if updates:
+        row = and_(table.c.employee_id == db.bindparam('b_employee_id'), table.c.year == db.bindparam('b_year'))
+        connection.execute(table.update().where(row).values(used=table.c.used + db.bindparam('b_days')), updates)
+    if inserts:
+        connection.execute(table.insert(), inserts)
+    add_to_totals_many(connection, LeaveBalanceTotal, ('year', 'department'), totals)
+
+# Add to the pending request count of an employee's department
+def add_pending_requests(connection, employee_pk, count):
+    add_to_totals(connection, DepartmentTotal, {'department': _employee_department(connection, employee_pk)},
+                  pending_requests=count)
+
+LEAVE_LEDGER_ATTRS = ('employee_id', 'start_date', 'end_date', 'status')
+
+@event.listens_for(LeaveRequest, 'after_insert')
+def _leave_request_inserted(mapper, connection, target):
+    if target.status == 'approved':
+        apply_leave_balance_delta(connection, target.employee_id, target.start_date, target.end_date, 1)
+    if target.status == 'pending':
+        add_pending_requests(connection, target.employee_id, 1)
+
+@event.listens_for(LeaveRequest, 'after_update')
+def _leave_request_updated(mapper, connection, target):
+    employee_pk, start_date, end_date, status = (_previous_value(target, attr) for attr in LEAVE_LEDGER_ATTRS)
+    if (employee_pk, start_date, end_date, status) == tuple(getattr(target, attr) for attr in LEAVE_LEDGER_ATTRS):
+        return
+    if status == 'approved':
+        apply_leave_balance_delta(connection, employee_pk, start_date, end_date, -1)
+    if target.status == 'approved':
+        apply_leave_balance_delta(connection, target.employee_id, target.start_date, target.end_date, 1)
+    if (employee_pk, status) != (target.employee_id, target.status):
+        if status == 'pending':
+            add_pending_requests(connection, employee_pk, -1)
+        if target.status == 'pending':
+            add_pending_requests(connection, target.employee_id, 1)
+
+@event.listens_for(LeaveRequest, 'after_delete')
+def _leave_request_deleted(mapper, connection, target):
+    employee_pk, start_date, end_date, status = (_previous_value(target, attr) for attr in LEAVE_LEDGER_ATTRS)
+    if status == 'approved':
+        apply_leave_balance_delta(connection, employee_pk, start_date, end_date, -1)
+    if status == 'pending':
+        add_pending_requests(connection, employee_pk, -1)
+
+@event.listens_for(Employee, 'after_insert')
+def _employee_inserted(mapper, connection, target):
+    add_to_totals(connection, DepartmentTotal, {'department': target.department}, employees=1)
+
+# Moving an employee to another department moves their count, pending requests and ledger rows
+# between the department totals
+@event.listens_for(Employee, 'after_update')
+def _employee_leave_totals_updated(mapper, connection, target):
+    old_department = _previous_value(target, 'department')
+    if old_department == target.department:
+        return
+    leaves = LeaveRequest.__table__
+    pending = connection.execute(db.select(func.count(leaves.c.id)).where(
+        leaves.c.employee_id == target.id, leaves.c.status == 'pending'
+    )).scalar()
+    add_to_totals(connection, DepartmentTotal, {'department': old_department}, employees=-1, pending_requests=-pending)
+    add_to_totals(connection, DepartmentTotal, {'department': target.department}, employees=1, pending_requests=pending)
+    balances = LeaveBalance.__table__
+    rows = connection.execute(db.select(balances.c.year, balances.c.entitlement, balances.c.used).where(
+        balances.c.employee_id == target.id
+    )).all()
+    for year, entitlement, used in rows:
+        add_to_totals(connection, LeaveBalanceTotal, {'year': year, 'department': old_department},
+                      balances=-1, entitlement=-entitlement, used=-used)
+        add_to_totals(connection, LeaveBalanceTotal, {'year': year, 'department': target.department},
+                      balances=1, entitlement=entitlement, used=used)
 
-# Create database and seed initial data
-with app.app_context():
+# Counters handing out the numeric part of employee_id / request_id values
+class IdSequence(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    next_value = db.Column(db.Integer, nullable=False)
+
+# Sequence name -> (prefix, column); numbers are zero padded to at least 3 digits
+ID_SEQUENCES = {
+    'employee': ('EMP', Employee.employee_id),
+    'leave_request': ('LR', LeaveRequest.request_id),
+}
+
+def format_sequence_id(name, number):
+    return f'{ID_SEQUENCES[name][0]}{str(number).zfill(3)}'
+
+# Create missing sequence rows, starting after the highest id already in use
+def init_id_sequences():
+    for name, (prefix, column) in ID_SEQUENCES.items():
+        if db.session.get(IdSequence, name):
+            continue
+        highest = db.session.query(
+            func.max(db.cast(func.substr(column, len(prefix) + 1), db.Integer))
+        ).filter(column.like(f'{prefix}%')).scalar() or 0
+        db.session.add(IdSequence(name=name, next_value=highest + 1))
+    db.session.commit()
+
+# Atomically reserve a block of ids; the row stays locked until the caller commits
+def reserve_ids(name, count=1):
+    table = IdSequence.__table__
+    result = db.session.execute(
+        table.update().where(table.c.name == name).values(next_value=table.c.next_value + count)
+    )
+    if result.rowcount == 0:
+        raise RuntimeError(f'Unknown id sequence {name}')
+    end = db.session.execute(db.select(table.c.next_value).where(table.c.name == name)).scalar()
+    return [format_sequence_id(name, number) for number in range(end - count, end)]
+
+# Per-bucket counts straight from the Attendance table and the archived months
+def scan_attendance_buckets():
+    rows = db.session.query(
+        Attendance.date,
+        Employee.department,
+        Attendance.status,
+        func.count(Attendance.id)
+    ).select_from(Attendance).join(Employee, Attendance.employee_id == Employee.id).group_by(
+        Attendance.date, Employee.department, Attendance.status
+    ).all()
+    buckets = {(day, department, status): count for day, department, status, count in rows}
+    # Archived rows count under the department they were archived with
+    for path, in db.session.query(AttendanceArchive.path):
+        for _, _, department, day, status, _, _ in read_archived_month(path):
+            buckets[(day, department, status)] = buckets.get((day, department, status), 0) + 1
+    return buckets
+
+# Rebuild the attendance rollup from a full scan (used for backfills)
+def rebuild_attendance_rollup():
+    buckets = scan_attendance_buckets()
+    AttendanceDailyStat.query.delete()
+    db.session.bulk_insert_mappings(AttendanceDailyStat, [
+        {'date': day, 'department': department, 'status': status, 'count': count}
+        for (day, department, status), count in buckets.items()
+    ])
+    db.session.commit()
+    return len(buckets)
+
+# Compare the rollup with a live scan and return the mismatching buckets
+def check_attendance_rollup():
+    live = scan_attendance_buckets()
+    stored = {
+        (row.date, row.department, row.status): row.count
+        for row in AttendanceDailyStat.query.filter(AttendanceDailyStat.count != 0).all()
+    }
+    return [{
+        'date': key[0].isoformat(),
+        'department': key[1],
+        'status': key[2],
+        'expected': live.get(key, 0),
+        'actual': stored.get(key, 0)
+    } for key in sorted(set(live) | set(stored)) if live.get(key, 0) != stored.get(key, 0)]
+
+# Used days per (employee, year) recomputed from every approved leave request
+def scan_leave_balances():
+    used = {}
+    rows = db.session.query(
+        LeaveRequest.employee_id, LeaveRequest.start_date, LeaveRequest.end_date
+    ).filter(LeaveRequest.status == 'approved')
+    for employee_pk, start_date, end_date in rows:
+        for year, days in leave_days_by_year(start_date, end_date):
+            used[(employee_pk, year)] = used.get((employee_pk, year), 0) + days
+    return used
+
+# Recompute used days in the ledger from a full scan, keeping entitlements
+def rebuild_leave_balances():
+    used = scan_leave_balances()
+    connection = db.session.connection()
+    db.session.execute(LeaveBalance.__table__.update().values(used=0))
+    for (employee_pk, year), days in used.items():
+        add_leave_balance_days(connection, employee_pk, year, days)
+    rebuild_leave_totals()
+    db.session.commit()
+    return len(used)
+
+# Department and (year, department) leave totals recomputed from Employee, LeaveRequest and LeaveBalance
+def scan_leave_totals():
+    departments = {
+        department: {'employees': count, 'pending_requests': 0}
+        for department, count in db.session.query(Employee.department, func.count(Employee.id)).group_by(
+            Employee.department
+        )
+    }
+    for department, count in db.session.query(Employee.department, func.count(LeaveRequest.id)).join(
+        LeaveRequest.employee
+    ).filter(LeaveRequest.status == 'pending').group_by(Employee.department):
+        departments[department]['pending_requests'] = count
+    years = {
+        (year, department): {'balances': balances, 'entitlement': entitlement, 'used': used}
+        for year, department, balances, entitlement, used in db.session.query(
+            LeaveBalance.year, Employee.department, func.count(LeaveBalance.employee_id),
+            func.sum(LeaveBalance.entitlement), func.sum(LeaveBalance.used)
+        ).join(Employee, LeaveBalance.employee_id == Employee.id).group_by(LeaveBalance.year, Employee.department)
+    }
+    return departments, years
+
+# Replace the leave totals with a full recomputation (bulk loads and ledger rebuilds)
+def rebuild_leave_totals():
+    departments, years = scan_leave_totals()
+    DepartmentTotal.query.delete()
+    LeaveBalanceTotal.query.delete()
+    db.session.bulk_insert_mappings(DepartmentTotal, [
+        {'department': department, **counts} for department, counts in departments.items()
+    ])
+    db.session.bulk_insert_mappings(LeaveBalanceTotal, [
+        {'year': year, 'department': department, **sums} for (year, department), sums in years.items()
+    ])
+
+# Compare the ledger with a full recomputation and return the mismatching rows
+def check_leave_balances():
+    live = scan_leave_balances()
+    stored = {
+        (row.employee_id, row.year): row.used
+        for row in LeaveBalance.query.filter(LeaveBalance.used != 0).all()
+    }
+    return [{
+        'employee_id': key[0],
+        'year': key[1],
+        'expected': live.get(key, 0),
+        'actual': stored.get(key, 0)
+    } for key in sorted(set(live) | set(stored)) if live.get(key, 0) != stored.get(key, 0)]
+
+# Compare the leave totals with a full recomputation and return the mismatching counters
+def check_leave_totals():
+    departments, years = scan_leave_totals()
+    live = {}
+    for department, counts in departments.items():
+        live.update({(None, department, name): value for name, value in counts.items()})
+    for (year, department), sums in years.items():
+        live.update({(year, department, name): value for name, value in sums.items()})
+    stored = {}
+    for row in DepartmentTotal.query.all():
+        stored.update({(None, row.department, name): getattr(row, name) for name in ('employees', 'pending_requests')})
+    for row in LeaveBalanceTotal.query.all():
+        stored.update({(row.year, row.department, name): getattr(row, name)
+                       for name in ('balances', 'entitlement', 'used')})
+    return [{
+        'year': key[0],
+        'department': key[1],
+        'counter': key[2],
+        'expected': live.get(key, 0),
+        'actual': stored.get(key, 0)
+    } for key in sorted(set(live) | set(stored), key=lambda key: (key[0] or 0, key[1], key[2]))
+        if live.get(key, 0) != stored.get(key, 0)]
+
+# SQLite FTS5 indexes mirroring Employee and LeaveRequest (external content, synced by triggers)
+FTS_TABLES = {
+    'employee_fts': ('employee', ['name', 'email', 'title', 'department']),
+    'leave_request_fts': ('leave_request', ['request_id']),
+}
+
+# Columns each search matches, as the LIKE fallbacks do: employees by name, email or title;
+# leave requests by request id or their employee's name or department
+EMPLOYEE_SEARCH_COLUMNS = ['name', 'email', 'title']
+LEAVE_EMPLOYEE_SEARCH_COLUMNS = ['name', 'department']
+
+def fts_statements(fts_table, content_table, columns):
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        f"{column_list}, content='{content_table}', content_rowid='id', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {content_table} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {content_table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE ON {content_table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values}); END",
+    ]
+
+# Create the FTS tables and triggers, recreating any indexed with other columns; returns
+# False when FTS5 is unavailable
+def setup_fts():
+    if db.engine.dialect.name != 'sqlite':
+        return False
     try:
-        db.create_all()
-        # Seed initial employee data if empty
-        if not Employee.query.first():
-            initial_employees = [
-                Employee(
-                    employee_id='EMP001',
-                    name='Aarav Sharma',
-                    title='Software Engineer',
-                    email='aarav.sharma@company.in',
-                    department='IT',
-                    location='Bengaluru',
-                    avatar='https://via.placeholder.com/150'
-                ),
-                Employee(
-                    employee_id='EMP002',
-                    name='Priya Patel',
-                    title='Product Manager',
-                    email='priya.patel@company.in',
-                    department='Product Management',
-                    location='Mumbai',
-                    avatar='https://via.placeholder.com/150'
-                ),
-                Employee(
-                    employee_id='EMP003',
-                    name='Rohan Gupta',
-                    title='HR Specialist',
-                    email='rohan.gupta@company.in',
-                    department='Human Resources',
-                    location='Delhi',
-                    avatar='https://via.placeholder.com/150'
-                ),
-                Employee(
-                    employee_id='EMP004',
-                    name='Ananya Reddy',
-                    title='Marketing Specialist',
-                    email='ananya.reddy@company.in',
-                    department='Marketing',
-                    location='Hyderabad',
-                    avatar='https://via.placeholder.com/150'
-                ),
-                Employee(
-                    employee_id='EMP005',
-                    name='Vikram Singh',
-                    title='Data Analyst',
-                    email='vikram.singh@company.in',
-                    department='Analytics',
-                    location='Pune',
-                    avatar='https://via.placeholder.com/150'
-                ),
-                Employee(
-                    employee_id='EMP006',
-                    name='Sneha Nair',
-                    title='Financial Analyst',
-                    email='sneha.nair@company.in',
-                    department='Finance',
-                    location='Chennai',
-                    avatar='https://via.placeholder.com/150'
-                ),
-                Employee(
-                    employee_id='EMP007',
-                    name='Rahul Verma',
-                    title='DevOps Engineer',
-                    email='rahul.verma@company.in',
-                    department='IT',
-                    location='Bengaluru',
-                    avatar='https://via.placeholder.com/150'
-                ),
-                Employee(
-                    employee_id='EMP008',
-                    name='Meena Kumari',
-                    title='Business Analyst',
-                    email='meena.kumari@company.in',
-                    department='Operations',
-                    location='Ahmedabad',
-                    avatar='https://via.placeholder.com/150'
-                ),
-                Employee(
-                    employee_id='EMP009',
-                    name='Amit Joshi',
-                    title='Sales Manager',
-                    email='amit.joshi@company.in',
-                    department='Sales',
-                    location='Kolkata',
-                    avatar='https://via.placeholder.com/150'
-                ),
-                Employee(
-                    employee_id='EMP010',
-                    name='Riya Malhotra',
-                    title='Customer Support Lead',
-                    email='riya.malhotra@company.in',
-                    department='Customer Service',
-                    location='Gurugram',
-                    avatar='https://via.placeholder.com/150'
-                ),
-                Employee(
-                    employee_id='EMP011',
-                    name='Karan Mehra',
-                    title='Project Coordinator',
-                    email='karan.mehra@company.in',
-                    department='Project Management',
-                    location='Noida',
-                    avatar='https://via.placeholder.com/150'
-                ),
-                Employee(
-                    employee_id='EMP012',
-                    name='Pooja Desai',
-                    title='Content Writer',
-                    email='pooja.desai@company.in',
-                    department='Marketing',
-                    location='Jaipur',
-                    avatar='https://via.placeholder.com/150'
+        with db.engine.begin() as connection:
+            for fts_table, (content_table, columns) in FTS_TABLES.items():
+                indexed = [row[1] for row in connection.execute(text(f'PRAGMA table_info({fts_table})'))]
+                up_to_date = indexed == columns
+                if indexed and not up_to_date:
+                    for suffix in ('ai', 'ad', 'au'):
+                        connection.execute(text(f'DROP TRIGGER IF EXISTS {fts_table}_{suffix}'))
+                    connection.execute(text(f'DROP TABLE {fts_table}'))
+                for statement in fts_statements(fts_table, content_table, columns):
+                    connection.execute(text(statement))
+                if not up_to_date:
+                    connection.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
+        return True
+    except Exception as e:
+        logger.error(f"Full-text search unavailable, falling back to LIKE: {e}")
+        return False
+
+# Whether the FTS tables exist (init-db creates them); checked once per app
+def fts_enabled():
+    if current_app.config['FTS_ENABLED'] is None:
+        connection = read_session().connection()
+        current_app.config['FTS_ENABLED'] = connection.dialect.name == 'sqlite' and all(
+            inspect(connection).has_table(fts_table) for fts_table in FTS_TABLES
+        )
+    return current_app.config['FTS_ENABLED']
+
+# Turn free text into an FTS5 prefix query: every term must match as a token prefix, in one
+# of the given columns when they are given
+def build_fts_query(search, columns=None):
+    terms = [term.replace('"', '""') for term in search.split()]
+    query = ' '.join(f'"{term}"*' for term in terms if term)
+    return f"{{{' '.join(columns)}}} : ({query})" if columns and query else query
+
+# Row ids matching a search, as a subquery usable in IN (...); the parameter is named after
+# the table so subqueries on both tables can share a statement
+def fts_match_subquery(fts_table, search, columns=None):
+    matches = text(f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH :{fts_table}_query")
+    return matches.bindparams(**{f'{fts_table}_query': build_fts_query(search, columns)}).columns(rowid=db.Integer)
+
+# Ranked (bm25) row ids matching a search in one FTS table
+def fts_match_ids(fts_table, search, limit=None, columns=None):
+    sql = f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH :query ORDER BY bm25({fts_table})"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    return [row[0] for row in db.session.execute(text(sql), {'query': build_fts_query(search, columns)})]
+
+# Leave requests matching a search on their request id or their employee's name or department
+def leave_search_filter(search):
+    return (LeaveRequest.id.in_(fts_match_subquery('leave_request_fts', search)) |
+            LeaveRequest.employee_id.in_(fts_match_subquery('employee_fts', search, LEAVE_EMPLOYEE_SEARCH_COLUMNS)))
+
+# Copy statements moving pre-normalization rows onto Employee foreign keys
+LEGACY_EMPLOYEE_MATCH = {
+    'attendance': (
+        "SELECT COUNT(*) FROM attendance_legacy a WHERE NOT EXISTS "
+        "(SELECT 1 FROM employee e WHERE e.employee_id = a.employee_id)",
+        "INSERT INTO attendance (id, employee_id, clock_in, clock_out, status, date) "
+        "SELECT a.id, e.id, a.clock_in, a.clock_out, a.status, a.date "
+        "FROM attendance_legacy a JOIN employee e ON e.employee_id = a.employee_id"
+    ),
+    'leave_request': (
+        "SELECT COUNT(*) FROM leave_request_legacy l WHERE NOT EXISTS "
+        "(SELECT 1 FROM employee e WHERE e.name = l.employee_name)",
+        "INSERT INTO leave_request (id, request_id, employee_id, leave_type, start_date, end_date, days, status, created_at) "
+        "SELECT l.id, l.request_id, COALESCE("
+        "(SELECT MIN(e.id) FROM employee e WHERE e.name = l.employee_name AND e.department = l.department), "
+        "(SELECT MIN(e.id) FROM employee e WHERE e.name = l.employee_name)), "
+        "l.leave_type, l.start_date, l.end_date, l.days, l.status, l.created_at FROM leave_request_legacy l"
+    ),
+}
+
+# Migrate Attendance/LeaveRequest from copied name/department strings to Employee foreign keys
+def normalize_employee_references():
+    migrated = []
+    columns = {
+        table: {column['name'] for column in inspect(db.engine).get_columns(table)}
+        for table in LEGACY_EMPLOYEE_MATCH if inspect(db.engine).has_table(table)
+    }
+    legacy = [table for table, names in columns.items() if 'department' in names]
+    if not legacy:
+        return migrated
+
+    # Explicit BEGIN/COMMIT so the DDL is transactional on SQLite too (pysqlite autocommits DDL otherwise)
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        connection.execute(text('BEGIN'))
+        try:
+            # Refuse to migrate (and lose rows) when a row has no matching employee
+            for table in legacy:
+                unmatched_sql = LEGACY_EMPLOYEE_MATCH[table][0].replace(f'{table}_legacy', table)
+                unmatched = connection.execute(text(unmatched_sql)).scalar()
+                if unmatched:
+                    raise RuntimeError(f'{unmatched} {table} rows do not match any employee')
+
+            for table in legacy:
+                for index in inspect(connection).get_indexes(table):
+                    connection.execute(text(f'DROP INDEX IF EXISTS {index["name"]}'))
+                if table == 'leave_request' and db.engine.dialect.name == 'sqlite':
+                    for suffix in ('ai', 'ad', 'au'):
+                        connection.execute(text(f'DROP TRIGGER IF EXISTS leave_request_fts_{suffix}'))
+                    connection.execute(text('DROP TABLE IF EXISTS leave_request_fts'))
+                connection.execute(text(f'ALTER TABLE {table} RENAME TO {table}_legacy'))
+                db.metadata.tables[table].create(bind=connection)
+                connection.execute(text(LEGACY_EMPLOYEE_MATCH[table][1]))
+                connection.execute(text(f'DROP TABLE {table}_legacy'))
+                migrated.append(table)
+            connection.execute(text('COMMIT'))
+        except Exception:
+            connection.execute(text('ROLLBACK'))
+            raise
+    return migrated
+
+# Background job queued through the API and run by the in-process job runner
+class Job(db.Model):
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.Text, nullable=False, default='{}')  # JSON
+    owner = db.Column(db.String(120), nullable=False, index=True)  # User email
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer)
+    result = db.Column(db.Text)  # JSON
+    result_file = db.Column(db.String(255))
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Heartbeat while running
+
+# Create or migrate the schema and backfill derived tables (flask init-db); safe to re-run
+def init_db():
+    migrated = normalize_employee_references()
+    db.create_all()
+    # create_all skips indexes on tables that already exist
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+    current_app.config['FTS_ENABLED'] = setup_fts()
+
+    # Backfill the attendance rollup (migrated or bulk-loaded rows bypass ORM events)
+    if Attendance.query.first() and ('attendance' in migrated or not AttendanceDailyStat.query.first()):
+        rebuild_attendance_rollup()
+        logger.info("Attendance rollup rebuilt successfully")
+
+    # Backfill the leave ledger (and its totals) the same way
+    if 'leave_request' in migrated or not LeaveBalance.query.first() or (
+        Employee.query.first() and not DepartmentTotal.query.first()
+    ):
+        rebuild_leave_balances()
+        logger.info("Leave balances rebuilt successfully")
+
+    init_id_sequences()
+    return migrated
+
+# Load the demo employees, attendance and leave requests into empty tables (flask seed).
+# Bulk saves bypass the ORM events, so the rollup, ledger and id sequences are rebuilt after
+def seed_demo_data():
+    seeded = False
+    # Seed initial employee data if empty
+    if not Employee.query.first():
+        initial_employees = [
+            Employee(
+                employee_id='EMP001',
+                name='Aarav Sharma',
+                title='Software Engineer',
+                email='aarav.sharma@company.in',
+                department='IT',
+                location='Bengaluru',
+                avatar='https://via.placeholder.com/150'
+            ),
+            Employee(
+                employee_id='EMP002',
+                name='Priya Patel',
+                title='Product Manager',
+                email='priya.patel@company.in',
+                department='Product Management',
+                location='Mumbai',
+                avatar='https://via.placeholder.com/150'
+            ),
+            Employee(
+                employee_id='EMP003',
+                name='Rohan Gupta',
+                title='HR Specialist',
+                email='rohan.gupta@company.in',
+                department='Human Resources',
+                location='Delhi',
+                avatar='https://via.placeholder.com/150'
+            ),
+            Employee(
+                employee_id='EMP004',
+                name='Ananya Reddy',
+                title='Marketing Specialist',
+                email='ananya.reddy@company.in',
+                department='Marketing',
+                location='Hyderabad',
+                avatar='https://via.placeholder.com/150'
+            ),
+            Employee(
+                employee_id='EMP005',
+                name='Vikram Singh',
+                title='Data Analyst',
+                email='vikram.singh@company.in',
+                department='Analytics',
+                location='Pune',
+                avatar='https://via.placeholder.com/150'
+            ),
+            Employee(
+                employee_id='EMP006',
+                name='Sneha Nair',
+                title='Financial Analyst',
+                email='sneha.nair@company.in',
+                department='Finance',
+                location='Chennai',
+                avatar='https://via.placeholder.com/150'
+            ),
+            Employee(
+                employee_id='EMP007',
+                name='Rahul Verma',
+                title='DevOps Engineer',
+                email='rahul.verma@company.in',
+                department='IT',
+                location='Bengaluru',
+                avatar='https://via.placeholder.com/150'
+            ),
+            Employee(
+                employee_id='EMP008',
+                name='Meena Kumari',
+                title='Business Analyst',
+                email='meena.kumari@company.in',
+                department='Operations',
+                location='Ahmedabad',
+                avatar='https://via.placeholder.com/150'
+            ),
+            Employee(
+                employee_id='EMP009',
+                name='Amit Joshi',
+                title='Sales Manager',
+                email='amit.joshi@company.in',
+                department='Sales',
+                location='Kolkata',
+                avatar='https://via.placeholder.com/150'
+            ),
+            Employee(
+                employee_id='EMP010',
+                name='Riya Malhotra',
+                title='Customer Support Lead',
+                email='riya.malhotra@company.in',
+                department='Customer Service',
+                location='Gurugram',
+                avatar='https://via.placeholder.com/150'
+            ),
+            Employee(
+                employee_id='EMP011',
+                name='Karan Mehra',
+                title='Project Coordinator',
+                email='karan.mehra@company.in',
+                department='Project Management',
+                location='Noida',
+                avatar='https://via.placeholder.com/150'
+            ),
+            Employee(
+                employee_id='EMP012',
+                name='Pooja Desai',
+                title='Content Writer',
+                email='pooja.desai@company.in',
+                department='Marketing',
+                location='Jaipur',
+                avatar='https://via.placeholder.com/150'
+            )
+        ]
+        db.session.bulk_save_objects(initial_employees)
+        db.session.commit()
+        logger.info("Employee data seeded successfully")
+        seeded = True
+
+    # Seed initial attendance data if empty
+    if not Attendance.query.first():
+        employees = Employee.query.all()
+        start_date = date(2025, 4, 30)  # Current date as per prompt
+        statuses = ['present', 'late', 'leave', 'remote']
+        initial_attendance = []
+        for emp in employees:
+            emp_index = int(emp.employee_id[-3:]) - 1
+            status = statuses[emp_index % 4]  # Cycle through statuses
+            clock_in = '09:00' if status in ['present', 'late'] else '--:--'
+            clock_out = '17:30' if status in ['present', 'late'] else '--:--'
+            if status == 'late':
+                clock_in = '09:45'
+            initial_attendance.append(
+                Attendance(
+                    employee_id=emp.id,
+                    clock_in=clock_in,
+                    clock_out=clock_out,
+                    status=status,
+                    date=start_date
                 )
-            ]
-            db.session.bulk_save_objects(initial_employees)
-            db.session.commit()
-            logger.info("Employee data seeded successfully")
-
-        # Seed initial attendance data if empty
-        if not Attendance.query.first():
-            employees = Employee.query.all()
-            start_date = date(2025, 4, 30)  # Current date as per prompt
-            statuses = ['present', 'late', 'leave', 'remote']
-            initial_attendance = []
-            for emp in employees:
-                emp_index = int(emp.employee_id[-3:]) - 1
-                status = statuses[emp_index % 4]  # Cycle through statuses
-                clock_in = '09:00' if status in ['present', 'late'] else '--:--'
-                clock_out = '17:30' if status in ['present', 'late'] else '--:--'
-                if status == 'late':
-                    clock_in = '09:45'
-                initial_attendance.append(
-                    Attendance(
-                        employee_id=emp.employee_id,
-                        name=emp.name,
-                        department=emp.department,
-                        clock_in=clock_in,
-                        clock_out=clock_out,
-                        status=status,
-                        date=start_date,
-                        image='https://via.placeholder.com/32'
-                    )
+            )
+        db.session.bulk_save_objects(initial_attendance)
+        db.session.commit()
+        logger.info("Attendance data seeded successfully")
+        seeded = True
+
+    # Seed initial leave request data if empty
+    if not LeaveRequest.query.first():
+        employees_by_name = {emp.name: emp for emp in Employee.query.all()}
+        initial_leaves = [
+            LeaveRequest(
+                request_id='LR001',
+                employee_id=employees_by_name['Aarav Sharma'].id,
+                leave_type='Diwali Leave',
+                start_date=date(2025, 11, 12),
+                end_date=date(2025, 11, 15),
+                days=4,
+                status='pending'
+            ),
+            LeaveRequest(
+                request_id='LR002',
+                employee_id=employees_by_name['Priya Patel'].id,
+                leave_type='Personal Leave',
+                start_date=date(2025, 4, 28),
+                end_date=date(2025, 4, 30),
+                days=3,
+                status='approved'
+            ),
+            LeaveRequest(
+                request_id='LR003',
+                employee_id=employees_by_name['Rohan Gupta'].id,
+                leave_type='Holi Leave',
+                start_date=date(2025, 3, 17),
+                end_date=date(2025, 3, 18),
+                days=2,
+                status='pending'
+            ),
+            LeaveRequest(
+                request_id='LR004',
+                employee_id=employees_by_name['Ananya Reddy'].id,
+                leave_type='Sick Leave',
+                start_date=date(2025, 5, 10),
+                end_date=date(2025, 5, 12),
+                days=3,
+                status='approved'
+            ),
+            LeaveRequest(
+                request_id='LR005',
+                employee_id=employees_by_name['Vikram Singh'].id,
+                leave_type='Republic Day',
+                start_date=date(2025, 1, 25),
+                end_date=date(2025, 1, 26),
+                days=2,
+                status='rejected'
+            ),
+            LeaveRequest(
+                request_id='LR006',
+                employee_id=employees_by_name['Sneha Nair'].id,
+                leave_type='Annual Leave',
+                start_date=date(2025, 6, 15),
+                end_date=date(2025, 6, 20),
+                days=6,
+                status='approved'
+            ),
+            LeaveRequest(
+                request_id='LR007',
+                employee_id=employees_by_name['Rahul Verma'].id,
+                leave_type='Personal Leave',
+                start_date=date(2025, 7, 1),
+                end_date=date(2025, 7, 2),
+                days=2,
+                status='pending'
+            ),
+            LeaveRequest(
+                request_id='LR008',
+                employee_id=employees_by_name['Meena Kumari'].id,
+                leave_type='Sick Leave',
+                start_date=date(2025, 2, 10),
+                end_date=date(2025, 2, 11),
+                days=2,
+                status='approved'
+            ),
+            LeaveRequest(
+                request_id='LR009',
+                employee_id=employees_by_name['Amit Joshi'].id,
+                leave_type='Raksha Bandhan',
+                start_date=date(2025, 8, 9),
+                end_date=date(2025, 8, 10),
+                days=2,
+                status='rejected'
+            ),
+            LeaveRequest(
+                request_id='LR010',
+                employee_id=employees_by_name['Riya Malhotra'].id,
+                leave_type='Casual Leave',
+                start_date=date(2025, 9, 5),
+                end_date=date(2025, 9, 6),
+                days=2,
+                status='approved'
+            ),
+            LeaveRequest(
+                request_id='LR011',
+                employee_id=employees_by_name['Karan Mehra'].id,
+                leave_type='Diwali Leave',
+                start_date=date(2025, 11, 13),
+                end_date=date(2025, 11, 14),
+                days=2,
+                status='pending'
+            ),
+            LeaveRequest(
+                request_id='LR012',
+                employee_id=employees_by_name['Pooja Desai'].id,
+                leave_type='Holi Leave',
+                start_date=date(2025, 3, 17),
+                end_date=date(2025, 3, 17),
+                days=1,
+                status='approved'
+            ),
+            LeaveRequest(
+                request_id='LR013',
+                employee_id=employees_by_name['Aarav Sharma'].id,
+                leave_type='Casual Leave',
+                start_date=date(2025, 10, 10),
+                end_date=date(2025, 10, 11),
+                days=2,
+                status='rejected'
+            ),
+            LeaveRequest(
+                request_id='LR014',
+                employee_id=employees_by_name['Priya Patel'].id,
+                leave_type='Annual Leave',
+                start_date=date(2025, 12, 20),
+                end_date=date(2025, 12, 21),
+                days=2,
+                status='pending'
+            ),
+            LeaveRequest(
+                request_id='LR015',
+                employee_id=employees_by_name['Rohan Gupta'].id,
+                leave_type='Sick Leave',
+                start_date=date(2025, 4, 15),
+                end_date=date(2025, 4, 16),
+                days=2,
+                status='approved'
+            ),
+            LeaveRequest(
+                request_id='LR016',
+                employee_id=employees_by_name['Ananya Reddy'].id,
+                leave_type='Ganesh Chaturthi',
+                start_date=date(2025, 8, 27),
+                end_date=date(2025, 8, 28),
+                days=2,
+                status='approved'
+            )
+        ]
+        db.session.bulk_save_objects(initial_leaves)
+        db.session.commit()
+        logger.info("Leave request data seeded successfully")
+        seeded = True
+
+    if seeded:
+        rebuild_attendance_rollup()
+        rebuild_leave_balances()
+        IdSequence.query.delete()
+        db.session.commit()
+        init_id_sequences()
+    return seeded
+
+# Hashing runs on a small pool so a login storm uses at most PASSWORD_HASH_WORKERS cores
+# (hashlib releases the GIL) while the remaining request threads keep serving. Created on
+# first use, so importing the app starts no threads
+password_executor = None
+password_slots = None
+password_pool_lock = threading.Lock()
+_configured_hash_prefix = None
+
+def password_pool():
+    global password_executor, password_slots
+    if password_executor is None:
+        with password_pool_lock:
+            if password_executor is None:
+                password_slots = threading.BoundedSemaphore(
+                    current_app.config['PASSWORD_HASH_WORKERS'] + current_app.config['PASSWORD_HASH_QUEUE']
                 )
-            db.session.bulk_save_objects(initial_attendance)
-            db.session.commit()
-            logger.info("Attendance data seeded successfully")
-
-        # Seed initial leave request data if empty
-        if not LeaveRequest.query.first():
-            initial_leaves = [
-                LeaveRequest(
-                    request_id='LR001',
-                    employee_name='Aarav Sharma',
-                    department='IT',
-                    employee_image='https://via.placeholder.com/32',
-                    leave_type='Diwali Leave',
-                    start_date=date(2025, 11, 12),
-                    end_date=date(2025, 11, 15),
-                    days=4,
-                    status='pending'
-                ),
-                LeaveRequest(
-                    request_id='LR002',
-                    employee_name='Priya Patel',
-                    department='Product Management',
-                    employee_image='https://via.placeholder.com/32',
-                    leave_type='Personal Leave',
-                    start_date=date(2025, 4, 28),
-                    end_date=date(2025, 4, 30),
-                    days=3,
-                    status='approved'
-                ),
-                LeaveRequest(
-                    request_id='LR003',
-                    employee_name='Rohan Gupta',
-                    department='Human Resources',
-                    employee_image='https://via.placeholder.com/32',
-                    leave_type='Holi Leave',
-                    start_date=date(2025, 3, 17),
-                    end_date=date(2025, 3, 18),
-                    days=2,
-                    status='pending'
-                ),
-                LeaveRequest(
-                    request_id='LR004',
-                    employee_name='Ananya Reddy',
-                    department='Marketing',
-                    employee_image='https://via.placeholder.com/32',
-                    leave_type='Sick Leave',
-                    start_date=date(2025, 5, 10),
-                    end_date=date(2025, 5, 12),
-                    days=3,
-                    status='approved'
-                ),
-                LeaveRequest(
-                    request_id='LR005',
-                    employee_name='Vikram Singh',
-                    department='Analytics',
-                    employee_image='https://via.placeholder.com/32',
-                    leave_type='Republic Day',
-                    start_date=date(2025, 1, 25),
-                    end_date=date(2025, 1, 26),
-                    days=2,
-                    status='rejected'
-                ),
-                LeaveRequest(
-                    request_id='LR006',
-                    employee_name='Sneha Nair',
-                    department='Finance',
-                    employee_image='https://via.placeholder.com/32',
-                    leave_type='Annual Leave',
-                    start_date=date(2025, 6, 15),
-                    end_date=date(2025, 6, 20),
-                    days=6,
-                    status='approved'
-                ),
-                LeaveRequest(
-                    request_id='LR007',
-                    employee_name='Rahul Verma',
-                    department='IT',
-                    employee_image='https://via.placeholder.com/32',
-                    leave_type='Personal Leave',
-                    start_date=date(2025, 7, 1),
-                    end_date=date(2025, 7, 2),
-                    days=2,
-                    status='pending'
-                ),
-                LeaveRequest(
-                    request_id='LR008',
-                    employee_name='Meena Kumari',
-                    department='Operations',
-                    employee_image='https://via.placeholder.com/32',
-                    leave_type='Sick Leave',
-                    start_date=date(2025, 2, 10),
-                    end_date=date(2025, 2, 11),
-                    days=2,
-                    status='approved'
-                ),
-                LeaveRequest(
-                    request_id='LR009',
-                    employee_name='Amit Joshi',
-                    department='Sales',
-                    employee_image='https://via.placeholder.com/32',
-                    leave_type='Raksha Bandhan',
-                    start_date=date(2025, 8, 9),
-                    end_date=date(2025, 8, 10),
-                    days=2,
-                    status='rejected'
-                ),
-                LeaveRequest(
-                    request_id='LR010',
-                    employee_name='Riya Malhotra',
-                    department='Customer Service',
-                    employee_image='https://via.placeholder.com/32',
-                    leave_type='Casual Leave',
-                    start_date=date(2025, 9, 5),
-                    end_date=date(2025, 9, 6),
-                    days=2,
-                    status='approved'
-                ),
-                LeaveRequest(
-                    request_id='LR011',
-                    employee_name='Karan Mehra',
-                    department='Project Management',
-                    employee_image='https://via.placeholder.com/32',
-                    leave_type='Diwali Leave',
-                    start_date=date(2025, 11, 13),
-                    end_date=date(2025, 11, 14),
-                    days=2,
-                    status='pending'
-                ),
-                LeaveRequest(
-                    request_id='LR012',
-                    employee_name='Pooja Desai',
-                    department='Marketing',
-                    employee_image='https://via.placeholder.com/32',
-                    leave_type='Holi Leave',
-                    start_date=date(2025, 3, 17),
-                    end_date=date(2025, 3, 17),
-                    days=1,
-                    status='approved'
-                ),
-                LeaveRequest(
-                    request_id='LR013',
-                    employee_name='Aarav Sharma',
-                    department='IT',
-                    employee_image='https://via.placeholder.com/32',
-                    leave_type='Casual Leave',
-                    start_date=date(2025, 10, 10),
-                    end_date=date(2025, 10, 11),
-                    days=2,
-                    status='rejected'
-                ),
-                LeaveRequest(
-                    request_id='LR014',
-                    employee_name='Priya Patel',
-                    department='Product Management',
-                    employee_image='https://via.placeholder.com/32',
-                    leave_type='Annual Leave',
-                    start_date=date(2025, 12, 20),
-                    end_date=date(2025, 12, 21),
-                    days=2,
-                    status='pending'
-                ),
-                LeaveRequest(
-                    request_id='LR015',
-                    employee_name='Rohan Gupta',
-                    department='Human Resources',
-                    employee_image='https://via.placeholder.com/32',
-                    leave_type='Sick Leave',
-                    start_date=date(2025, 4, 15),
-                    end_date=date(2025, 4, 16),
-                    days=2,
-                    status='approved'
-                ),
-                LeaveRequest(
-                    request_id='LR016',
-                    employee_name='Ananya Reddy',
-                    department='Marketing',
-                    employee_image='https://via.placeholder.com/32',
-                    leave_type='Ganesh Chaturthi',
-                    start_date=date(2025, 8, 27),
-                    end_date=date(2025, 8, 28),
-                    days=2,
-                    status='approved'
+                password_executor = ThreadPoolExecutor(
+                    max_workers=current_app.config['PASSWORD_HASH_WORKERS'],
+                    thread_name_prefix='password-hash'
                 )
-            ]
-            db.session.bulk_save_objects(initial_leaves)
-            db.session.commit()
-            logger.info("Leave request data seeded successfully")
+    return password_executor, password_slots
+
+# Run a hashing function on the pool; raises TimeoutError when the pool is saturated
+def run_password_task(fn, *args):
+    executor, slots = password_pool()
+    if not slots.acquire(timeout=current_app.config['PASSWORD_HASH_TIMEOUT']):
+        raise TimeoutError('Password hashing pool is saturated')
+    try:
+        return executor.submit(fn, *args).result(timeout=current_app.config['PASSWORD_HASH_TIMEOUT'])
+    except FutureTimeoutError:
+        raise TimeoutError('Password hashing timed out')
+    finally:
+        slots.release()
+
+def hash_password(password):
+    return run_password_task(generate_password_hash, password, current_app.config['PASSWORD_HASH_METHOD'])
+
+def verify_password(password_hash, password):
+    return run_password_task(check_password_hash, password_hash, password)
+
+# True when a stored hash was made with a different method or work factor than configured
+def password_needs_rehash(password_hash):
+    global _configured_hash_prefix
+    if _configured_hash_prefix is None:
+        # werkzeug fills in default parameters, so read them back from a real hash
+        _configured_hash_prefix = hash_password('').split('$', 1)[0]
+    return password_hash.split('$', 1)[0] != _configured_hash_prefix
+
+# In-process TTL + LRU cache of API responses; entries are keyed by the versions of the
+# tables they read, so bumping a table's version invalidates exactly its dependents
+class ResponseCache:
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.versions = {}
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    # Version token and last write time of the given tables. Versions are per process and
+    # other workers' writes are invisible here, so the token also rolls over every TTL and no
+    # write time is given: another worker may have changed the tables since
+    def table_state(self, tables):
+        with self.lock:
+            versions = [self.versions.get(table, 0) for table in tables]
+        token = f'{self.started}:{int(time.time() // max(self.ttl, 1))}:' + ','.join(map(str, versions))
+        return token, None
+
+    def bump(self, tables):
+        with self.lock:
+            for table in tables:
+                self.versions[table] = self.versions.get(table, 0) + 1
+            self.stats['invalidations'] += len(tables)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[1]
+            if entry:
+                del self.entries[key]
+            self.stats['misses'] += 1
+            return None
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def info(self):
+        with self.lock:
+            return dict(self.stats, size=len(self.entries), backend='memory')
+
+# Same interface backed by Redis, so every worker shares entries, table versions and write
+# times. A table with no recorded write time (e.g. none since Redis was emptied) has none
+class RedisResponseCache(ResponseCache):
+    def __init__(self, client, ttl):
+        super().__init__(0, ttl)
+        self.client = client
+
+    def table_state(self, tables):
+        values = self.client.mget(
+            [f'cache:version:{table}' for table in tables] + [f'cache:modified:{table}' for table in tables]
+        )
+        versions = [int(version or 0) for version in values[:len(tables)]]
+        written = values[len(tables):]
+        modified = max(float(value) for value in written) if written and all(written) else None
+        return ','.join(map(str, versions)), modified
+
+    def bump(self, tables):
+        now = time.time()
+        pipeline = self.client.pipeline()
+        for table in tables:
+            pipeline.incr(f'cache:version:{table}')
+            pipeline.set(f'cache:modified:{table}', now)
+        pipeline.execute()
+        with self.lock:
+            self.stats['invalidations'] += len(tables)
+
+    def get(self, key):
+        value = self.client.get(f'cache:entry:{key}')
+        with self.lock:
+            self.stats['hits' if value is not None else 'misses'] += 1
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value):
+        # Redis applies its own maxmemory eviction policy
+        self.client.setex(f'cache:entry:{key}', self.ttl, json.dumps(value))
+
+    def info(self):
+        with self.lock:
+            return dict(self.stats, size=self.client.dbsize(), backend='redis')
+
+def create_response_cache():
+    if current_app.config['CACHE_REDIS_URL']:
+        try:
+            import redis
+            client = redis.Redis.from_url(current_app.config['CACHE_REDIS_URL'])
+            client.ping()
+            return RedisResponseCache(client, current_app.config['CACHE_TTL'])
+        except Exception as e:
+            logger.error(f"Redis cache unavailable, using in-process cache: {e}")
+    return ResponseCache(current_app.config['CACHE_MAX_ENTRIES'], current_app.config['CACHE_TTL'])
+
+response_cache_lock = threading.Lock()
+pending_invalidations = threading.local()
+
+# The current app's response cache, created on first use (connecting to Redis if configured)
+def get_response_cache():
+    cache = current_app.extensions.get('response_cache')
+    if cache is None:
+        with response_cache_lock:
+            cache = current_app.extensions.get('response_cache')
+            if cache is None:
+                cache = current_app.extensions['response_cache'] = create_response_cache()
+    return cache
+
+# Record every table written through INSERT/UPDATE/DELETE on the connection
+def _track_written_tables(conn, clauseelement, multiparams, params, execution_options, result):
+    if isinstance(clauseelement, UpdateBase):
+        conn.info.setdefault('written_tables', set()).add(clauseelement.table.name)
+
+def _collect_written_tables(conn):
+    tables = conn.info.pop('written_tables', None)
+    if tables:
+        pending_invalidations.tables = getattr(pending_invalidations, 'tables', set()) | tables
+
+def _discard_written_tables(conn):
+    conn.info.pop('written_tables', None)
+
+# Invalidate only once the commit has completed, so readers cannot re-cache old rows
+@event.listens_for(Session, 'after_commit')
+def _invalidate_written_tables(session):
+    tables = getattr(pending_invalidations, 'tables', None)
+    if tables:
+        pending_invalidations.tables = set()
+        get_response_cache().bump(tables)
+
+# Session for the read-only list and stats APIs. asgi.py runs those views on its event loop
+# with a session on the async driver in g.read_session; everywhere else it is db.session
+def read_session():
+    return g.get('read_session') or db.session
+
+# Cache a GET API's successful JSON response, keyed by path, query args and table versions.
+# The same key is the response's strong ETag, so If-None-Match is answered with 304 before
+# any row is read. Last-Modified / If-Modified-Since are only used when the cache knows when
+# the tables were last written by any worker, i.e. with the shared Redis store
+def cached_response(*tables):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            args_key = urlencode(sorted(request.args.items(multi=True)))  # Escaped, so distinct queries never share a key
+            token, modified = get_response_cache().table_state(tables)
+            key = hashlib.sha1(f'{request.path}?{args_key}|{token}'.encode()).hexdigest()
+            last_modified = datetime.fromtimestamp(int(modified), timezone.utc) if modified is not None else None
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(key)
+            else:
+                not_modified = bool(last_modified and request.if_modified_since
+                                    and request.if_modified_since >= last_modified)
+            if not_modified:
+                response = Response(status=304)
+            else:
+                cached = get_response_cache().get(key)
+                if cached is not None:
+                    response = Response(cached, mimetype='application/json')
+                else:
+                    response = current_app.make_response(f(*args, **kwargs))
+                    if response.status_code != 200 or response.mimetype != 'application/json':
+                        return response
+                    get_response_cache().set(key, response.get_data(as_text=True))
+
+            response.set_etag(key)
+            if last_modified:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'private, no-cache'  # Always revalidate, per user
+            return response
+        return decorated_function
+    return decorator
+
+SSE_RETRY = b'retry: 3000\n\n'  # Milliseconds the browser waits before reconnecting
+SSE_HEARTBEAT = b': heartbeat\n\n'
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}  # Proxies must not buffer the stream
+
+# One server-sent event, encoded
+def sse_frame(event_id, event_type, data):
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+# Recent change events for /api/stream, kept encoded in a ring buffer for Last-Event-ID resume.
+# Ids are '<stream>:<n>' with n counting up; stream is new for every hub, so an id from another
+# process or an earlier run gets a reset event (reload everything) rather than a silent gap
+class ChangeHub:
+    def __init__(self, buffer_size):
+        self.stream = f'{int(time.time() * 1000):x}{os.getpid():x}'
+        self.events = deque(maxlen=buffer_size)
+        self.last_id = 0
+        self.condition = threading.Condition()
+        self.listeners = []  # Called on the publishing thread after each event; must not block
+
+    def publish(self, event_type, data):
+        self.append(event_type, data)
+
+    def append(self, event_type, data, number=None):
+        with self.condition:
+            self.last_id = number if number is not None else self.last_id + 1
+            self.events.append((self.last_id, sse_frame(f'{self.stream}:{self.last_id}', event_type, data)))
+            self.condition.notify_all()
+        for listener in self.listeners:
+            listener()
+
+    # Position to stream from for a Last-Event-ID and the frames to send first: the events the
+    # client missed, or a reset when they have left the buffer or the id is not ours
+    def resume(self, last_event_id):
+        with self.condition:
+            if not last_event_id:
+                return self.last_id, []
+            stream, _, number = last_event_id.rpartition(':')
+            if stream == self.stream and number.isdigit():
+                oldest = self.events[0][0] if self.events else self.last_id + 1
+                if oldest - 1 <= int(number) <= self.last_id:
+                    return self.after(int(number))
+            return self.last_id, [sse_frame(f'{self.stream}:{self.last_id}', 'reset', {})]
+
+    # Position after the newest event and the frames of the events published after position
+    def after(self, position):
+        frames = []
+        with self.condition:
+            for number, frame in reversed(self.events):
+                if number <= position:
+                    break
+                frames.append(frame)
+            return self.last_id, frames[::-1]
+
+    # after(), waiting up to timeout seconds for an event if there is none yet
+    def wait(self, position, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.last_id != position, timeout)
+            return self.after(position)
+
+# Same interface with events going through Redis, so every worker's hub receives every event
+# with the same id and in the same order: a Lua script numbers and publishes each event
+# atomically, and a relay thread per process appends what arrives
+class RedisChangeHub(ChangeHub):
+    PUBLISH_SCRIPT = "local n = redis.call('INCR', KEYS[1]) redis.call('PUBLISH', KEYS[2], n .. ' ' .. ARGV[1]) return n"
+
+    def __init__(self, client, buffer_size):
+        super().__init__(buffer_size)
+        self.stream = 'redis'
+        self.client = client
+        threading.Thread(target=self.relay, name='change-hub-relay', daemon=True).start()
+
+    def publish(self, event_type, data):
+        self.client.eval(self.PUBLISH_SCRIPT, 2, 'stream:last_id', 'stream:events', json.dumps([event_type, data]))
+
+    def relay(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe('stream:events')
+                for message in pubsub.listen():
+                    number, _, payload = message['data'].decode().partition(' ')
+                    event_type, data = json.loads(payload)
+                    self.append(event_type, data, int(number))
+            except Exception as e:
+                logger.error(f"Change stream relay lost Redis, reconnecting: {e}")
+                time.sleep(1)
+
+def create_change_hub():
+    if current_app.config['CACHE_REDIS_URL']:
+        try:
+            import redis
+            client = redis.Redis.from_url(current_app.config['CACHE_REDIS_URL'])
+            client.ping()
+            return RedisChangeHub(client, current_app.config['STREAM_BUFFER_SIZE'])
+        except Exception as e:
+            logger.error(f"Redis change stream unavailable, events stay in this process: {e}")
+    return ChangeHub(current_app.config['STREAM_BUFFER_SIZE'])
+
+change_hub_lock = threading.Lock()
+
+# The current app's change hub, created on first use
+def get_change_hub():
+    hub = current_app.extensions.get('change_hub')
+    if hub is None:
+        with change_hub_lock:
+            hub = current_app.extensions.get('change_hub')
+            if hub is None:
+                hub = current_app.extensions['change_hub'] = create_change_hub()
+    return hub
+
+# Push a change to /api/stream subscribers. Called once the write has committed, so a failure
+# here is logged and does not fail the request
+def publish_change(event_type, data):
+    try:
+        get_change_hub().publish(event_type, data)
     except Exception as e:
-        db.session.rollback()
-        logger.error(f"Error creating database: {e}")
+        logger.error(f"Error publishing {event_type} event: {e}")
+
+# Push the (event type, data) pairs of a committed batch write, or one reset event (reload
+# everything) when it changed more than STREAM_BATCH_EVENTS rows, so a large batch does not
+# push every other event out of the resume buffer. changes is only iterated for small batches
+def publish_batch_changes(count, changes):
+    if not count:
+        return
+    if count > current_app.config['STREAM_BATCH_EVENTS']:
+        publish_change('reset', {})
+        return
+    try:
+        for event_type, data in changes:
+            publish_change(event_type, data)
+    except Exception as e:
+        logger.error(f"Error publishing batch events: {e}")
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]  # Seconds
+
+# Per-process request and SQL metrics, rendered in the Prometheus text format
+class RequestMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latency = {}  # (method, endpoint) -> [count per bucket..., sum, count]
+        self.requests = {}  # (method, endpoint, status) -> count
+        self.queries = {}  # endpoint -> [queries, seconds]
+        self.n_plus_one = {}  # endpoint -> requests flagged
+        self.slow_queries = 0
+
+    def observe_request(self, method, endpoint, status, seconds, queries, query_seconds, n_plus_one):
+        with self.lock:
+            histogram = self.latency.setdefault((method, endpoint), [0] * (len(LATENCY_BUCKETS) + 2))
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    histogram[i] += 1
+            histogram[-2] += seconds
+            histogram[-1] += 1
+            key = (method, endpoint, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.add_queries(endpoint, queries, query_seconds)
+            if n_plus_one:
+                self.n_plus_one[endpoint] = self.n_plus_one.get(endpoint, 0) + 1
+
+    def add_queries(self, endpoint, queries, seconds):
+        totals = self.queries.setdefault(endpoint, [0, 0.0])
+        totals[0] += queries
+        totals[1] += seconds
+
+    def observe_background_query(self, seconds):
+        with self.lock:
+            self.add_queries('(background)', 1, seconds)
+
+    def observe_slow_query(self):
+        with self.lock:
+            self.slow_queries += 1
+
+    def render(self):
+        lines = []
+        with self.lock:
+            lines.append('# TYPE http_request_duration_seconds histogram')
+            for (method, endpoint), histogram in sorted(self.latency.items()):
+                labels = f'method="{method}",endpoint="{endpoint}"'
+                for bound, count in zip(LATENCY_BUCKETS, histogram):
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram[-1]}')
+                lines.append(f'http_request_duration_seconds_sum{{{labels}}} {histogram[-2]:.6f}')
+                lines.append(f'http_request_duration_seconds_count{{{labels}}} {histogram[-1]}')
+            lines.append('# TYPE http_requests_total counter')
+            for (method, endpoint, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{method="{method}",endpoint="{endpoint}",status="{status}"}} {count}')
+            lines.append('# TYPE db_queries_total counter')
+            for endpoint, (queries, _) in sorted(self.queries.items()):
+                lines.append(f'db_queries_total{{endpoint="{endpoint}"}} {queries}')
+            lines.append('# TYPE db_query_seconds_total counter')
+            for endpoint, (_, seconds) in sorted(self.queries.items()):
+                lines.append(f'db_query_seconds_total{{endpoint="{endpoint}"}} {seconds:.6f}')
+            lines.append('# TYPE db_n_plus_one_requests_total counter')
+            for endpoint, count in sorted(self.n_plus_one.items()):
+                lines.append(f'db_n_plus_one_requests_total{{endpoint="{endpoint}"}} {count}')
+            lines.append('# TYPE db_slow_queries_total counter')
+            lines.append(f'db_slow_queries_total {self.slow_queries}')
+        cache = get_response_cache().info()
+        for stat in ('hits', 'misses', 'evictions', 'invalidations'):
+            lines.append(f'# TYPE response_cache_{stat}_total counter')
+            lines.append(f'response_cache_{stat}_total {cache[stat]}')
+        return '\n'.join(lines) + '\n'
+
+request_metrics = RequestMetrics()
+
+# Log a slow statement with its parameters and query plan; the plan is read through a raw
+# DBAPI cursor so it does not re-enter these events or disturb the statement's own cursor
+def log_slow_query(conn, statement, parameters, seconds, executemany):
+    request_metrics.observe_slow_query()
+    plan = ''
+    if not executemany and statement.lstrip().upper().startswith('SELECT'):
+        prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+        try:
+            cursor = conn.connection.cursor()
+            cursor.execute(prefix + statement, parameters)
+            plan = '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+            cursor.close()
+        except Exception as e:
+            plan = f'(EXPLAIN failed: {e})'
+    logger.warning(f"Slow query ({seconds * 1000:.1f} ms): {statement} params={repr(parameters)[:500]}\n{plan}")
+
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_started'] = time.perf_counter()
+
+# Count and time every statement against the current request (or as background work)
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    if not current_app.config['METRICS_ENABLED']:
+        return
+    seconds = time.perf_counter() - conn.info.pop('query_started', time.perf_counter())
+    if has_request_context() and 'sql_statements' in g:
+        g.sql_count += 1
+        g.sql_seconds += seconds
+        g.sql_statements[statement] = g.sql_statements.get(statement, 0) + 1
+    else:
+        request_metrics.observe_background_query(seconds)
+    if seconds * 1000 >= current_app.config['SLOW_QUERY_MS']:
+        log_slow_query(conn, statement, parameters, seconds, executemany)
+
+# Hook one of the app's engines into cache invalidation and query metrics. The listeners read
+# current_app, so they go on the app's own engines, not the Engine class, and leave engines of
+# scripts or other apps in the process alone
+def instrument_engine(engine):
+    event.listen(engine, 'after_execute', _track_written_tables)
+    event.listen(engine, 'commit', _collect_written_tables)
+    event.listen(engine, 'rollback', _discard_written_tables)
+    event.listen(engine, 'before_cursor_execute', _start_query_timer)
+    event.listen(engine, 'after_cursor_execute', _record_query)
+
+def _start_request_profile():
+    if current_app.config['METRICS_ENABLED']:
+        g.request_started = time.perf_counter()
+        g.sql_count = 0
+        g.sql_seconds = 0.0
+        g.sql_statements = {}
+
+# Record latency and SQL totals per endpoint, flag statements repeated often enough to look
+# like an N+1 loop, and expose the numbers to the browser via Server-Timing
+def _finish_request_profile(response):
+    if 'request_started' not in g:
+        return response
+    seconds = time.perf_counter() - g.request_started
+    endpoint = request.url_rule.rule if request.url_rule else '(unmatched)'
+    repeated = {statement: count for statement, count in g.sql_statements.items()
+                if count >= current_app.config['N_PLUS_ONE_THRESHOLD']}
+    for statement, count in repeated.items():
+        logger.warning(f"Possible N+1 in {request.method} {endpoint}: statement ran {count} times: {statement}")
+    request_metrics.observe_request(request.method, endpoint, response.status_code, seconds,
+                                    g.sql_count, g.sql_seconds, bool(repeated))
+    response.headers['Server-Timing'] = (
+        f'db;dur={g.sql_seconds * 1000:.1f};desc="{g.sql_count} queries", total;dur={seconds * 1000:.1f}'
+    )
+    return response
+
+# HTML pages and login/signup; JSON APIs and /metrics; CLI commands at the top level of
+# `flask` (cli_group=None). The factory registers all three
+pages = Blueprint('pages', __name__)
+api = Blueprint('api', __name__)
+commands = Blueprint('commands', __name__, cli_group=None)
 
 # Login required decorator
 def login_required(f):
@@ -409,15 +1680,15 @@ def login_required(f):
     def decorated_function(*args, **kwargs):
         if 'user_email' not in session:
             flash('Please log in first!', 'error')
-            return redirect(url_for('index'))
+            return redirect(url_for('pages.index'))
         return f(*args, **kwargs)
     return decorated_function
 
-@app.route('/')
+@pages.route('/')
 def index():
     return render_template('login.html')
 
-@app.route('/signup', methods=['POST'])
+@pages.route('/signup', methods=['POST'])
 def signup():
     email = request.form.get('email')
     password = request.form.get('password')
@@ -425,97 +1696,173 @@ def signup():
     try:
         if User.query.filter_by(email=email).first():
             flash('Email already registered!', 'error')
-            return redirect(url_for('index'))
+            return redirect(url_for('pages.index'))
         
-        hashed_password = generate_password_hash(password, method='pbkdf2:sha256')
+        hashed_password = hash_password(password)
         new_user = User(email=email, password=hashed_password)
         db.session.add(new_user)
         db.session.commit()
         
         flash('Account created successfully! Please sign in.', 'success')
-        return redirect(url_for('index'))
+        return redirect(url_for('pages.index'))
+    except TimeoutError:
+        flash('Server is busy. Please try again in a moment.', 'error')
+        return redirect(url_for('pages.index'))
     except Exception as e:
         db.session.rollback()
         logger.error(f"Error during signup: {e}")
         flash('Error creating account. Please try again.', 'error')
-        return redirect(url_for('index'))
+        return redirect(url_for('pages.index'))
 
-@app.route('/login', methods=['POST'])
+@pages.route('/login', methods=['POST'])
 def login():
     email = request.form.get('email')
     password = request.form.get('password')
     try:
+        # The unique index on User.email makes this a single index lookup
         user = User.query.filter_by(email=email).first()
-        if user and check_password_hash(user.password, password):
+        if user and verify_password(user.password, password):
+            # Transparently upgrade hashes made with an older method or work factor
+            if password_needs_rehash(user.password):
+                user.password = hash_password(password)
+                db.session.commit()
             session['user_email'] = email
             session.permanent = True
             flash('Login successful!', 'success')
-            return redirect(url_for('dashboard'))
+            return redirect(url_for('pages.dashboard'))
         else:
             flash('Invalid email or password!', 'error')
-            return redirect(url_for('index'))
+            return redirect(url_for('pages.index'))
+    except TimeoutError:
+        flash('Server is busy. Please try again in a moment.', 'error')
+        return redirect(url_for('pages.index'))
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Error during login: {e}")
         flash('Error logging in. Please try again.', 'error')
-        return redirect(url_for('index'))
+        return redirect(url_for('pages.index'))
 
-@app.route('/dashboard')
+@pages.route('/dashboard')
 @login_required
 def dashboard():
     return render_template('dashboard.html', user_email=session['user_email'])
 
-@app.route('/attendance')
+@pages.route('/attendance')
 @login_required
 def attendance():
     return render_template('attendance.html', user_email=session['user_email'])
 
-@app.route('/leave')
+@pages.route('/leave')
 @login_required
 def leave():
     return render_template('leave.html', user_email=session['user_email'])
 
-@app.route('/directory')
+@pages.route('/directory')
 @login_required
 def directory():
     return render_template('directory.html', user_email=session['user_email'])
 
-@app.route('/salary')
+@pages.route('/salary')
 @login_required
 def salary():
     return render_template('salary.html', user_email=session['user_email'])
 
-@app.route('/logout')
+@pages.route('/logout')
 def logout():
     session.pop('user_email', None)
     flash('You have been logged out.', 'success')
-    return redirect(url_for('index'))
+    return redirect(url_for('pages.index'))
 
-@app.route('/favicon.ico')
+@pages.route('/favicon.ico')
 def favicon():
-    return send_from_directory(os.path.join(app.root_path, 'static'), 'favicon.ico')
+    return send_from_directory(os.path.join(current_app.root_path, 'static'), 'favicon.ico')
+
+# Helpers to encode/decode opaque keyset pagination cursors
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+# Columns returned by the employee list, selected as tuples rather than Employee objects
+EMPLOYEE_COLUMNS = [Employee.id, Employee.employee_id, Employee.name, Employee.title, Employee.email,
+                    Employee.department, Employee.location, Employee.avatar]
+EMPLOYEE_FIELDS = [column.key for column in EMPLOYEE_COLUMNS]
 
 # API to get employees
-@app.route('/api/employees', methods=['GET'])
+@api.route('/api/employees', methods=['GET'])
 @login_required
+@cached_response('employee')
 def get_employees():
     try:
-        employees = Employee.query.all()
-        return jsonify([{
-            'id': emp.id,
-            'employee_id': emp.employee_id,
-            'name': emp.name,
-            'title': emp.title,
-            'email': emp.email,
-            'department': emp.department,
-            'location': emp.location,
-            'avatar': emp.avatar
-        } for emp in employees])
+        q = request.args.get('q', '').strip()
+        department = request.args.get('department', '')
+        location = request.args.get('location', '')
+        cursor = request.args.get('cursor', '')
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 20)), 1), 100)
+
+        search_filters = []
+        if q:
+            search_filters.append(
+                (Employee.name.ilike(f'%{q}%')) |
+                (Employee.email.ilike(f'%{q}%')) |
+                (Employee.title.ilike(f'%{q}%'))
+            )
+        department_filters = [Employee.department == department] if department and department != 'all' else []
+        location_filters = [Employee.location == location] if location and location != 'all' else []
+
+        query = read_session().query(*EMPLOYEE_COLUMNS).filter(*search_filters, *department_filters, *location_filters)
+        total = query.count()
+
+        # Keyset pagination on (name, id) when a cursor is given, offset otherwise
+        query = query.order_by(Employee.name, Employee.id)
+        if cursor:
+            try:
+                last_name, last_id = decode_cursor(cursor)
+                if not isinstance(last_name, str) or not isinstance(last_id, int):
+                    raise TypeError('Invalid cursor')
+            except (ValueError, TypeError):
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query = query.filter(
+                (Employee.name > last_name) |
+                (and_(Employee.name == last_name, Employee.id > last_id))
+            )
+        else:
+            query = query.offset((page - 1) * per_page)
+        employees = query.limit(per_page + 1).all()
+        has_more = len(employees) > per_page
+        employees = employees[:per_page]
+        next_cursor = encode_cursor([employees[-1].name, employees[-1].id]) if has_more else None
+
+        # Facet counts: each facet honours the other filters but not its own
+        department_facets = read_session().query(Employee.department, func.count(Employee.id)).filter(
+            *search_filters, *location_filters
+        ).group_by(Employee.department).order_by(Employee.department).all()
+        location_facets = read_session().query(Employee.location, func.count(Employee.id)).filter(
+            *search_filters, *department_filters
+        ).group_by(Employee.location).order_by(Employee.location).all()
+
+        return jsonify({
+            'employees': [dict(zip(EMPLOYEE_FIELDS, emp)) for emp in employees],
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'next_cursor': next_cursor,
+            'facets': {
+                'departments': [{'name': name, 'count': count} for name, count in department_facets],
+                'locations': [{'name': name, 'count': count} for name, count in location_facets]
+            }
+        })
     except Exception as e:
         logger.error(f"Error fetching employees: {e}")
         return jsonify({'error': str(e)}), 500
 
 # API to add a new employee
-@app.route('/api/employees', methods=['POST'])
+@api.route('/api/employees', methods=['POST'])
 @login_required
 def add_employee():
     try:
@@ -535,9 +1882,7 @@ def add_employee():
             return jsonify({'error': 'Email already exists'}), 400
 
         # Generate unique employee_id
-        last_employee = Employee.query.order_by(Employee.id.desc()).first()
-        last_id = int(last_employee.employee_id[-3:]) if last_employee else 0
-        new_employee_id = f'EMP{str(last_id + 1).zfill(3)}'
+        new_employee_id = reserve_ids('employee')[0]
 
         new_employee = Employee(
             employee_id=new_employee_id,
@@ -557,65 +1902,230 @@ def add_employee():
         logger.error(f"Error adding employee: {e}")
         return jsonify({'error': str(e)}), 500
 
+# Fixed reference date for consistency with seeding
+REFERENCE_DATE = date(2025, 4, 30)
+MAX_RANGE_DAYS = 366
+ATTENDANCE_STATUSES = ['present', 'late', 'leave', 'remote']
+LEAVE_STATUSES = ['pending', 'approved', 'rejected']
+MAX_BATCH_IDS = 1000
+DASHBOARD_FIELDS = ['attendance_stats', 'leave_stats', 'recent_attendance', 'recent_leaves']
+
+# Helper to validate the id list of a batch request
+def parse_batch_ids(data):
+    if not isinstance(data, dict):
+        raise ValueError('Request body must be a JSON object')
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids:
+        raise ValueError('ids must be a non-empty list')
+    if len(ids) > MAX_BATCH_IDS:
+        raise ValueError(f'Cannot process more than {MAX_BATCH_IDS} ids at once')
+    if not all(isinstance(id, int) and not isinstance(id, bool) for id in ids):
+        raise ValueError('ids must be integers')
+    return list(dict.fromkeys(ids))
+
+# Helper to resolve the date range from either an explicit start/end pair or a preset filter
+def resolve_date_range(args, today=REFERENCE_DATE):
+    start = args.get('start')
+    end = args.get('end')
+    if start or end:
+        try:
+            start_date = datetime.strptime(start, '%Y-%m-%d').date() if start else today
+            end_date = datetime.strptime(end, '%Y-%m-%d').date() if end else start_date
+        except ValueError:
+            raise ValueError('Dates must be in YYYY-MM-DD format')
+        if start_date > end_date:
+            raise ValueError('Start date must be before end date')
+        if (end_date - start_date).days + 1 > MAX_RANGE_DAYS:
+            raise ValueError(f'Date range cannot exceed {MAX_RANGE_DAYS} days')
+        return start_date, end_date
+
+    filter_type = args.get('filter', 'today')
+    if filter_type == 'today':
+        return today, today
+    elif filter_type == 'week':
+        return today - timedelta(days=6), today
+    elif filter_type == 'month':
+        return today - timedelta(days=29), today
+    raise ValueError('Invalid filter type')
+
+ARCHIVE_COLUMNS = ['id', 'employee_id', 'department', 'date', 'status', 'clock_in', 'clock_out']
+
+# First day of the month `months` after (negative: before) the month of day
+def shift_month(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+# Route a date range to the partitions holding it: the archived months it overlaps as
+# (month, path) pairs, oldest first, and the (start, end) ranges around them left for the live
+# table, empty when the archive covers the whole range. Months older than an archived one can
+# still have live rows (clock-ins for a month that was never archived), so every gap is kept
+def attendance_partitions(start_date, end_date):
+    archives = read_session().query(AttendanceArchive.month, AttendanceArchive.path).filter(
+        AttendanceArchive.month.between(start_date.replace(day=1), end_date)
+    ).order_by(AttendanceArchive.month).all()
+    live_ranges = []
+    day = start_date
+    for month, _ in archives:
+        if day < month:
+            live_ranges.append((day, month - timedelta(days=1)))
+        day = max(day, shift_month(month, 1))
+    if day <= end_date:
+        live_ranges.append((day, end_date))
+    return archives, live_ranges
+
+# SQL condition for a date column falling in any of the (start, end) ranges
+def date_ranges_filter(column, ranges):
+    return or_(*(column.between(start, end) for start, end in ranges))
+
+# Rows of one archived month as (id, employee pk, department, date, status, clock_in, clock_out),
+# optionally only those within a date range. Files are sorted by date, then id
+def read_archived_month(path, start_date=None, end_date=None):
+    with gzip.open(os.path.join(current_app.config['ATTENDANCE_ARCHIVE_DIR'], path), 'rt', newline='') as archive:
+        reader = csv.reader(archive)
+        next(reader)  # Header
+        for id, employee_pk, department, day, status, clock_in, clock_out in reader:
+            day = date.fromisoformat(day)
+            if start_date and day < start_date:
+                continue
+            if end_date and day > end_date:
+                return
+            yield int(id), int(employee_pk), department, day, status, clock_in or None, clock_out or None
+
+# Call fn() off the event loop when serving asgi.py's async path: those views run in
+# SQLAlchemy's greenlet (g.read_session), which can wait for a worker thread the way it waits
+# for the database. Everywhere else this is a plain call
+def run_blocking(fn):
+    if has_request_context() and g.get('read_session') is not None:
+        return await_only(asyncio.to_thread(fn))
+    return fn()
+
+# Archived rows within a date range with their employee's current details, like the live
+# table joined with Employee: (id, employee, date, status, clock_in, clock_out) where employee
+# has employee_id, name, department and avatar. Files are read a chunk at a time, no more than
+# `limit` rows ahead when one is given, and only the employees in each chunk are looked up
+def archived_attendance(archives, start_date, end_date, limit=0):
+    employees = {}
+    remaining = limit
+    for _, path in archives:
+        with closing(read_archived_month(path, start_date, end_date)) as rows:
+            while True:
+                size = min(remaining, EXPORT_BATCH_SIZE) if limit > 0 else EXPORT_BATCH_SIZE
+                chunk = run_blocking(lambda: list(itertools.islice(rows, size)))
+                if not chunk:
+                    break
+                missing = {employee_pk for _, employee_pk, *_ in chunk if employee_pk not in employees}
+                if missing:
+                    employees.update(dict.fromkeys(missing))  # Deleted employees stay None
+                    employees.update((employee.id, employee) for employee in read_session().query(
+                        Employee.id, Employee.employee_id, Employee.name, Employee.department, Employee.avatar
+                    ).filter(Employee.id.in_(missing)))
+                for id, employee_pk, _, day, status, clock_in, clock_out in chunk:
+                    employee = employees[employee_pk]
+                    if employee is None:
+                        continue
+                    yield id, employee, day, status, clock_in, clock_out
+                    if limit > 0:
+                        remaining -= 1
+                        if not remaining:
+                            return
+
+# Attendance table rows (with their employee) within a date range, archived months first.
+# Selects plain column tuples and formats each distinct date and status once, not once per row
+def attendance_records(start_date, end_date, limit=0):
+    archives, live_ranges = attendance_partitions(start_date, end_date)
+    rows = ((id, employee.employee_id, employee.name, day, status, employee.avatar)
+            for id, employee, day, status, _, _ in archived_attendance(archives, start_date, end_date, limit))
+    if live_ranges:
+        query = read_session().query(
+            Attendance.id, Employee.employee_id, Employee.name, Attendance.date, Attendance.status, Employee.avatar
+        ).join(Attendance.employee).filter(date_ranges_filter(Attendance.date, live_ranges))
+        if limit > 0:
+            query = query.limit(limit)
+        rows = itertools.chain(rows, query)  # The live query only runs if the archive rows fall short
+    if limit > 0:
+        rows = itertools.islice(rows, limit)
+    date_labels = {}
+    status_labels = {status: status.capitalize() for status in ATTENDANCE_STATUSES}
+    records = []
+    for id, employee_id, name, day, status, avatar in rows:
+        label = date_labels.get(day)
+        if label is None:
+            label = date_labels[day] = day.strftime('%d-%m-%Y')
+        records.append({
+            'id': id,
+            'employee_id': employee_id,
+            'name': name,
+            'date': label,
+            'status': status_labels.get(status) or status.capitalize(),
+            'image': avatar
+        })
+    return records
+
 # API to get attendance data
-@app.route('/api/attendance', methods=['GET'])
+@api.route('/api/attendance', methods=['GET'])
 @login_required
+@cached_response('attendance', 'employee')
 def get_attendance():
     try:
-        filter_type = request.args.get('filter', 'today')
         limit = int(request.args.get('limit', 0))
-        today = date(2025, 4, 30)  # Fixed date for consistency with seeding
-        
-        # Define date range based on filter
-        if filter_type == 'today':
-            start_date = today
-            end_date = today
-            chart_days = 1
-        elif filter_type == 'week':
-            start_date = today - timedelta(days=6)
-            end_date = today
-            chart_days = 7
-        elif filter_type == 'month':
-            start_date = today - timedelta(days=29)
-            end_date = today
-            chart_days = 30
-        else:
-            return jsonify({'error': 'Invalid filter type'}), 400
+        try:
+            start_date, end_date = resolve_date_range(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        chart_days = (end_date - start_date).days + 1
+
+        # Chart data: one grouped query per partition for the whole window, gaps filled with
+        # zeros. Archived months are counted from the rollup, which keeps their buckets
+        archives, live_ranges = attendance_partitions(start_date, end_date)
+        rows = []
+        if archives:
+            rows += read_session().query(
+                AttendanceDailyStat.date,
+                AttendanceDailyStat.status,
+                func.sum(AttendanceDailyStat.count)
+            ).filter(
+                date_ranges_filter(AttendanceDailyStat.date, [
+                    (max(start_date, month), min(end_date, shift_month(month, 1) - timedelta(days=1)))
+                    for month, _ in archives
+                ])
+            ).group_by(AttendanceDailyStat.date, AttendanceDailyStat.status).all()
+        if live_ranges:
+            rows += read_session().query(
+                Attendance.date,
+                Attendance.status,
+                func.count(Attendance.id)
+            ).filter(
+                date_ranges_filter(Attendance.date, live_ranges)
+            ).group_by(Attendance.date, Attendance.status).all()
 
-        # Chart data
-        dates = [(start_date + timedelta(days=x)).strftime('%d-%m-%Y') for x in range(chart_days)]
+        totals = {}
+        present_counts = {}
+        for day, status, count in rows:
+            count = int(count)
+            totals[day] = totals.get(day, 0) + count
+            if status == 'present':
+                present_counts[day] = count
+
+        dates = []
         percentages = []
-        for day in range(chart_days):
-            current_date = start_date + timedelta(days=day)
-            total = Attendance.query.filter_by(date=current_date).count()
-            present = Attendance.query.filter_by(date=current_date, status='present').count()
-            percentage = (present / total * 100) if total > 0 else 0
-            percentages.append(round(percentage, 1))
-        
-        # Table data
-        query = Attendance.query.filter(Attendance.date.between(start_date, end_date))
-        if limit > 0:
-            query = query.limit(limit)
-        records = query.all()
+        for offset in range(chart_days):
+            current_date = start_date + timedelta(days=offset)
+            total = totals.get(current_date, 0)
+            present = present_counts.get(current_date, 0)
+            dates.append(current_date.strftime('%d-%m-%Y'))
+            percentages.append(round(present / total * 100, 1) if total > 0 else 0)
         
         return jsonify({
             'dates': dates,
             'percentages': percentages,
-            'records': [{
-                'id': record.id,
-                'employee_id': record.employee_id,
-                'name': record.name,
-                'date': record.date.strftime('%d-%m-%Y'),
-                'status': record.status.capitalize(),
-                'image': record.image
-            } for record in records]
+            'records': attendance_records(start_date, end_date, limit)
         })
     except Exception as e:
         logger.error(f"Error fetching attendance: {e}")
         return jsonify({'error': str(e)}), 500
 
 # API to update attendance status
-@app.route('/api/attendance/<int:id>', methods=['PUT'])
+@api.route('/api/attendance/<int:id>', methods=['PUT'])
 @login_required
 def update_attendance(id):
     try:
@@ -623,11 +2133,13 @@ def update_attendance(id):
         data = request.get_json()
         status = data.get('status')
         
-        if status not in ['present', 'late', 'leave', 'remote']:
+        if status not in ATTENDANCE_STATUSES:
             return jsonify({'error': 'Invalid status'}), 400
             
+        change = attendance_change(record, record.status, status)
         record.status = status
         db.session.commit()
+        publish_change('attendance.updated', change)
         return jsonify({'message': 'Status updated successfully'})
     except Exception as e:
         db.session.rollback()
@@ -635,212 +2147,867 @@ def update_attendance(id):
         return jsonify({'error': str(e)}), 500
 
 # API to delete attendance record
-@app.route('/api/attendance/<int:id>', methods=['DELETE'])
+@api.route('/api/attendance/<int:id>', methods=['DELETE'])
 @login_required
 def delete_attendance(id):
     try:
         record = Attendance.query.get_or_404(id)
+        change = attendance_change(record, record.status, None)
         db.session.delete(record)
         db.session.commit()
+        publish_change('attendance.deleted', change)
         return jsonify({'message': 'Record deleted successfully'})
     except Exception as e:
         db.session.rollback()
         logger.error(f"Error deleting attendance: {e}")
         return jsonify({'error': str(e)}), 500
 
-# API to export attendance data as CSV
-@app.route('/api/attendance/export', methods=['GET'])
+# Attendance rows (id -> (date, department, status)) for a batch of ids
+def load_attendance_keys(ids):
+    rows = db.session.query(
+        Attendance.id, Attendance.date, Employee.department, Attendance.status
+    ).join(Attendance.employee).filter(Attendance.id.in_(ids)).all()
+    return {row.id: (row.date, row.department, row.status) for row in rows}
+
+# API to update the status of many attendance records in one transaction
+@api.route('/api/attendance/batch', methods=['PUT'])
 @login_required
-def export_attendance():
+def batch_update_attendance():
     try:
-        filter_type = request.args.get('filter', 'today')
-        today = date(2025, 4, 30)  # Fixed date for consistency
-        
-        # Define date range based on filter
-        if filter_type == 'today':
-            start_date = today
-            end_date = today
-        elif filter_type == 'week':
-            start_date = today - timedelta(days=6)
-            end_date = today
-        elif filter_type == 'month':
-            start_date = today - timedelta(days=29)
-            end_date = today
+        data = request.get_json(silent=True)
+        try:
+            ids = parse_batch_ids(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        status = data.get('status')
+        if status not in ATTENDANCE_STATUSES:
+            return jsonify({'error': 'Invalid status'}), 400
+
+        existing = load_attendance_keys(ids)
+        changed = [id for id in ids if id in existing and existing[id][2] != status]
+        changed_ids = set(changed)
+        if changed:
+            db.session.execute(
+                Attendance.__table__.update().where(Attendance.id.in_(changed)).values(status=status)
+            )
+            # Bulk UPDATE bypasses the mapper events, so move the rollup counts here
+            deltas = {}
+            for id in changed:
+                day, department, old_status = existing[id]
+                deltas[(day, department, old_status)] = deltas.get((day, department, old_status), 0) - 1
+                deltas[(day, department, status)] = deltas.get((day, department, status), 0) + 1
+            apply_attendance_rollup_deltas(db.session.connection(), deltas)
+        db.session.commit()
+        publish_batch_changes(len(changed), (
+            ('attendance.updated', attendance_key_change(id, existing[id][0], existing[id][1], existing[id][2], status))
+            for id in changed
+        ))
+
+        return jsonify({'results': [{
+            'id': id,
+            'result': 'not_found' if id not in existing else 'updated' if id in changed_ids else 'unchanged'
+        } for id in ids]})
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error batch updating attendance: {e}")
+        return jsonify({'error': str(e)}), 500
+
+# API to delete many attendance records in one transaction
+@api.route('/api/attendance/batch', methods=['DELETE'])
+@login_required
+def batch_delete_attendance():
+    try:
+        try:
+            ids = parse_batch_ids(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        existing = load_attendance_keys(ids)
+        if existing:
+            db.session.execute(Attendance.__table__.delete().where(Attendance.id.in_(list(existing))))
+            deltas = {}
+            for key in existing.values():
+                deltas[key] = deltas.get(key, 0) - 1
+            apply_attendance_rollup_deltas(db.session.connection(), deltas)
+        db.session.commit()
+        publish_batch_changes(len(existing), (
+            ('attendance.deleted', attendance_key_change(id, day, department, old_status, None))
+            for id, (day, department, old_status) in existing.items()
+        ))
+
+        return jsonify({'results': [{
+            'id': id,
+            'result': 'deleted' if id in existing else 'not_found'
+        } for id in ids]})
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error batch deleting attendance: {e}")
+        return jsonify({'error': str(e)}), 500
+
+# Rows fetched per round trip and CSV bytes buffered per chunk when streaming exports
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Generator yielding the attendance CSV in chunks, sorted by date: archived months read from
+# their files and live ranges fetched in server-side batches, each in turn
+def generate_attendance_csv(start_date, end_date, department=None):
+    archives, live_ranges = attendance_partitions(start_date, end_date)
+
+    def archived_rows(archive):
+        for _, employee, day, status, clock_in, clock_out in archived_attendance([archive], start_date, end_date):
+            if not department or employee.department == department:
+                yield employee.employee_id, employee.name, employee.department, day, status, clock_in, clock_out
+
+    def live_rows(live_range):
+        query = db.session.query(
+            Employee.employee_id,
+            Employee.name,
+            Employee.department,
+            Attendance.date,
+            Attendance.status,
+            Attendance.clock_in,
+            Attendance.clock_out
+        ).select_from(Attendance).join(Attendance.employee).filter(Attendance.date.between(*live_range))
+        if department:
+            query = query.filter(Employee.department == department)
+        yield from query.order_by(Attendance.date, Attendance.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+    parts = [(archive[0], archived_rows(archive)) for archive in archives]
+    parts += [(live_range[0], live_rows(live_range)) for live_range in live_ranges]
+    rows = itertools.chain.from_iterable(part for _, part in sorted(parts, key=lambda part: part[0]))
+
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['Employee ID', 'Name', 'Department', 'Date', 'Status', 'Clock In', 'Clock Out'])
+    for employee_id, name, dept, day, status, clock_in, clock_out in rows:
+        writer.writerow([
+            employee_id,
+            name,
+            dept,
+            day.strftime('%d-%m-%Y'),
+            status.capitalize(),
+            clock_in or '--:--',
+            clock_out or '--:--'
+        ])
+        if output.tell() >= EXPORT_CHUNK_SIZE:
+            yield output.getvalue().encode('utf-8')
+            output.seek(0)
+            output.truncate()
+    yield output.getvalue().encode('utf-8')
+
+# Move every live attendance month before `before` (a first of month) into a read-only gzipped
+# CSV of ARCHIVE_COLUMNS, one transaction per month: the file is written while the month's rows
+# are locked against writers, then the manifest row and the DELETE commit together. The core
+# DELETE skips the mapper events, so the rollup keeps the archived counts. Returns [(month, rows)]
+def archive_attendance(before):
+    directory = current_app.config['ATTENDANCE_ARCHIVE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    first_day = db.session.query(func.min(Attendance.date)).filter(Attendance.date < before).scalar()
+    month = first_day.replace(day=1) if first_day else before
+    archived = []
+    while month < before:
+        month_end = shift_month(month, 1) - timedelta(days=1)
+        if db.session.get(AttendanceArchive, month):
+            # Older live months can sit before an archived one; only live rows inside it are an error
+            if db.session.query(Attendance.id).filter(Attendance.date.between(month, month_end)).first():
+                raise RuntimeError(f'{month:%Y-%m} is already archived but has live rows')
+            month = shift_month(month, 1)
+            continue
+        entry = AttendanceArchive(month=month, path=f'attendance-{month:%Y-%m}.csv.gz', rows=0)
+        db.session.add(entry)
+        db.session.flush()  # Takes SQLite's write lock
+        if db.engine.dialect.name == 'postgresql':
+            db.session.execute(text('LOCK TABLE attendance IN SHARE ROW EXCLUSIVE MODE'))
+        query = db.session.query(
+            Attendance.id, Attendance.employee_id, Employee.department, Attendance.date,
+            Attendance.status, Attendance.clock_in, Attendance.clock_out
+        ).outerjoin(Attendance.employee).filter(Attendance.date.between(month, month_end)).order_by(
+            Attendance.date, Attendance.id
+        ).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        path = os.path.join(directory, entry.path)
+        rows = 0
+        with gzip.open(path + '.part', 'wt', newline='', compresslevel=6) as output:
+            writer = csv.writer(output)
+            writer.writerow(ARCHIVE_COLUMNS)
+            for id, employee_pk, department, day, status, clock_in, clock_out in query:
+                writer.writerow([id, employee_pk, department or '', day.isoformat(), status, clock_in or '',
+                                 clock_out or ''])
+                rows += 1
+        if rows:
+            entry.rows = rows
+            os.chmod(path + '.part', 0o444)
+            os.replace(path + '.part', path)
+            db.session.execute(Attendance.__table__.delete().where(Attendance.date.between(month, month_end)))
+            db.session.commit()
+            archived.append((month, rows))
         else:
-            return jsonify({'error': 'Invalid filter type'}), 400
+            db.session.rollback()
+            os.remove(path + '.part')
+        month = shift_month(month, 1)
+    return archived
 
-        records = Attendance.query.filter(Attendance.date.between(start_date, end_date)).all()
-        
-        # Create CSV in memory
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write headers
-        writer.writerow(['Employee ID', 'Name', 'Department', 'Date', 'Status', 'Clock In', 'Clock Out'])
-        
-        # Write data
-        for record in records:
-            writer.writerow([
-                record.employee_id,
-                record.name,
-                record.department,
-                record.date.strftime('%d-%m-%Y'),
-                record.status.capitalize(),
-                record.clock_in or '--:--',
-                record.clock_out or '--:--'
-            ])
-        
-        # Prepare response
-        output.seek(0)
-        return Response(
-            output,
-            mimetype='text/csv',
-            headers={
-                'Content-Disposition': f'attachment; filename=attendance_{filter_type}_{today.strftime("%Y-%m-%d")}.csv'
+# Wrap a byte-chunk generator in incremental gzip compression
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+# Clock-ins after this time are marked late; rows per transaction for bulk ingestion
+LATE_AFTER = '09:30'
+BULK_BATCH_SIZE = 1000
+
+# Parse a JSON-lines or CSV body of clock events into (line, event) pairs
+def parse_clock_events(body, content_type):
+    if 'csv' in content_type:
+        reader = csv.DictReader(io.StringIO(body))
+        return [(line, row) for line, row in enumerate(reader, start=2)]
+    events = []
+    for line, raw in enumerate(body.splitlines(), start=1):
+        if not raw.strip():
+            continue
+        try:
+            events.append((line, json.loads(raw)))
+        except ValueError:
+            events.append((line, None))
+    return events
+
+# Stripped string field of a clock event ('' when missing); JSON lines can carry any type
+def clock_event_field(event, field):
+    value = event.get(field)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise ValueError(f'{field} must be a string')
+    return value.strip()
+
+# Validate one clock event, returning (employee_id, date, clock_in, clock_out)
+def validate_clock_event(event):
+    if not isinstance(event, dict):
+        raise ValueError('Malformed event')
+    employee_id = clock_event_field(event, 'employee_id')
+    if not employee_id:
+        raise ValueError('Missing employee_id')
+    day = clock_event_field(event, 'date')
+    try:
+        day = datetime.strptime(day, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('date must be in YYYY-MM-DD format')
+    times = []
+    for field in ('clock_in', 'clock_out'):
+        value = clock_event_field(event, field) or None
+        if value:
+            try:
+                value = datetime.strptime(value, '%H:%M').strftime('%H:%M')
+            except ValueError:
+                raise ValueError(f'{field} must be in HH:MM format')
+        times.append(value)
+    if not any(times):
+        raise ValueError('Event needs clock_in or clock_out')
+    return employee_id, day, times[0], times[1]
+
+# Dialect-specific INSERT ... ON CONFLICT for the attendance (employee_id, date) key
+def attendance_upsert_statement():
+    table = Attendance.__table__
+    dialect = db.engine.dialect.name
+    # Dialect modules are imported here: postgresql alone adds ~40 ms to importing the app
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects import sqlite
+        stmt = sqlite.insert(table)
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects import postgresql
+        stmt = postgresql.insert(table)
+    else:
+        raise RuntimeError(f'Bulk upsert is not supported on {dialect}')
+    return stmt.on_conflict_do_update(
+        index_elements=['employee_id', 'date'],
+        set_={
+            'clock_in': stmt.excluded.clock_in,
+            'clock_out': stmt.excluded.clock_out,
+            'status': stmt.excluded.status
+        }
+    )
+
+# Merge, resolve and upsert one batch of validated events in a single transaction
+def ingest_clock_batch(batch):
+    keys = {(employee_id, day) for _, (employee_id, day, _, _) in batch}
+    employee_ids = {employee_id for employee_id, _ in keys}
+    employees = {
+        emp.employee_id: emp
+        for emp in Employee.query.filter(Employee.employee_id.in_(employee_ids)).all()
+    }
+    archived_months = {month for month, in db.session.query(AttendanceArchive.month).filter(
+        AttendanceArchive.month.in_({day.replace(day=1) for _, day in keys})
+    )}
+    existing = {
+        (row.employee_code, row.date): row
+        for row in db.session.query(
+            Employee.employee_id.label('employee_code'), Attendance.date, Employee.department,
+            Attendance.status, Attendance.clock_in, Attendance.clock_out
+        ).join(Attendance.employee).filter(
+            Employee.employee_id.in_(employee_ids),
+            Attendance.date.in_({day for _, day in keys})
+        ).all()
+        if (row.employee_code, row.date) in keys
+    }
+
+    # Earliest clock-in and latest clock-out win when a key repeats
+    merged = {}
+    errors = []
+    for line, (employee_id, day, clock_in, clock_out) in batch:
+        if employee_id not in employees:
+            errors.append({'line': line, 'error': f'Unknown employee {employee_id}'})
+            continue
+        if day.replace(day=1) in archived_months:
+            errors.append({'line': line, 'error': f'Attendance for {day:%Y-%m} is archived'})
+            continue
+        current = merged.get((employee_id, day))
+        if current is None:
+            row = existing.get((employee_id, day))
+            current = {
+                'lines': [],
+                'clock_in': row.clock_in if row and row.clock_in != '--:--' else None,
+                'clock_out': row.clock_out if row and row.clock_out != '--:--' else None
             }
+            merged[(employee_id, day)] = current
+        current['lines'].append(line)
+        if clock_in and (not current['clock_in'] or clock_in < current['clock_in']):
+            current['clock_in'] = clock_in
+        if clock_out and (not current['clock_out'] or clock_out > current['clock_out']):
+            current['clock_out'] = clock_out
+
+    rows = []
+    deltas = {}
+    for (employee_id, day), values in merged.items():
+        if not values['clock_in']:
+            errors.extend({'line': line, 'error': 'No clock-in recorded for this day'} for line in values['lines'])
+            continue
+        employee = employees[employee_id]
+        status = 'late' if values['clock_in'] > LATE_AFTER else 'present'
+        previous = existing.get((employee_id, day))
+        if previous:
+            deltas[(day, previous.department, previous.status)] = deltas.get((day, previous.department, previous.status), 0) - 1
+        deltas[(day, employee.department, status)] = deltas.get((day, employee.department, status), 0) + 1
+        rows.append({
+            'employee_id': employee.id,
+            'clock_in': values['clock_in'],
+            'clock_out': values['clock_out'] or '--:--',
+            'status': status,
+            'date': day
+        })
+
+    if rows:
+        db.session.execute(attendance_upsert_statement(), rows)
+        # Core upserts bypass the mapper events, so keep the rollup in step here
+        apply_attendance_rollup_deltas(db.session.connection(), deltas)
+    # Read before the commit expires the Employee objects, which would reload them one by one
+    departments = {employee.id: (code, employee.department) for code, employee in employees.items()}
+    db.session.commit()
+    publish_batch_changes(len(rows), ingested_attendance_changes(rows, departments, existing))
+    return len(rows), errors
+
+# /api/stream events for upserted clock rows; the upsert returns no ids, so they are read back.
+# departments maps Employee.id to (employee code, department)
+def ingested_attendance_changes(rows, departments, existing):
+    ids = {
+        (employee_pk, day): id
+        for id, employee_pk, day in db.session.query(Attendance.id, Attendance.employee_id, Attendance.date).filter(
+            Attendance.employee_id.in_({row['employee_id'] for row in rows}),
+            Attendance.date.in_({row['date'] for row in rows})
         )
+    }
+    for row in rows:
+        code, department = departments[row['employee_id']]
+        previous = existing.get((code, row['date']))
+        yield ('attendance.updated' if previous else 'attendance.created', attendance_key_change(
+            ids[(row['employee_id'], row['date'])], row['date'], department,
+            previous.status if previous else None, row['status']
+        ))
+
+# API to ingest clock-in/clock-out events in bulk (JSON lines or CSV)
+@api.route('/api/attendance/bulk', methods=['POST'])
+@login_required
+def bulk_ingest_attendance():
+    try:
+        events = parse_clock_events(request.get_data(as_text=True), request.content_type or '')
+        errors = []
+        valid = []
+        for line, event in events:
+            try:
+                valid.append((line, validate_clock_event(event)))
+            except ValueError as e:
+                errors.append({'line': line, 'error': str(e)})
+
+        upserted = 0
+        for offset in range(0, len(valid), BULK_BATCH_SIZE):
+            batch = valid[offset:offset + BULK_BATCH_SIZE]
+            try:
+                count, batch_errors = ingest_clock_batch(batch)
+                upserted += count
+                errors.extend(batch_errors)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error ingesting attendance batch: {e}")
+                errors.extend({'line': line, 'error': 'Batch failed to commit'} for line, _ in batch)
+
+        errors.sort(key=lambda error: error['line'])
+        return jsonify({
+            'received': len(events),
+            'upserted': upserted,
+            'errors': errors
+        })
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error ingesting attendance: {e}")
+        return jsonify({'error': str(e)}), 500
+
+# API to export attendance data as CSV
+@api.route('/api/attendance/export', methods=['GET'])
+@login_required
+def export_attendance():
+    try:
+        try:
+            start_date, end_date = resolve_date_range(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        department = request.args.get('department', '')
+        if department == 'all':
+            department = ''
+
+        if request.args.get('start') or request.args.get('end'):
+            label = f'{start_date.strftime("%Y-%m-%d")}_{end_date.strftime("%Y-%m-%d")}'
+        else:
+            label = f'{request.args.get("filter", "today")}_{REFERENCE_DATE.strftime("%Y-%m-%d")}'
+
+        # async=1 queues the export as a background job instead of streaming it
+        if request.args.get('async') == '1':
+            return enqueue_job_response('attendance_export', {
+                'start': start_date.isoformat(), 'end': end_date.isoformat(), 'department': department
+            })
+
+        headers = {'Content-Disposition': f'attachment; filename=attendance_{label}.csv'}
+        chunks = generate_attendance_csv(start_date, end_date, department or None)
+        # Compress on the fly when the client accepts it (opt out with compress=0)
+        if request.args.get('compress', '1') != '0' and 'gzip' in request.headers.get('Accept-Encoding', ''):
+            chunks = gzip_chunks(chunks)
+            headers['Content-Encoding'] = 'gzip'
+            headers['Vary'] = 'Accept-Encoding'
+
+        return Response(stream_with_context(chunks), mimetype='text/csv', headers=headers)
     except Exception as e:
         logger.error(f"Error exporting attendance: {e}")
         return jsonify({'error': str(e)}), 500
 
+# Attendance status counts and percentages for a date range, summed from the daily rollup
+def attendance_stats_summary(start_date, end_date, department=''):
+    # Sum the per-day rollup instead of scanning Attendance; the employee count rides along
+    # as a scalar subquery so this is a single round trip
+    session = read_session()
+    query = session.query(
+        AttendanceDailyStat.status,
+        func.sum(AttendanceDailyStat.count),
+        session.query(func.count(Employee.id)).scalar_subquery()
+    ).filter(AttendanceDailyStat.date.between(start_date, end_date))
+    if department and department != 'all':
+        query = query.filter(AttendanceDailyStat.department == department)
+    rows = query.group_by(AttendanceDailyStat.status).all()
+    counts = {status: int(count or 0) for status, count, _ in rows}
+
+    total = sum(counts.values())
+    present = counts.get('present', 0)
+    late = counts.get('late', 0)
+    leave = counts.get('leave', 0)
+    remote = counts.get('remote', 0)
+    total_employees = rows[0][2] if rows else session.query(func.count(Employee.id)).scalar()
+
+    return {
+        'present': {
+            'count': present,
+            'total': total,
+            'percentage': round(present / total * 100, 1) if total else 0
+        },
+        'late': {
+            'count': late,
+            'percentage': round(late / total * 100, 1) if total else 0
+        },
+        'leave': {
+            'count': leave,
+            'percentage': round(leave / total * 100, 1) if total else 0
+        },
+        'remote': {
+            'count': remote,
+            'percentage': round(remote / total * 100, 1) if total else 0
+        },
+        'total_employees': total_employees
+    }
+
 # API to get attendance statistics
-@app.route('/api/attendance_stats', methods=['GET'])
+@api.route('/api/attendance_stats', methods=['GET'])
 @login_required
+@cached_response('attendance_daily_stat', 'employee')
 def get_attendance_stats():
     try:
-        filter_type = request.args.get('filter', 'today')
-        today = date(2025, 4, 30)  # Fixed date for consistency
-        
-        # Define date range based on filter
-        if filter_type == 'today':
-            start_date = today
-            end_date = today
-        elif filter_type == 'week':
-            start_date = today - timedelta(days=6)
-            end_date = today
-        elif filter_type == 'month':
-            start_date = today - timedelta(days=29)
-            end_date = today
-        else:
-            return jsonify({'error': 'Invalid filter type'}), 400
-
-        total = Attendance.query.filter(Attendance.date.between(start_date, end_date)).count()
-        present = Attendance.query.filter(
-            Attendance.date.between(start_date, end_date),
-            Attendance.status == 'present'
-        ).count()
-        late = Attendance.query.filter(
-            Attendance.date.between(start_date, end_date),
-            Attendance.status == 'late'
-        ).count()
-        leave = Attendance.query.filter(
-            Attendance.date.between(start_date, end_date),
-            Attendance.status == 'leave'
-        ).count()
-        remote = Attendance.query.filter(
-            Attendance.date.between(start_date, end_date),
-            Attendance.status == 'remote'
-        ).count()
-        total_employees = Employee.query.count()
-
-        return jsonify({
-            'present': {
-                'count': present,
-                'total': total,
-                'percentage': round(present / total * 100, 1) if total else 0
-            },
-            'late': {
-                'count': late,
-                'percentage': round(late / total * 100, 1) if total else 0
-            },
-            'leave': {
-                'count': leave,
-                'percentage': round(leave / total * 100, 1) if total else 0
-            },
-            'remote': {
-                'count': remote,
-                'percentage': round(remote / total * 100, 1) if total else 0
-            },
-            'total_employees': total_employees
-        })
+        try:
+            start_date, end_date = resolve_date_range(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(attendance_stats_summary(start_date, end_date, request.args.get('department', '')))
     except Exception as e:
         logger.error(f"Error fetching attendance stats: {e}")
         return jsonify({'error': str(e)}), 500
 
+# Leave request as returned by the list APIs (employee must already be loaded)
+def serialize_leave_request(leave):
+    return {
+        'id': leave.id,
+        'request_id': leave.request_id,
+        'employee': {
+            'name': leave.employee.name,
+            'department': leave.employee.department,
+            'image': leave.employee.avatar
+        },
+        'leave_type': leave.leave_type,
+        'from': leave.start_date.strftime('%d-%m-%Y'),
+        'to': leave.end_date.strftime('%d-%m-%Y'),
+        'days': leave.days,
+        'status': leave.status
+    }
+
+# Most recently created leave requests, newest first
+def recent_leave_requests(limit):
+    leaves = LeaveRequest.query.join(LeaveRequest.employee).options(
+        contains_eager(LeaveRequest.employee)
+    ).order_by(LeaveRequest.created_at.desc(), LeaveRequest.id.desc()).limit(limit).all()
+    return [serialize_leave_request(leave) for leave in leaves]
+
+LEAVE_COUNT_MODES = ['exact', 'estimate', 'none']
+COUNT_ESTIMATE_CAP = 1000
+
+# Total for a list query: exact, estimated (the planner's row estimate on PostgreSQL, elsewhere
+# a count that stops at COUNT_ESTIMATE_CAP) or skipped. Returns (total, is_exact)
+def count_query_rows(query, mode):
+    if mode == 'none':
+        return None, False
+    if mode == 'estimate':
+        connection = query.session.connection()
+        if connection.dialect.name == 'postgresql':
+            compiled = query.statement.compile(dialect=connection.dialect)
+            plan = connection.exec_driver_sql(
+                f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params
+            ).scalar()
+            return int(plan[0]['Plan']['Plan Rows']), False
+        capped = query.limit(COUNT_ESTIMATE_CAP + 1).count()
+        return min(capped, COUNT_ESTIMATE_CAP), capped <= COUNT_ESTIMATE_CAP
+    return query.count(), True
+
 # API to get leave requests
-@app.route('/api/leave_requests', methods=['GET'])
+@api.route('/api/leave_requests', methods=['GET'])
 @login_required
+@cached_response('leave_request', 'employee')
 def get_leave_requests():
     try:
         search = request.args.get('search', '')
         status = request.args.get('status', '')
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 10))
+        cursor = request.args.get('cursor', '')
+        count_mode = request.args.get('count', 'exact')
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 10)), 1), 100)
+        if count_mode not in LEAVE_COUNT_MODES:
+            return jsonify({'error': f"count must be one of: {', '.join(LEAVE_COUNT_MODES)}"}), 400
 
-        query = LeaveRequest.query
+        query = read_session().query(LeaveRequest).join(LeaveRequest.employee).options(
+            contains_eager(LeaveRequest.employee)
+        )
         
-        if search:
+        if search and fts_enabled() and build_fts_query(search):
+            # Match the request itself or the requesting employee's name/department
+            query = query.filter(leave_search_filter(search))
+        elif search:
             query = query.filter(
-                (LeaveRequest.employee_name.ilike(f'%{search}%')) |
+                (Employee.name.ilike(f'%{search}%')) |
                 (LeaveRequest.request_id.ilike(f'%{search}%')) |
-                (LeaveRequest.department.ilike(f'%{search}%'))
+                (Employee.department.ilike(f'%{search}%'))
             )
         if status and status != 'all':
             query = query.filter(LeaveRequest.status == status)
 
-        total = query.count()
-        leaves = query.order_by(LeaveRequest.created_at.desc()).offset((page-1)*per_page).limit(per_page).all()
+        total, total_exact = count_query_rows(query, count_mode)
+
+        # Keyset pagination on (created_at, id), newest first, when a cursor is given; rows
+        # created after the first page sort ahead of the cursor and never shift later pages
+        query = query.order_by(LeaveRequest.created_at.desc(), LeaveRequest.id.desc())
+        if cursor:
+            try:
+                last_created, last_id = decode_cursor(cursor)
+                last_created = datetime.fromisoformat(last_created)
+            except (ValueError, TypeError):
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query = query.filter(
+                (LeaveRequest.created_at < last_created) |
+                (and_(LeaveRequest.created_at == last_created, LeaveRequest.id < last_id))
+            )
+        else:
+            query = query.offset((page - 1) * per_page)
+        leaves = query.limit(per_page + 1).all()
+        has_more = len(leaves) > per_page
+        leaves = leaves[:per_page]
+        next_cursor = encode_cursor([leaves[-1].created_at.isoformat(), leaves[-1].id]) if has_more else None
+
+        return jsonify({
+            'requests': [serialize_leave_request(leave) for leave in leaves],
+            'total': total,
+            'total_exact': total_exact,
+            'page': page,
+            'per_page': per_page,
+            'next_cursor': next_cursor
+        })
+    except Exception as e:
+        logger.error(f"Error fetching leave requests: {e}")
+        return jsonify({'error': str(e)}), 500
+
+# API to search employees and leave requests together
+@api.route('/api/search', methods=['GET'])
+@login_required
+def search_all():
+    try:
+        q = request.args.get('q', '').strip()
+        limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+        if not q:
+            return jsonify({'employees': [], 'leave_requests': []})
+
+        if fts_enabled() and build_fts_query(q):
+            employee_ids = fts_match_ids('employee_fts', q, limit, EMPLOYEE_SEARCH_COLUMNS)
+            employees_by_id = {emp.id: emp for emp in Employee.query.filter(Employee.id.in_(employee_ids)).all()}
+            employees = [employees_by_id[id] for id in employee_ids if id in employees_by_id]
+            leaves = LeaveRequest.query.join(LeaveRequest.employee).options(
+                contains_eager(LeaveRequest.employee)
+            ).filter(leave_search_filter(q)).order_by(
+                LeaveRequest.created_at.desc(), LeaveRequest.id.desc()
+            ).limit(limit).all()
+        else:
+            employees = Employee.query.filter(
+                (Employee.name.ilike(f'%{q}%')) |
+                (Employee.email.ilike(f'%{q}%')) |
+                (Employee.title.ilike(f'%{q}%'))
+            ).limit(limit).all()
+            leaves = LeaveRequest.query.join(LeaveRequest.employee).options(
+                contains_eager(LeaveRequest.employee)
+            ).filter(
+                (Employee.name.ilike(f'%{q}%')) |
+                (LeaveRequest.request_id.ilike(f'%{q}%')) |
+                (Employee.department.ilike(f'%{q}%'))
+            ).limit(limit).all()
 
         return jsonify({
-            'requests': [{
+            'employees': [{
+                'id': emp.id,
+                'employee_id': emp.employee_id,
+                'name': emp.name,
+                'title': emp.title,
+                'department': emp.department,
+                'location': emp.location,
+                'avatar': emp.avatar
+            } for emp in employees],
+            'leave_requests': [{
                 'id': leave.id,
                 'request_id': leave.request_id,
-                'employee': {
-                    'name': leave.employee_name,
-                    'department': leave.department,
-                    'image': leave.employee_image
-                },
+                'employee_name': leave.employee.name,
+                'department': leave.employee.department,
                 'leave_type': leave.leave_type,
-                'from': leave.start_date.strftime('%d-%m-%Y'),
-                'to': leave.end_date.strftime('%d-%m-%Y'),
-                'days': leave.days,
                 'status': leave.status
-            } for leave in leaves],
-            'total': total,
-            'page': page,
-            'per_page': per_page
+            } for leave in leaves]
         })
     except Exception as e:
-        logger.error(f"Error fetching leave requests: {e}")
+        logger.error(f"Error searching: {e}")
+        return jsonify({'error': str(e)}), 500
+
+LEAVE_CALENDAR_STATUSES = {'approved': ['approved'], 'pending': ['pending'], 'all': ['approved', 'pending']}
+
+# Longest pending and longest approved leave, each a single lookup on idx_leave_status_days
+LONGEST_LEAVE_QUERY = db.select(*(
+    db.select(func.max(LeaveRequest.days)).where(LeaveRequest.status == status).scalar_subquery()
+    for status in LEAVE_CALENDAR_STATUSES['all']
+))
+
+# Length in days of the longest leave interval lookups can return: they only ask for pending
+# and approved leaves, so a long rejected one does not widen them. A leave overlapping
+# [start, end] must then start within that many days before `start`, which turns interval
+# lookups into bounded range scans on the start_date indexes
+def longest_leave_days():
+    return max(days or 0 for days in db.session.execute(LONGEST_LEAVE_QUERY).one()) or 1
+
+# Filter for leave requests whose [start_date, end_date] overlaps the given range
+def leave_overlap_filter(start_date, end_date):
+    earliest_start = start_date - timedelta(days=longest_leave_days() - 1)
+    return and_(LeaveRequest.start_date.between(earliest_start, end_date), LeaveRequest.end_date >= start_date)
+
+# Pending or approved leave requests of an employee overlapping the given range
+def overlapping_leave_requests(employee_pk, start_date, end_date):
+    return LeaveRequest.query.filter(
+        LeaveRequest.employee_id == employee_pk,
+        leave_overlap_filter(start_date, end_date),
+        LeaveRequest.status.in_(LEAVE_CALENDAR_STATUSES['all'])
+    ).all()
+
+# Take the leave_request sequence row's write lock, as reserve_ids does for a create, so
+# status changes and creates run their overlap checks one at a time
+def lock_leave_request_writes():
+    table = IdSequence.__table__
+    db.session.execute(table.update().where(table.c.name == 'leave_request').values(next_value=table.c.next_value))
+
+# Ids of the rows (id, employee_id, start_date, end_date) that cannot become pending or
+# approved: they overlap a pending or approved leave of the same employee, or a row before
+# them in the list that can
+def conflicting_leave_ids(rows):
+    if not rows:
+        return set()
+    taken = {}
+    for leave in db.session.query(
+        LeaveRequest.employee_id, LeaveRequest.start_date, LeaveRequest.end_date
+    ).filter(
+        LeaveRequest.employee_id.in_({row.employee_id for row in rows}),
+        leave_overlap_filter(min(row.start_date for row in rows), max(row.end_date for row in rows)),
+        LeaveRequest.status.in_(LEAVE_CALENDAR_STATUSES['all'])
+    ):
+        taken.setdefault(leave.employee_id, []).append((leave.start_date, leave.end_date))
+    conflicts = set()
+    for row in rows:
+        intervals = taken.setdefault(row.employee_id, [])
+        if any(start <= row.end_date and row.start_date <= end for start, end in intervals):
+            conflicts.add(row.id)
+        else:
+            intervals.append((row.start_date, row.end_date))
+    return conflicts
+
+# API to get per-day absence counts by department for a date range (a month by default);
+# details=1 also lists the overlapping leaves, i.e. who is off
+@api.route('/api/leave_calendar', methods=['GET'])
+@login_required
+@cached_response('leave_request', 'employee')
+def get_leave_calendar():
+    try:
+        try:
+            start = request.args.get('from')
+            end = request.args.get('to')
+            start_date = datetime.strptime(start, '%Y-%m-%d').date() if start else REFERENCE_DATE.replace(day=1)
+            if end:
+                end_date = datetime.strptime(end, '%Y-%m-%d').date()
+            else:
+                end_date = (start_date.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        except ValueError:
+            return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+        if start_date > end_date:
+            return jsonify({'error': 'Start date must be before end date'}), 400
+        if (end_date - start_date).days + 1 > MAX_RANGE_DAYS:
+            return jsonify({'error': f'Date range cannot exceed {MAX_RANGE_DAYS} days'}), 400
+        status = request.args.get('status', 'approved')
+        if status not in LEAVE_CALENDAR_STATUSES:
+            return jsonify({'error': 'Invalid status'}), 400
+        department = request.args.get('department', '')
+        details = request.args.get('details', '0') == '1'
+
+        filters = [leave_overlap_filter(start_date, end_date), LeaveRequest.status.in_(LEAVE_CALENDAR_STATUSES[status])]
+        if department and department != 'all':
+            filters.append(Employee.department == department)
+
+        # Difference array per department: +1 on a leave's first day in range, -1 after its last.
+        # The database groups leaves by those clipped edges, so only (department, day) counts
+        # come back rather than every overlapping leave
+        days = (end_date - start_date).days + 1
+        deltas = {}
+        first_day = db.case((LeaveRequest.start_date < start_date, start_date), else_=LeaveRequest.start_date)
+        last_day = db.case((LeaveRequest.end_date > end_date, end_date), else_=LeaveRequest.end_date)
+        for edge, offset, delta in ((first_day, 0, 1), (last_day, 1, -1)):
+            rows = db.session.query(Employee.department, edge, func.count(LeaveRequest.id)).select_from(
+                LeaveRequest
+            ).join(LeaveRequest.employee).filter(*filters).group_by(Employee.department, edge).all()
+            for name, day, count in rows:
+                deltas.setdefault(name, [0] * (days + 1))[(day - start_date).days + offset] += delta * count
+        departments = []
+        totals = [0] * days
+        for name in sorted(deltas):
+            absent, running = [], 0
+            for offset in range(days):
+                running += deltas[name][offset]
+                absent.append(running)
+                totals[offset] += running
+            departments.append({'name': name, 'absent': absent})
+
+        result = {
+            'from': start_date.isoformat(),
+            'to': end_date.isoformat(),
+            'dates': [(start_date + timedelta(days=offset)).strftime('%d-%m-%Y') for offset in range(days)],
+            'departments': departments,
+            'totals': totals
+        }
+        if details:
+            rows = db.session.query(
+                LeaveRequest.request_id, LeaveRequest.leave_type, LeaveRequest.start_date, LeaveRequest.end_date,
+                Employee.employee_id, Employee.name, Employee.department
+            ).join(LeaveRequest.employee).filter(*filters).order_by(
+                LeaveRequest.start_date, Employee.employee_id
+            ).all()
+            result['absences'] = [{
+                'request_id': row.request_id,
+                'employee_id': row.employee_id,
+                'name': row.name,
+                'department': row.department,
+                'leave_type': row.leave_type,
+                'from': row.start_date.strftime('%d-%m-%Y'),
+                'to': row.end_date.strftime('%d-%m-%Y')
+            } for row in rows]
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Error fetching leave calendar: {e}")
         return jsonify({'error': str(e)}), 500
 
 # API to create a leave request
-@app.route('/api/leave_requests', methods=['POST'])
+@api.route('/api/leave_requests', methods=['POST'])
 @login_required
 def create_leave_request():
     try:
         data = request.get_json()
+        employee_code = data.get('employee_id')
         employee_name = data.get('employee_name')
         department = data.get('department')
         leave_type = data.get('leave_type')
         start_date = datetime.strptime(data.get('start_date'), '%Y-%m-%d').date()
         end_date = datetime.strptime(data.get('end_date'), '%Y-%m-%d').date()
-        employee_image = data.get('employee_image', '')
 
-        if not all([employee_name, department, leave_type, start_date, end_date]):
+        if not all([employee_code or employee_name, leave_type, start_date, end_date]):
             return jsonify({'error': 'Missing required fields'}), 400
 
+        # Resolve the employee by code, or by name/email preferring the given department
+        if employee_code:
+            employee = Employee.query.filter_by(employee_id=employee_code).first()
+        else:
+            employee = Employee.query.filter(
+                (Employee.name == employee_name) | (Employee.email == employee_name)
+            ).order_by((Employee.department == department).desc(), Employee.id).first()
+        if not employee:
+            return jsonify({'error': 'Unknown employee'}), 400
+
         if start_date > end_date:
             return jsonify({'error': 'Start date must be before end date'}), 400
 
         days = (end_date - start_date).days + 1
-        request_id = f'LR{str(LeaveRequest.query.count() + 1).zfill(3)}'
+        # Reserving the id first takes the sequence row's write lock, so concurrent creates
+        # for the same employee cannot both pass the overlap check below
+        request_id = reserve_ids('leave_request')[0]
+
+        conflicts = overlapping_leave_requests(employee.id, start_date, end_date)
+        if conflicts:
+            db.session.rollback()
+            return jsonify({
+                'error': 'Leave overlaps an existing request',
+                'conflicts': [leave.request_id for leave in conflicts]
+            }), 409
 
         new_leave = LeaveRequest(
             request_id=request_id,
-            employee_name=employee_name,
-            department=department,
-            employee_image=employee_image,
+            employee_id=employee.id,
             leave_type=leave_type,
             start_date=start_date,
             end_date=end_date,
@@ -848,7 +3015,10 @@ def create_leave_request():
             status='pending'
         )
         db.session.add(new_leave)
+        db.session.flush()
+        change = leave_change(new_leave, None, 'pending')
         db.session.commit()
+        publish_change('leave_request.created', change)
         return jsonify({'message': 'Leave request created successfully', 'request_id': request_id}), 201
     except Exception as e:
         db.session.rollback()
@@ -856,7 +3026,7 @@ def create_leave_request():
         return jsonify({'error': str(e)}), 500
 
 # API to update leave request status
-@app.route('/api/leave_requests/<int:id>', methods=['PUT'])
+@api.route('/api/leave_requests/<int:id>', methods=['PUT'])
 @login_required
 def update_leave_request(id):
     try:
@@ -864,43 +3034,666 @@ def update_leave_request(id):
         data = request.get_json()
         status = data.get('status')
         
-        if status not in ['pending', 'approved', 'rejected']:
+        if status not in LEAVE_STATUSES:
             return jsonify({'error': 'Invalid status'}), 400
+
+        # A rejected request becoming pending or approved must not overlap, as on create
+        active = LEAVE_CALENDAR_STATUSES['all']
+        if status in active and leave.status not in active:
+            lock_leave_request_writes()
+            conflicts = overlapping_leave_requests(leave.employee_id, leave.start_date, leave.end_date)
+            if conflicts:
+                db.session.rollback()
+                return jsonify({
+                    'error': 'Leave overlaps an existing request',
+                    'conflicts': [conflict.request_id for conflict in conflicts]
+                }), 409
             
+        change = leave_change(leave, leave.status, status)
         leave.status = status
         db.session.commit()
+        publish_change('leave_request.updated', change)
         return jsonify({'message': 'Leave request updated successfully'})
     except Exception as e:
         db.session.rollback()
         logger.error(f"Error updating leave request: {e}")
         return jsonify({'error': str(e)}), 500
 
-# API to get leave statistics
-@app.route('/api/leave_stats', methods=['GET'])
+# API to update the status of many leave requests in one transaction
+@api.route('/api/leave_requests/batch', methods=['PUT'])
 @login_required
-def get_leave_stats():
+def batch_update_leave_requests():
     try:
-        total_leaves = 240  # 12 employees * 20 days per year
-        current_year = 2025  # Fixed for consistency with seeding
-        leaves_taken = LeaveRequest.query.filter(
-            and_(
-                LeaveRequest.status == 'approved',
-                LeaveRequest.start_date >= date(current_year, 1, 1),
-                LeaveRequest.end_date <= date(current_year, 12, 31)
+        data = request.get_json(silent=True)
+        try:
+            ids = parse_batch_ids(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        status = data.get('status')
+        if status not in LEAVE_STATUSES:
+            return jsonify({'error': 'Invalid status'}), 400
+
+        active = LEAVE_CALENDAR_STATUSES['all']
+        if status in active:
+            lock_leave_request_writes()
+        rows = db.session.query(
+            LeaveRequest.id, LeaveRequest.status, LeaveRequest.employee_id, LeaveRequest.start_date, LeaveRequest.end_date,
+            Employee.department
+        ).join(LeaveRequest.employee).filter(LeaveRequest.id.in_(ids)).all()
+        existing = {row.id: row for row in rows}
+        # Rejected requests becoming pending or approved are skipped if they would overlap
+        conflicts = conflicting_leave_ids([
+            existing[id] for id in ids if id in existing and status in active and existing[id].status not in active
+        ])
+        changed = [id for id in ids if id in existing and existing[id].status != status and id not in conflicts]
+        changed_ids = set(changed)
+        if changed:
+            db.session.execute(
+                LeaveRequest.__table__.update().where(LeaveRequest.id.in_(changed)).values(status=status)
             )
-        ).with_entities(db.func.sum(LeaveRequest.days)).scalar() or 0
-        pending_requests = LeaveRequest.query.filter_by(status='pending').count()
-        remaining_leaves = max(0, total_leaves - leaves_taken)
+            # The bulk UPDATE bypasses ORM events, so move approved days in the ledger and
+            # pending counts in the department totals here, summed over the batch
+            ledger = {}
+            departments = {}
+            pending = {}
+            for id in changed:
+                row = existing[id]
+                if 'approved' in (row.status, status):
+                    sign = 1 if status == 'approved' else -1
+                    departments[row.employee_id] = row.department
+                    for year, days in leave_days_by_year(row.start_date, row.end_date):
+                        ledger[(row.employee_id, year)] = ledger.get((row.employee_id, year), 0) + sign * days
+                if 'pending' in (row.status, status):
+                    count = pending.setdefault((row.department,), {'pending_requests': 0})
+                    count['pending_requests'] += 1 if status == 'pending' else -1
+            connection = db.session.connection()
+            apply_leave_balance_deltas(connection, ledger, departments)
+            add_to_totals_many(connection, DepartmentTotal, ('department',), pending)
+        db.session.commit()
+        publish_batch_changes(len(changed), leave_batch_changes(changed, existing, status))
 
-        return jsonify({
-            'total_leaves': total_leaves,
-            'leaves_taken': leaves_taken,
-            'pending_requests': pending_requests,
-            'remaining_leaves': remaining_leaves
-        })
+        return jsonify({'results': [{
+            'id': id,
+            'result': 'not_found' if id not in existing else 'conflict' if id in conflicts else
+                      'updated' if id in changed_ids else 'unchanged'
+        } for id in ids]})
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error batch updating leave requests: {e}")
+        return jsonify({'error': str(e)}), 500
+
+# /api/stream events for the leave requests a batch moved to status, in request order
+def leave_batch_changes(ids, existing, status):
+    leaves = {leave.id: leave for leave in LeaveRequest.query.join(LeaveRequest.employee).options(
+        contains_eager(LeaveRequest.employee)
+    ).filter(LeaveRequest.id.in_(ids))}
+    for id in ids:
+        yield 'leave_request.updated', leave_change(leaves[id], existing[id].status, status)
+
+# Leave entitlement and usage for a year from the ledger, for the whole organisation, one
+# department or one employee, plus pending requests. Employees without a ledger row for the
+# year count with the default entitlement
+def leave_stats_summary(year=None, department='', employee_code=''):
+    year = year or REFERENCE_DATE.year
+    default_entitlement = current_app.config['LEAVE_ENTITLEMENT_DAYS']
+    session = read_session()
+    if employee_code:
+        employee = Employee.employee_id == employee_code
+        pending = session.query(func.count(LeaveRequest.id)).join(LeaveRequest.employee).filter(
+            LeaveRequest.status == 'pending', employee
+        ).scalar_subquery()
+        employees, total_leaves, leaves_taken, pending_requests = session.query(
+            func.count(Employee.id),
+            func.sum(func.coalesce(LeaveBalance.entitlement, default_entitlement)),
+            func.sum(func.coalesce(LeaveBalance.used, 0)),
+            pending
+        ).select_from(Employee).outerjoin(
+            LeaveBalance, and_(LeaveBalance.employee_id == Employee.id, LeaveBalance.year == year)
+        ).filter(employee).one()
+    else:
+        # Organisation and department figures come from the running totals: one row per department
+        # whatever the headcount, with the year's ledger sums riding along as scalar subqueries
+        department_filters = []
+        year_filters = [LeaveBalanceTotal.year == year]
+        if department and department != 'all':
+            department_filters.append(DepartmentTotal.department == department)
+            year_filters.append(LeaveBalanceTotal.department == department)
+        balances, entitlement, leaves_taken = (
+            session.query(func.sum(column)).filter(*year_filters).scalar_subquery()
+            for column in (LeaveBalanceTotal.balances, LeaveBalanceTotal.entitlement, LeaveBalanceTotal.used)
+        )
+        employees, pending_requests, balances, entitlement, leaves_taken = session.query(
+            func.sum(DepartmentTotal.employees), func.sum(DepartmentTotal.pending_requests),
+            balances, entitlement, leaves_taken
+        ).filter(*department_filters).one()
+        employees = int(employees or 0)
+        pending_requests = int(pending_requests or 0)
+        total_leaves = int(entitlement or 0) + (employees - int(balances or 0)) * default_entitlement
+    total_leaves = int(total_leaves or 0)
+    leaves_taken = int(leaves_taken or 0)
+
+    return {
+        'year': year,
+        'employees': employees,
+        'total_leaves': total_leaves,
+        'leaves_taken': leaves_taken,
+        'pending_requests': pending_requests,
+        'remaining_leaves': max(0, total_leaves - leaves_taken)
+    }
+
+# API to get leave statistics; optional year, department and employee_id narrow the balance
+@api.route('/api/leave_stats', methods=['GET'])
+@login_required
+@cached_response('leave_balance', 'leave_request', 'employee')
+def get_leave_stats():
+    try:
+        year = request.args.get('year', type=int)
+        employee_code = request.args.get('employee_id', '')
+        summary = leave_stats_summary(year, request.args.get('department', ''), employee_code)
+        if employee_code and not summary['employees']:
+            return jsonify({'error': 'Unknown employee'}), 400
+        return jsonify(summary)
     except Exception as e:
         logger.error(f"Error fetching leave stats: {e}")
         return jsonify({'error': str(e)}), 500
 
+# API to get every dashboard block in one round trip; `fields` selects a subset, and
+# start/end/filter/department apply to the attendance blocks as on their own endpoints
+@api.route('/api/dashboard', methods=['GET'])
+@login_required
+@cached_response('attendance_daily_stat', 'attendance', 'employee', 'leave_balance', 'leave_request')
+def get_dashboard():
+    try:
+        fields = [field.strip() for field in request.args.get('fields', ','.join(DASHBOARD_FIELDS)).split(',')
+                  if field.strip()]
+        unknown = [field for field in fields if field not in DASHBOARD_FIELDS]
+        if unknown:
+            return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+        limit = min(max(int(request.args.get('limit', 5)), 1), 50)
+        try:
+            start_date, end_date = resolve_date_range(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # All blocks are read through the one request-scoped session and connection
+        result = {}
+        if 'attendance_stats' in fields:
+            result['attendance_stats'] = attendance_stats_summary(
+                start_date, end_date, request.args.get('department', '')
+            )
+        if 'leave_stats' in fields:
+            result['leave_stats'] = leave_stats_summary()
+        if 'recent_attendance' in fields:
+            result['recent_attendance'] = attendance_records(start_date, end_date, limit)
+        if 'recent_leaves' in fields:
+            result['recent_leaves'] = recent_leave_requests(limit)
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Error fetching dashboard: {e}")
+        return jsonify({'error': str(e)}), 500
+
+# Prometheus metrics for this process (Bearer METRICS_TOKEN when set, else a logged-in session)
+@api.route('/metrics', methods=['GET'])
+def metrics():
+    token = current_app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    if not token and 'user_email' not in session:
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# API to inspect response cache counters
+@api.route('/api/cache_stats', methods=['GET'])
+@login_required
+def get_cache_stats():
+    return jsonify(get_response_cache().info())
+
+# /api/stream event for an attendance row whose status went from old_status (None when
+# created) to new_status (None once deleted); delta is the change to that day's status counts
+# in its department
+def attendance_change(record, old_status, new_status):
+    return attendance_key_change(record.id, record.date, record.employee.department, old_status, new_status)
+
+# attendance_change from the row's id, date and department, for the batch routes that work on
+# those keys rather than loaded records
+def attendance_key_change(id, day, department, old_status, new_status):
+    delta = {}
+    for status, step in ((old_status, -1), (new_status, 1)):
+        if status:
+            delta[status] = delta.get(status, 0) + step
+    return {
+        'id': id,
+        'status': new_status,
+        'date': day.isoformat(),
+        'department': department,
+        'delta': {status: count for status, count in delta.items() if count}
+    }
+
+# /api/stream event for a leave request whose status went from old_status (None when created)
+# to new_status; delta is the change to pending requests and to approved days taken per year
+def leave_change(leave, old_status, new_status):
+    delta = {}
+    pending = (new_status == 'pending') - (old_status == 'pending')
+    if pending:
+        delta['pending_requests'] = pending
+    taken = {}
+    for status, sign in ((old_status, -1), (new_status, 1)):
+        if status == 'approved':
+            for year, days in leave_days_by_year(leave.start_date, leave.end_date):
+                taken[str(year)] = taken.get(str(year), 0) + sign * days
+    if any(taken.values()):
+        delta['leaves_taken'] = {year: days for year, days in taken.items() if days}
+    return {
+        'id': leave.id,
+        'request_id': leave.request_id,
+        'status': new_status,
+        'employee_id': leave.employee.employee_id,
+        'department': leave.employee.department,
+        'delta': delta
+    }
+
+# Server-sent events for changes made through the attendance and leave APIs. Under a WSGI
+# server each open stream holds a worker thread, so it ends after STREAM_WSGI_SECONDS and the
+# browser reconnects with Last-Event-ID; asgi.py serves this URL without that limit
+@api.route('/api/stream', methods=['GET'])
+@login_required
+def stream_changes():
+    hub = get_change_hub()
+    heartbeat = current_app.config['STREAM_HEARTBEAT_SECONDS']
+    deadline = time.monotonic() + current_app.config['STREAM_WSGI_SECONDS']
+    position, frames = hub.resume(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+
+    def generate(position, frames):
+        yield SSE_RETRY + b''.join(frames)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            position, frames = hub.wait(position, min(heartbeat, remaining))
+            yield b''.join(frames) or SSE_HEARTBEAT
+    return Response(generate(position, frames), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+JOB_PROGRESS_INTERVAL = 1.0  # Seconds between progress (heartbeat) writes
+
+# Runner state for this process; started per process (gunicorn post_fork, ASGI startup or the
+# first job queued here) so forked workers each get live threads
+job_executor = None
+job_runner_pid = None
+job_runner_lock = threading.Lock()
+local_jobs = set()  # Ids handed to this process's runner threads and not finished yet
+
+# Write job columns on a separate connection, so progress can be saved while the job's own
+# session is still streaming rows
+def update_job(job_id, **values):
+    values['updated_at'] = datetime.utcnow()
+    with db.engine.begin() as connection:
+        return connection.execute(Job.__table__.update().where(Job.id == job_id).values(**values)).rowcount
+
+# Throttled progress callback for a job; each write also serves as its heartbeat
+def job_progress_reporter(job_id):
+    last = [0.0]
+    def report(done, total=None, force=False):
+        now = time.monotonic()
+        if force or now - last[0] >= JOB_PROGRESS_INTERVAL:
+            last[0] = now
+            update_job(job_id, progress=done, **({'total': total} if total is not None else {}))
+    return report
+
+# Start/end/department params shared by the attendance jobs, validated like the API routes
+def validate_attendance_job_params(params):
+    start_date, end_date = resolve_date_range(params)
+    department = params.get('department', '')
+    return {
+        'start': start_date.isoformat(),
+        'end': end_date.isoformat(),
+        'department': '' if department == 'all' else department
+    }
+
+# Write the attendance CSV, gzipped, to the job's result file
+def run_attendance_export_job(job_id, params, report):
+    start_date, end_date = date.fromisoformat(params['start']), date.fromisoformat(params['end'])
+    query = db.session.query(func.sum(AttendanceDailyStat.count)).filter(
+        AttendanceDailyStat.date.between(start_date, end_date)
+    )
+    if params['department']:
+        query = query.filter(AttendanceDailyStat.department == params['department'])
+    total = int(query.scalar() or 0)
+
+    lines = [0]
+    def counted(chunks):
+        for chunk in chunks:
+            lines[0] += chunk.count(b'\n')
+            report(max(lines[0] - 1, 0), total)
+            yield chunk
+
+    os.makedirs(current_app.config['JOB_RESULTS_DIR'], exist_ok=True)
+    filename = f'{job_id}.csv.gz'
+    path = os.path.join(current_app.config['JOB_RESULTS_DIR'], filename)
+    with open(path + '.part', 'wb') as output:
+        for chunk in gzip_chunks(counted(generate_attendance_csv(start_date, end_date, params['department'] or None))):
+            output.write(chunk)
+    os.replace(path + '.part', path)
+    report(max(lines[0] - 1, 0), total, force=True)
+    return {'rows': max(lines[0] - 1, 0), 'bytes': os.path.getsize(path)}, filename
+
+# Attendance and leave summary for a date range
+def run_attendance_report_job(job_id, params, report):
+    start_date, end_date = date.fromisoformat(params['start']), date.fromisoformat(params['end'])
+    return {
+        'attendance': attendance_stats_summary(start_date, end_date, params['department']),
+        'leave': leave_stats_summary(start_date.year, params['department'])
+    }, None
+
+# Reconciliation reports for the attendance rollup and the leave ledger
+def run_check_attendance_rollup_job(job_id, params, report):
+    return {'mismatches': check_attendance_rollup()}, None
+
+def run_check_leave_balances_job(job_id, params, report):
+    return {'mismatches': check_leave_balances()}, None
+
+def no_job_params(params):
+    return {}
+
+# Job kind -> (params validator, handler). Handlers return (JSON result, result file or None)
+JOB_KINDS = {
+    'attendance_export': (validate_attendance_job_params, run_attendance_export_job),
+    'attendance_report': (validate_attendance_job_params, run_attendance_report_job),
+    'check_attendance_rollup': (no_job_params, run_check_attendance_rollup_job),
+    'check_leave_balances': (no_job_params, run_check_leave_balances_job),
+}
+
+# Run one job on a runner thread; the conditional UPDATE makes sure only one worker process
+# picks up a given job
+def run_job(app, job_id):
+    with app.app_context():
+        try:
+            now = datetime.utcnow()
+            with db.engine.begin() as connection:
+                claimed = connection.execute(Job.__table__.update().where(
+                    and_(Job.id == job_id, Job.status == 'queued')
+                ).values(status='running', started_at=now, updated_at=now)).rowcount
+            if not claimed:
+                return
+            job = db.session.get(Job, job_id)
+            handler = JOB_KINDS[job.kind][1]
+            result, result_file = handler(job_id, json.loads(job.params), job_progress_reporter(job_id))
+            db.session.rollback()  # End the job's read transaction
+            update_job(job_id, status='succeeded', result=json.dumps(result), result_file=result_file,
+                       finished_at=datetime.utcnow())
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error running job {job_id}: {e}")
+            update_job(job_id, status='failed', error=str(e), finished_at=datetime.utcnow())
+        finally:
+            local_jobs.discard(job_id)
+
+# Hand a job to this process's runner threads unless they already have it
+def submit_job(app, job_id):
+    with job_runner_lock:
+        if job_id in local_jobs:
+            return
+        local_jobs.add(job_id)
+    job_executor.submit(run_job, app, job_id)
+
+# Heartbeat the jobs running in this process, requeue running jobs whose worker stopped
+# heartbeating (e.g. across a restart) and delete result files past JOB_RESULT_TTL_SECONDS.
+# Returns the ids of queued jobs
+def sweep_jobs():
+    table = Job.__table__
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=current_app.config['JOB_STALE_SECONDS'])
+    expired = now - timedelta(seconds=current_app.config['JOB_RESULT_TTL_SECONDS'])
+    with db.engine.begin() as connection:
+        if local_jobs:
+            connection.execute(table.update().where(
+                and_(table.c.id.in_(list(local_jobs)), table.c.status == 'running')
+            ).values(updated_at=now))
+        connection.execute(table.update().where(
+            and_(table.c.status == 'running', table.c.updated_at < stale)
+        ).values(status='queued'))
+        queued = connection.execute(
+            db.select(table.c.id).where(table.c.status == 'queued').order_by(table.c.created_at)
+        ).scalars().all()
+        results = connection.execute(db.select(table.c.id, table.c.result_file).where(
+            table.c.result_file.isnot(None), table.c.finished_at < expired
+        )).all()
+        if results:
+            connection.execute(table.update().where(
+                table.c.id.in_([id for id, _ in results])
+            ).values(result_file=None))
+    for _, result_file in results:
+        try:
+            os.remove(os.path.join(current_app.config['JOB_RESULTS_DIR'], result_file))
+        except FileNotFoundError:
+            pass
+    return queued
+
+# Sweeper thread: sweeps three times per JOB_STALE_SECONDS, so a live job misses at most one
+# heartbeat before another worker would consider it stale
+def run_job_sweeper(app):
+    while job_runner_pid == os.getpid():
+        try:
+            with app.app_context():
+                for job_id in sweep_jobs():
+                    submit_job(app, job_id)
+        except Exception as e:
+            logger.error(f"Error sweeping jobs: {e}")
+        time.sleep(app.config['JOB_STALE_SECONDS'] / 3)
+
+# Start the job runner in this process. Only threads are started here; all of the runner's
+# database work happens on them, never on a request or the ASGI event loop
+def start_job_runner(app):
+    global job_executor, job_runner_pid
+    if job_runner_pid == os.getpid():
+        return
+    with job_runner_lock:
+        if job_runner_pid == os.getpid():
+            return
+        job_executor = ThreadPoolExecutor(max_workers=app.config['JOB_WORKERS'], thread_name_prefix='job')
+        local_jobs.clear()
+        job_runner_pid = os.getpid()
+    threading.Thread(target=run_job_sweeper, args=(app,), name='job-sweeper', daemon=True).start()
+
+# Persist a job for the logged-in user and hand it to the runner; returns a 202 response
+def enqueue_job_response(kind, params):
+    queued = db.session.query(func.count(Job.id)).filter(Job.status.in_(['queued', 'running'])).scalar()
+    if queued >= current_app.config['JOB_MAX_QUEUED']:
+        return jsonify({'error': 'Job queue is full, try again later'}), 429
+    job = Job(id=os.urandom(16).hex(), kind=kind, params=json.dumps(params), owner=session['user_email'])
+    db.session.add(job)
+    db.session.commit()
+    app = current_app._get_current_object()
+    start_job_runner(app)
+    submit_job(app, job.id)
+    return jsonify({'job_id': job.id, 'status': 'queued', 'status_url': url_for('api.get_job', id=job.id)}), 202
+
+def serialize_job(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'params': json.loads(job.params),
+        'progress': job.progress,
+        'total': job.total,
+        'result': json.loads(job.result) if job.result else None,
+        'error': job.error,
+        'download_url': url_for('api.download_job_result', id=job.id) if job.result_file else None,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    }
+
+# Job owned by the logged-in user, or None
+def find_user_job(id):
+    return Job.query.filter_by(id=id, owner=session['user_email']).first()
+
+# API to queue a background job ({"kind": ..., "params": {...}})
+@api.route('/api/jobs', methods=['POST'])
+@login_required
+def create_job():
+    try:
+        data = request.get_json() or {}
+        kind = data.get('kind')
+        if kind not in JOB_KINDS:
+            return jsonify({'error': f"kind must be one of: {', '.join(JOB_KINDS)}"}), 400
+        try:
+            params = JOB_KINDS[kind][0](data.get('params') or {})
+        except (ValueError, AttributeError) as e:
+            return jsonify({'error': str(e)}), 400
+        return enqueue_job_response(kind, params)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error creating job: {e}")
+        return jsonify({'error': str(e)}), 500
+
+# API to get a job's status, progress and result
+@api.route('/api/jobs/<id>', methods=['GET'])
+@login_required
+def get_job(id):
+    job = find_user_job(id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(serialize_job(job))
+
+# API to download a finished job's result file
+@api.route('/api/jobs/<id>/result', methods=['GET'])
+@login_required
+def download_job_result(id):
+    job = find_user_job(id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.status != 'succeeded':
+        return jsonify({'error': 'Job has no result file yet'}), 409
+    if not job.result_file:
+        return jsonify({'error': 'Job has no result file, or it has expired'}), 404
+    params = json.loads(job.params)
+    return send_from_directory(
+        current_app.config['JOB_RESULTS_DIR'], job.result_file, as_attachment=True, mimetype='application/gzip',
+        download_name=f"{job.kind}_{params.get('start', '')}_{params.get('end', '')}.csv.gz"
+    )
+
+# CLI command to create or migrate the schema; the app itself never touches the database at import
+@commands.cli.command('init-db')
+def init_db_command():
+    migrated = init_db()
+    if migrated:
+        click.echo(f"Migrated {', '.join(migrated)} to Employee foreign keys")
+    click.echo("Database is ready")
+
+# CLI command to load the demo data, or a synthetic org (datagen.py) of the given size
+@commands.cli.command('seed')
+@click.option('--size', default='demo', help='demo, small (1k employees), medium (10k), large (100k) or a number')
+@click.option('--days', default=365, help='Days of attendance for a synthetic org')
+def seed_command(size, days):
+    if size == 'demo':
+        if seed_demo_data():
+            click.echo("Seeded demo employees, attendance and leave requests")
+        else:
+            click.echo("Tables already have data, nothing seeded")
+        return
+    import datagen
+    if size in datagen.SIZES:
+        employees = datagen.SIZES[size]
+    elif size.isdigit():
+        employees = int(size)
+    else:
+        raise click.BadParameter(f"must be demo, {', '.join(datagen.SIZES)} or a number", param_hint='--size')
+    counts = datagen.generate(sys.modules[__name__], employees, days, log=click.echo)
+    click.echo(f"Seeded {counts['employees']:,} employees, {counts['attendance']:,} attendance rows "
+               f"and {counts['leave_requests']:,} leave requests")
+
+# CLI command to backfill the attendance rollup from existing rows
+@commands.cli.command('rebuild-attendance-rollup')
+def rebuild_attendance_rollup_command():
+    buckets = rebuild_attendance_rollup()
+    click.echo(f"Rebuilt attendance rollup with {buckets} buckets")
+
+# CLI command to move closed months of attendance out of the live table into archive files
+@commands.cli.command('archive-attendance')
+@click.option('--before', help='First month to keep live, YYYY-MM (default: keep ATTENDANCE_LIVE_MONTHS months)')
+def archive_attendance_command(before):
+    if before:
+        try:
+            before = datetime.strptime(before, '%Y-%m').date()
+        except ValueError:
+            raise click.BadParameter('must be in YYYY-MM format', param_hint='--before')
+    else:
+        before = shift_month(REFERENCE_DATE, 1 - current_app.config['ATTENDANCE_LIVE_MONTHS'])
+    archived = archive_attendance(before)
+    for month, rows in archived:
+        click.echo(f"Archived {month:%Y-%m}: {rows:,} rows")
+    if not archived:
+        click.echo(f"No live attendance before {before:%Y-%m}, nothing archived")
+
+# CLI command to verify the attendance rollup against a live scan
+@commands.cli.command('check-attendance-rollup')
+def check_attendance_rollup_command():
+    mismatches = check_attendance_rollup()
+    for mismatch in mismatches:
+        click.echo(f"{mismatch['date']} {mismatch['department']} {mismatch['status']}: "
+                   f"expected {mismatch['expected']}, found {mismatch['actual']}")
+    if mismatches:
+        raise SystemExit(1)
+    click.echo("Attendance rollup is consistent")
+
+# CLI command to recompute used days in the leave ledger from approved requests
+@commands.cli.command('rebuild-leave-balances')
+def rebuild_leave_balances_command():
+    rows = rebuild_leave_balances()
+    click.echo(f"Rebuilt leave balances for {rows} employee-years")
+
+# CLI command to reconcile the leave ledger against a full recomputation
+@commands.cli.command('check-leave-balances')
+def check_leave_balances_command():
+    mismatches = check_leave_balances()
+    for mismatch in mismatches:
+        click.echo(f"employee {mismatch['employee_id']} {mismatch['year']}: "
+                   f"expected {mismatch['expected']}, found {mismatch['actual']}")
+    totals = check_leave_totals()
+    for mismatch in totals:
+        click.echo(f"{mismatch['department']} {mismatch['year'] or 'all years'} {mismatch['counter']}: "
+                   f"expected {mismatch['expected']}, found {mismatch['actual']}")
+    mismatches += totals
+    if mismatches:
+        raise SystemExit(1)
+    click.echo("Leave balances are consistent")
+
+# CLI command to move legacy name/department copies onto Employee foreign keys
+@commands.cli.command('normalize-employee-references')
+def normalize_employee_references_command():
+    migrated = normalize_employee_references()
+    if migrated:
+        db.create_all()
+        setup_fts()
+        rebuild_attendance_rollup()
+        rebuild_leave_balances()
+        click.echo(f"Migrated {', '.join(migrated)} to Employee foreign keys")
+    else:
+        click.echo("Tables already reference Employee by foreign key")
+
+# Application factory: config from the environment (plus overrides), blueprints and hooks.
+# Nothing here reads the database; run `flask init-db` (and `flask seed`) to set it up
+def create_app(config=None):
+    app = Flask(__name__)
+    configure_app(app, config)
+    db.init_app(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            configure_sqlite_engine(app, engine)
+            instrument_engine(engine)
+    app.json = create_json_provider(app)
+    app.before_request(_start_request_profile)
+    app.after_request(_finish_request_profile)
+    app.register_blueprint(pages)
+    app.register_blueprint(api)
+    app.register_blueprint(commands)
+    return app
+
+app = create_app()
+
 if __name__ == '__main__':
+    # The development server sets up and seeds its own database
+    with app.app_context():
+        init_db()
+        seed_demo_data()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""Benchmark every GET /api/* route against a generated organisation.
+
+Generates data with datagen.py into a throwaway SQLite database
+(or uses DATABASE_URL as-is with --no-generate), then drives each route through
+Flask's test client with the response cache disabled. For every route it
+reports p50/p95/p99 latency, SQL queries per request (from the Server-Timing
+header) and the process's peak RSS, and writes everything to a JSON file so
+runs from two commits can be compared with --compare.
+
+    python benchmarks/api_benchmark.py --size small --requests 50 --output before.json
+    python benchmarks/api_benchmark.py --size small --requests 50 --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Representative query strings; routes not listed are requested without one
+ROUTE_QUERIES = {
+    '/api/employees': 'per_page=20',
+    '/api/attendance': 'filter=week&limit=20',
+    '/api/attendance/export': 'filter=today',
+    '/api/attendance_stats': 'filter=month',
+    '/api/leave_requests': 'per_page=20',
+    '/api/leave_calendar': 'status=all',
+    '/api/search': 'q=sharma',
+    '/api/dashboard': 'filter=today&limit=5',
+}
+QUERY_COUNT = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024  # bytes on macOS, KiB elsewhere
+
+
+def git_commit(root):
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def job_urls(client):
+    # /api/jobs/<id> routes need a finished job owned by the benchmark user
+    job_id = client.post('/api/jobs', json={'kind': 'attendance_export', 'params': {'filter': 'week'}}).get_json()['job_id']
+    for _ in range(600):
+        if client.get(f'/api/jobs/{job_id}').get_json()['status'] in ('succeeded', 'failed'):
+            break
+        time.sleep(0.1)
+    return {'/api/jobs/<id>': f'/api/jobs/{job_id}', '/api/jobs/<id>/result': f'/api/jobs/{job_id}/result'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', default='small', help='datagen size (small/medium/large)')
+    parser.add_argument('--employees', type=int, help='overrides --size')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--requests', type=int, default=50, help='requests per route')
+    parser.add_argument('--no-generate', action='store_true', help='benchmark DATABASE_URL as it is')
+    parser.add_argument('--output', default='api_benchmark.json')
+    parser.add_argument('--compare', help='earlier JSON result to compare p95 latency against')
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if not args.no_generate:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ['CACHE_MAX_ENTRIES'] = '0'
+    os.environ.setdefault('SLOW_QUERY_MS', '60000')
+    sys.path.insert(0, root)
+    import app as app_module
+    import datagen
+    with app_module.app.app_context():
+        app_module.init_db()
+
+    counts = {}
+    if not args.no_generate:
+        counts = datagen.generate(app_module, args.employees or datagen.SIZES[args.size], args.days)
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user_email'] = 'bench@company.in'
+    urls = {}
+    for rule in sorted(app_module.app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if rule.rule.startswith('/api/') and 'GET' in rule.methods:
+            urls[rule.rule] = rule.rule if not rule.arguments else None
+    urls.update(job_urls(client))
+
+    results = {}
+    print(f"{'route':<28} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'peak RSS':>9}  status")
+    for rule, url in urls.items():
+        if url is None:
+            print(f"{rule:<28} skipped (no sample value for its arguments)")
+            continue
+        query = ROUTE_QUERIES.get(rule)
+        if query:
+            url = f'{url}?{query}'
+        latencies, queries, statuses = [], [], set()
+        for _ in range(args.requests):
+            started = time.perf_counter()
+            response = client.get(url)
+            response.get_data()  # Drain streamed bodies
+            latencies.append((time.perf_counter() - started) * 1000)
+            match = QUERY_COUNT.search(response.headers.get('Server-Timing', ''))
+            queries.append(int(match.group(1)) if match else 0)
+            statuses.add(response.status_code)
+        results[rule] = {
+            'url': url,
+            'p50_ms': round(statistics.median(latencies), 3),
+            'p95_ms': round(percentile(latencies, 0.95), 3),
+            'p99_ms': round(percentile(latencies, 0.99), 3),
+            'queries_per_request': round(statistics.mean(queries), 2),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'statuses': sorted(statuses),
+        }
+        r = results[rule]
+        print(f"{rule:<28} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+              f"{r['queries_per_request']:>8.1f} {r['peak_rss_mb']:>7.1f}MB  {','.join(map(str, r['statuses']))}")
+
+    with app_module.app.app_context():
+        database = app_module.db.engine.dialect.name
+    report = {
+        'commit': git_commit(root),
+        'python': platform.python_version(),
+        'database': database,
+        'data': counts,
+        'requests_per_route': args.requests,
+        'routes': results,
+    }
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as previous_file:
+            previous = json.load(previous_file)
+        print(f"\np95 vs {args.compare} (commit {previous.get('commit')})")
+        for rule, r in results.items():
+            before = previous.get('routes', {}).get(rule)
+            if before and before['p95_ms']:
+                change = (r['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+                print(f"{rule:<28} {before['p95_ms']:>8.2f} -> {r['p95_ms']:>8.2f} ms ({change:+.0f}%)")
+
+
+if __name__ == '__main__':
+    main()
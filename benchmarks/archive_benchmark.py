@@ -0,0 +1,107 @@
+"""Measure attendance queries before and after archiving closed months.
+
+Generates data with datagen.py into a throwaway SQLite database with
+the response cache disabled, then times live-month and closed-month views of
+/api/attendance, /api/attendance_stats and the CSV export. It runs
+`archive_attendance` for every month outside ATTENDANCE_LIVE_MONTHS and times
+the same requests again, checks that every response still has the same rows,
+and reports live table rows and archive file sizes.
+
+    python benchmarks/archive_benchmark.py --employees 2000 --days 365 --repeat 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+URLS = {
+    'live day': '/api/attendance?filter=today&limit=20',
+    'live month': '/api/attendance?filter=month&limit=20',
+    'closed month': '/api/attendance?start=2024-09-01&end=2024-09-30&limit=20',
+    'closed month, all rows': '/api/attendance?start=2024-09-01&end=2024-09-30',
+    'stats, whole year': '/api/attendance_stats?start=2024-05-01&end=2025-04-30',
+    'export live month': '/api/attendance/export?start=2025-04-01&end=2025-04-30&compress=0',
+    'export closed month': '/api/attendance/export?start=2024-09-01&end=2024-09-30&compress=0',
+    'export whole year': '/api/attendance/export?start=2024-05-01&end=2025-04-30&compress=0',
+}
+
+
+def rows_of(url, response):
+    # Order-independent content: the export's CSV lines, or the JSON with records sorted by id.
+    # Which rows a limit picks is unspecified (no ORDER BY), so only their number is compared
+    if response.mimetype == 'text/csv':
+        return sorted(response.get_data().splitlines())
+    body = response.get_json()
+    if 'records' in body:
+        if 'limit=' in url:
+            body['records'] = len(body['records'])
+        else:
+            body['records'] = sorted(body['records'], key=lambda record: record['id'])
+    return body
+
+
+def measure(client, repeat):
+    timings, contents = {}, {}
+    for label, url in URLS.items():
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(url)
+            response.get_data()
+            samples.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, (url, response.status_code)
+        timings[label] = statistics.median(samples)
+        contents[label] = rows_of(url, response)
+    return timings, contents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    os.environ['ATTENDANCE_ARCHIVE_DIR'] = os.path.join(directory, 'archive')
+    os.environ['CACHE_MAX_ENTRIES'] = '0'
+    os.environ.setdefault('SLOW_QUERY_MS', '60000')
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as app_module
+    import datagen
+    with app_module.app.app_context():
+        app_module.init_db()
+    datagen.generate(app_module, args.employees, args.days)
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user_email'] = 'bench@company.in'
+    with app_module.app.app_context():
+        live_before = app_module.Attendance.query.count()
+    before, before_contents = measure(client, args.repeat)
+
+    with app_module.app.app_context():
+        cutoff = app_module.shift_month(app_module.REFERENCE_DATE, 1 - app_module.app.config['ATTENDANCE_LIVE_MONTHS'])
+        started = time.perf_counter()
+        archived = app_module.archive_attendance(cutoff)
+        elapsed = time.perf_counter() - started
+        live_after = app_module.Attendance.query.count()
+        mismatches = app_module.check_attendance_rollup()
+    archive_dir = os.environ['ATTENDANCE_ARCHIVE_DIR']
+    archive_bytes = sum(os.path.getsize(os.path.join(archive_dir, name)) for name in os.listdir(archive_dir))
+    print(f"archived {len(archived)} months ({sum(rows for _, rows in archived):,} rows) in {elapsed:.1f}s "
+          f"into {archive_bytes / 1024 / 1024:.1f} MB; live table {live_before:,} -> {live_after:,} rows; "
+          f"rollup mismatches: {len(mismatches)}")
+
+    after, after_contents = measure(client, args.repeat)
+    print(f"{'request':<26} {'before ms':>10} {'after ms':>10}  same rows")
+    for label in URLS:
+        print(f"{label:<26} {before[label]:>10.1f} {after[label]:>10.1f}  "
+              f"{'yes' if before_contents[label] == after_contents[label] else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
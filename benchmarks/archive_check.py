@@ -0,0 +1,87 @@
+"""Check attendance reads over a range that mixes archived months and older live rows.
+
+Runs the app against a throwaway SQLite database (via DATABASE_URL) with a small
+generated organisation, archives March 2025, then bulk-ingests a clock-in for
+February, a month before the archive that was never archived. For February to
+March it checks that the attendance list returns every row the rollup stats
+count (the February one included), that the chart counts that day, and that
+the CSV export has the same rows in date order. It then archives again, which
+must move February out too, and repeats the checks. Exits non-zero on any
+mismatch.
+
+    python benchmarks/archive_check.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, default=50)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    os.environ['ATTENDANCE_ARCHIVE_DIR'] = os.path.join(directory, 'archive')
+    os.environ['CACHE_MAX_ENTRIES'] = '0'
+    os.environ.setdefault('SLOW_QUERY_MS', '60000')
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as app_module
+    import datagen
+    with app_module.app.app_context():
+        app_module.init_db()
+    datagen.generate(app_module, args.employees, 45, log=lambda message: None)  # From mid-March 2025
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user_email'] = 'bench@company.in'
+    with app_module.app.app_context():
+        archived = app_module.archive_attendance(date(2025, 4, 1))
+        employee_id = app_module.Employee.query.order_by(app_module.Employee.id).first().employee_id
+    print(f"archived {', '.join(f'{month:%Y-%m}' for month, _ in archived)}")
+
+    response = client.post('/api/attendance/bulk', content_type='application/x-ndjson',
+                           data=f'{{"employee_id": "{employee_id}", "date": "2025-02-14", "clock_in": "09:00"}}')
+    print(f"ingest 2025-02-14: {response.get_json()}")
+
+    failures = []
+
+    def check(name, ok, detail):
+        print(f"{name:<50} {'ok' if ok else 'MISMATCH'}  {detail}")
+        if not ok:
+            failures.append(name)
+
+    def check_range(label):
+        query = 'start=2025-02-01&end=2025-03-31'
+        total = client.get(f'/api/attendance_stats?{query}').get_json()['present']['total']
+        body = client.get(f'/api/attendance?{query}').get_json()
+        records = body['records']
+        february = [record for record in records if record['date'] == '14-02-2025']
+        check(f'{label}: list matches the stats', len(records) == total, f'{len(records)} records, {total} counted')
+        check(f'{label}: list has the February row',
+              [record['employee_id'] for record in february] == [employee_id], f'{len(february)} found')
+        percentage = body['percentages'][body['dates'].index('14-02-2025')]
+        check(f'{label}: chart counts the February row', percentage == 100, f'{percentage}% present')
+        lines = client.get(f'/api/attendance/export?{query}&compress=0').get_data(as_text=True).splitlines()[1:]
+        days = [date(*reversed([int(part) for part in line.split(',')[3].split('-')])) for line in lines]
+        check(f'{label}: export matches the stats', len(lines) == total, f'{len(lines)} rows')
+        check(f'{label}: export is in date order', days == sorted(days), f'first {min(days, default=None)}')
+        return sorted((record['id'], record['status']) for record in records)
+
+    before = check_range('live February')
+    with app_module.app.app_context():
+        archived = app_module.archive_attendance(date(2025, 4, 1))
+    print(f"archived {', '.join(f'{month:%Y-%m}' for month, _ in archived)}")
+    check('February archived', [month for month, _ in archived] == [date(2025, 2, 1)], '')
+    after = check_range('archived February')
+    check('same rows after archiving', before == after, f'{len(after)} rows')
+
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
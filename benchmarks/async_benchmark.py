@@ -0,0 +1,143 @@
+"""Compare the threaded WSGI server with the ASGI async read path under many polling clients.
+
+Generates data with datagen.py into a throwaway SQLite database (or
+uses DATABASE_URL as-is with --no-generate), then starts gunicorn (app:app with
+gunicorn.conf.py) and uvicorn (asgi:application) in turn with the same number
+of worker processes and the response cache disabled. For each --clients value,
+that many keep-alive connections poll the five dashboard APIs back to back for
+--seconds; throughput, p50/p95/p99 latency and failed requests are reported.
+
+    python benchmarks/async_benchmark.py --size small --workers 2 --clients 10 50 200
+    python benchmarks/async_benchmark.py --servers asgi --clients 500 --seconds 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+POLL_URLS = [
+    '/api/attendance_stats?filter=today',
+    '/api/leave_stats',
+    '/api/attendance?filter=today&limit=5',
+    '/api/leave_requests?page=1&per_page=5',
+    '/api/employees?per_page=20',
+]
+SECRET_KEY = 'async-benchmark'
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)] if samples else 0.0
+
+
+def server_command(server, port, workers):
+    if server == 'wsgi':
+        return ['gunicorn', '--config', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+                '--workers', str(workers), '--log-level', 'warning', 'app:app']
+    return ['uvicorn', 'asgi:application', '--port', str(port), '--workers', str(workers),
+            '--log-level', 'warning', '--no-access-log']
+
+
+def wait_until_up(port, cookie, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            request = urllib.request.Request(f'http://127.0.0.1:{port}{POLL_URLS[0]}',
+                                             headers={'Cookie': f'session={cookie}'})
+            urllib.request.urlopen(request, timeout=5).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server on port {port} did not come up')
+
+
+async def poll(port, cookie, deadline, latencies, errors):
+    # One keep-alive connection requesting the dashboard URLs in a loop
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    n = 0
+    try:
+        while time.perf_counter() < deadline:
+            url = POLL_URLS[n % len(POLL_URLS)]
+            n += 1
+            started = time.perf_counter()
+            writer.write(f'GET {url} HTTP/1.1\r\nHost: 127.0.0.1\r\nCookie: session={cookie}\r\n\r\n'.encode())
+            head = await reader.readuntil(b'\r\n\r\n')
+            status = int(head.split(b' ', 2)[1])
+            length = 0
+            for line in head.split(b'\r\n')[1:]:
+                name, _, value = line.partition(b':')
+                if name.strip().lower() == b'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            if status == 200:
+                latencies.append((time.perf_counter() - started) * 1000)
+            else:
+                errors.append(status)
+    except (OSError, asyncio.IncompleteReadError) as e:
+        errors.append(type(e).__name__)
+    finally:
+        writer.close()
+
+
+async def run_clients(port, cookie, clients, seconds):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*(poll(port, cookie, deadline, latencies, errors) for _ in range(clients)))
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', default='small', help='datagen size (small/medium/large)')
+    parser.add_argument('--employees', type=int, help='overrides --size')
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--no-generate', action='store_true', help='benchmark DATABASE_URL as it is')
+    parser.add_argument('--servers', nargs='+', choices=['wsgi', 'asgi'], default=['wsgi', 'asgi'])
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='processes per server')
+    parser.add_argument('--clients', type=int, nargs='+', default=[10, 50, 200], help='concurrent connections')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--port', type=int, default=8050)
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if not args.no_generate:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ['SECRET_KEY'] = SECRET_KEY
+    os.environ['CACHE_MAX_ENTRIES'] = '0'
+    os.environ.setdefault('SLOW_QUERY_MS', '60000')
+    sys.path.insert(0, root)
+    import app as app_module
+    import datagen
+    with app_module.app.app_context():
+        app_module.init_db()
+    if not args.no_generate:
+        datagen.generate(app_module, args.employees or datagen.SIZES[args.size], args.days)
+
+    # A session cookie signed with the servers' SECRET_KEY
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user_email'] = 'bench@company.in'
+    cookie = client.get_cookie('session').value
+
+    print(f"{'server':<6} {'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for server in args.servers:
+        process = subprocess.Popen(server_command(server, args.port, args.workers), cwd=root, env=dict(os.environ))
+        try:
+            wait_until_up(args.port, cookie)
+            for clients in args.clients:
+                latencies, errors = asyncio.run(run_clients(args.port, cookie, clients, args.seconds))
+                print(f"{server:<6} {clients:>7} {len(latencies) / args.seconds:>8.1f} "
+                      f"{statistics.median(latencies) if latencies else 0:>8.1f} {percentile(latencies, 0.95):>8.1f} "
+                      f"{percentile(latencies, 0.99):>8.1f} {len(errors):>7}")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
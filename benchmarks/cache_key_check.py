@@ -0,0 +1,75 @@
+"""Check that GET API queries which differ only in escaping never share a cache entry.
+
+Runs the app against a throwaway SQLite database (via DATABASE_URL) with a small
+generated organisation and the response cache on. It requests
+/api/employees?department=IT%26location%3DBengaluru (one department literally
+named "IT&location=Bengaluru", so no rows) and then the real
+?department=IT&location=Bengaluru filter, in both orders. Each response must
+match what the same query returns with the cache off. Their ETags must differ,
+and sending one query's ETag with the other must not get a 304. Exits non-zero
+on any mismatch.
+
+    python benchmarks/cache_key_check.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+QUERIES = {
+    'escaped': 'department=IT%26location%3DBengaluru',
+    'filter': 'department=IT&location=Bengaluru',
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, default=200)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    os.environ['CACHE_REDIS_URL'] = ''
+    os.environ.setdefault('SLOW_QUERY_MS', '60000')
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as app_module
+    import datagen
+    with app_module.app.app_context():
+        app_module.init_db()
+    datagen.generate(app_module, args.employees, 1, log=lambda message: None)
+    with app_module.app.app_context():
+        expected = {
+            'escaped': 0,
+            'filter': app_module.Employee.query.filter_by(department='IT', location='Bengaluru').count(),
+        }
+
+    failures = []
+    for order in (['escaped', 'filter'], ['filter', 'escaped']):
+        client = app_module.app.test_client()
+        with client.session_transaction() as session:
+            session['user_email'] = 'bench@company.in'
+        with app_module.app.app_context():
+            app_module.get_response_cache().bump({'employee'})  # Start each order with no entries
+        for name in order:
+            total = client.get(f'/api/employees?{QUERIES[name]}').get_json()['total']
+            ok = total == expected[name]
+            print(f"{' then '.join(order):<20} {name:<8} total {total:>4} (expected {expected[name]})  "
+                  f"{'ok' if ok else 'MISMATCH'}")
+            if not ok:
+                failures.append((order, name))
+
+    # The ETag is the cache key, so it must differ too, and one query's ETag must not get a 304 from the other
+    etags = {name: client.get(f'/api/employees?{query}').headers['ETag'] for name, query in QUERIES.items()}
+    status = client.get(f"/api/employees?{QUERIES['filter']}", headers={'If-None-Match': etags['escaped']}).status_code
+    ok = etags['escaped'] != etags['filter'] and status == 200
+    print(f"etags {etags['escaped'][:10]}.. / {etags['filter'][:10]}..; other query's etag -> {status}  "
+          f"{'ok' if ok else 'MISMATCH'}")
+    if not ok:
+        failures.append('etag')
+
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Measure memory and throughput of /api/attendance/export on a large table.
+
+Runs the app against a throwaway SQLite database (via DATABASE_URL), bulk
+inserts synthetic attendance rows and streams the export through the Flask
+test client, comparing it with the old load-everything-then-write approach.
+
+    python benchmarks/export_benchmark.py --rows 1000000
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+
+def seed_attendance(app_module, rows, employees=5000):
+    db, Attendance, Employee = app_module.db, app_module.Attendance, app_module.Employee
+    statuses = ['present', 'late', 'leave', 'remote']
+    start = date(2025, 1, 1)
+    batch = []
+    with app_module.app.app_context():
+        db.session.execute(Employee.__table__.insert(), [{
+            'employee_id': f'BEN{str(i).zfill(6)}',
+            'name': f'Employee {i}',
+            'title': 'Engineer',
+            'email': f'bench{i}@company.in',
+            'department': f'Department {i % 10}',
+            'location': 'Bengaluru',
+            'avatar': 'https://via.placeholder.com/150',
+        } for i in range(employees)])
+        first_id = db.session.query(db.func.min(Employee.id)).filter(Employee.employee_id.like('BEN%')).scalar()
+        for i in range(rows):
+            batch.append({
+                'employee_id': first_id + i % employees,
+                'clock_in': '09:00',
+                'clock_out': '17:30',
+                'status': statuses[i % 4],
+                'date': start + timedelta(days=(i // employees) % 365),
+            })
+            if len(batch) == 50000:
+                db.session.execute(Attendance.__table__.insert(), batch)
+                batch = []
+        if batch:
+            db.session.execute(Attendance.__table__.insert(), batch)
+        db.session.commit()
+
+
+def buffered_export(app_module, start_date, end_date):
+    # The previous implementation: every row as an ORM object, whole CSV in one StringIO
+    Attendance = app_module.Attendance
+    with app_module.app.app_context():
+        records = Attendance.query.options(app_module.db.joinedload(Attendance.employee)).filter(
+            Attendance.date.between(start_date, end_date)
+        ).all()
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(['Employee ID', 'Name', 'Department', 'Date', 'Status', 'Clock In', 'Clock Out'])
+        for record in records:
+            writer.writerow([record.employee.employee_id, record.employee.name, record.employee.department,
+                             record.date.strftime('%d-%m-%Y'), record.status.capitalize(),
+                             record.clock_in or '--:--', record.clock_out or '--:--'])
+        return len(output.getvalue().encode('utf-8'))
+
+
+def streamed_export(client, url, headers=None):
+    response = client.get(url, headers=headers or {}, buffered=False)
+    size = 0
+    for chunk in response.response:
+        size += len(chunk)
+    response.close()
+    return size
+
+
+def measure(label, rows, func):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} {elapsed:>8.2f}s {rows / elapsed:>12,.0f} rows/s "
+          f"{size / 1e6:>9.1f} MB out {peak / 1e6:>9.1f} MB peak")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--skip-buffered', action='store_true', help='skip the old in-memory baseline')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as app_module
+    with app_module.app.app_context():
+        app_module.init_db()
+
+    started = time.perf_counter()
+    seed_attendance(app_module, args.rows)
+    print(f"seeded {args.rows:,} rows in {time.perf_counter() - started:.1f}s")
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user_email'] = 'bench@company.in'
+    url = '/api/attendance/export?start=2025-01-01&end=2025-12-31'
+
+    if not args.skip_buffered:
+        measure('buffered (old)', args.rows, lambda: buffered_export(app_module, date(2025, 1, 1), date(2025, 12, 31)))
+    measure('streamed', args.rows, lambda: streamed_export(client, url))
+    measure('streamed + gzip', args.rows, lambda: streamed_export(client, url, {'Accept-Encoding': 'gzip'}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Hammer the employee and leave request create endpoints from many threads.
+
+Runs the app against a throwaway SQLite database (via DATABASE_URL) and checks
+that every generated employee_id / request_id is unique and that no request
+failed. Exits non-zero on any duplicate or error.
+
+    python benchmarks/id_concurrency_check.py --threads 16 --requests 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=50, help='requests per thread per endpoint')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as app_module
+    with app_module.app.app_context():
+        app_module.init_db()
+
+    employee_ids, request_ids, failures = [], [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(args.threads)
+
+    def worker(worker_id):
+        client = app_module.app.test_client()
+        with client.session_transaction() as session:
+            session['user_email'] = 'bench@company.in'
+        barrier.wait()
+        for i in range(args.requests):
+            employee = client.post('/api/employees', json={
+                'name': f'Thread {worker_id} Employee {i}',
+                'title': 'Engineer',
+                'email': f'thread{worker_id}.employee{i}@company.in',
+                'department': 'IT',
+                'location': 'Bengaluru',
+            })
+            leave = client.post('/api/leave_requests', json={
+                'employee_name': f'Thread {worker_id} Employee {i}',
+                'department': 'IT',
+                'leave_type': 'Casual Leave',
+                'start_date': '2025-06-02',
+                'end_date': '2025-06-03',
+            })
+            with lock:
+                for response, key, collected in ((employee, 'employee_id', employee_ids),
+                                                 (leave, 'request_id', request_ids)):
+                    if response.status_code == 201:
+                        collected.append(response.get_json()[key])
+                    else:
+                        failures.append((response.status_code, response.get_json()))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    duplicates = [value for value, count in Counter(employee_ids + request_ids).items() if count > 1]
+    total = args.threads * args.requests * 2
+    print(f"{total} creates from {args.threads} threads in {elapsed:.2f}s ({total / elapsed:,.0f}/s)")
+    print(f"employee ids: {len(employee_ids)} ({min(employee_ids, default='-')} .. {max(employee_ids, default='-')})")
+    print(f"request ids:  {len(request_ids)} ({min(request_ids, default='-')} .. {max(request_ids, default='-')})")
+    print(f"duplicates: {len(duplicates)}, failures: {len(failures)}")
+    for failure in failures[:5]:
+        print(f"  {failure}")
+    if duplicates or failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Measure bulk clock-event ingestion throughput of POST /api/attendance/bulk.
+
+Runs the app against a throwaway SQLite database (via DATABASE_URL), creates
+synthetic employees and posts clock-in then clock-out batches for several
+days, reporting rows/sec for inserts (clock-in) and upserts (clock-out).
+
+    python benchmarks/ingest_benchmark.py --employees 5000 --days 5 --batch 5000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--batch', type=int, default=5000, help='events per HTTP request')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as app_module
+    with app_module.app.app_context():
+        app_module.init_db()
+
+    with app_module.app.app_context():
+        app_module.db.session.execute(app_module.Employee.__table__.insert(), [{
+            'employee_id': f'BEN{str(i).zfill(6)}',
+            'name': f'Bench Employee {i}',
+            'title': 'Engineer',
+            'email': f'bench{i}@company.in',
+            'department': f'Department {i % 10}',
+            'location': 'Bengaluru',
+            'avatar': 'https://via.placeholder.com/150',
+        } for i in range(args.employees)])
+        app_module.db.session.commit()
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user_email'] = 'bench@company.in'
+
+    def encode(events):
+        if args.format == 'csv':
+            lines = ['employee_id,date,clock_in,clock_out']
+            lines += [f"{e['employee_id']},{e['date']},{e.get('clock_in', '')},{e.get('clock_out', '')}" for e in events]
+            return '\n'.join(lines), 'text/csv'
+        return '\n'.join(json.dumps(e) for e in events), 'application/x-ndjson'
+
+    def run(label, field, clock):
+        events = []
+        for day in range(args.days):
+            current = (date(2025, 5, 1) + timedelta(days=day)).isoformat()
+            for i in range(args.employees):
+                events.append({'employee_id': f'BEN{str(i).zfill(6)}', 'date': current, field: clock(i)})
+        started = time.perf_counter()
+        upserted = 0
+        for offset in range(0, len(events), args.batch):
+            body, content_type = encode(events[offset:offset + args.batch])
+            result = client.post('/api/attendance/bulk', data=body, content_type=content_type).get_json()
+            upserted += result['upserted']
+        elapsed = time.perf_counter() - started
+        print(f"{label:<20} {len(events):>9,} events {elapsed:>7.2f}s {len(events) / elapsed:>10,.0f} rows/s "
+              f"({upserted:,} upserted)")
+
+    run('clock-in (insert)', 'clock_in', lambda i: '09:15' if i % 5 else '09:48')
+    run('clock-out (update)', 'clock_out', lambda i: '18:00')
+
+    with app_module.app.app_context():
+        mismatches = app_module.check_attendance_rollup()
+    print(f"rollup mismatches: {len(mismatches)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Check that bad lines in a bulk attendance ingest are per-line errors, not a failed request.
+
+Runs the app against a throwaway SQLite database (via DATABASE_URL) with a small
+generated organisation and posts one JSON lines body to /api/attendance/bulk
+that mixes valid clock-ins with lines whose employee_id, date or clock_in is a
+number, a line that is not an object and a line that is not JSON. The request
+must succeed, report an error for each bad line only, and upsert every valid
+row. Exits non-zero on any mismatch.
+
+    python benchmarks/ingest_check.py
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from datetime import timedelta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, default=20)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    os.environ['CACHE_MAX_ENTRIES'] = '0'
+    os.environ.setdefault('SLOW_QUERY_MS', '60000')
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as app_module
+    import datagen
+    with app_module.app.app_context():
+        app_module.init_db()
+    datagen.generate(app_module, args.employees, 1, log=lambda message: None)
+    with app_module.app.app_context():
+        Employee = app_module.Employee
+        employees = [employee.employee_id for employee in Employee.query.order_by(Employee.id).limit(3)]
+    day = (app_module.REFERENCE_DATE + timedelta(days=1)).isoformat()
+
+    lines = [
+        json.dumps({'employee_id': employees[0], 'date': day, 'clock_in': '09:00'}),
+        json.dumps({'employee_id': 5, 'date': day, 'clock_in': '09:00'}),
+        json.dumps({'employee_id': employees[1], 'date': 20250501, 'clock_in': '09:00'}),
+        json.dumps({'employee_id': employees[1], 'date': day, 'clock_in': 900}),
+        json.dumps([employees[1], day, '09:00']),
+        'not json',
+        json.dumps({'employee_id': employees[2], 'date': day, 'clock_in': '09:15', 'clock_out': '18:00'}),
+    ]
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user_email'] = 'bench@company.in'
+    response = client.post('/api/attendance/bulk', data='\n'.join(lines), content_type='application/x-ndjson')
+    body = response.get_json()
+    print(f"status {response.status_code}: {body}")
+
+    failures = []
+
+    def check(name, ok, detail):
+        print(f"{name:<36} {'ok' if ok else 'MISMATCH'}  {detail}")
+        if not ok:
+            failures.append(name)
+
+    check('request succeeds', response.status_code == 200, response.status_code)
+    error_lines = [error['line'] for error in (body or {}).get('errors', [])]
+    check('errors for the bad lines only', error_lines == [2, 3, 4, 5, 6], error_lines)
+    check('valid lines upserted', (body or {}).get('upserted') == 2, (body or {}).get('upserted'))
+    with app_module.app.app_context():
+        stored = sorted(employee_id for employee_id, in app_module.db.session.query(Employee.employee_id).join(
+            app_module.Attendance, app_module.Attendance.employee_id == Employee.id
+        ).filter(app_module.Attendance.date == app_module.REFERENCE_DATE + timedelta(days=1)))
+    check('valid rows stored', stored == sorted([employees[0], employees[2]]), stored)
+
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
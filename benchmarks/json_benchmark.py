@@ -0,0 +1,150 @@
+"""Measure rows/sec of the /api/attendance and /api/employees list payloads.
+
+Runs the app against a throwaway SQLite database (via DATABASE_URL) with the
+response cache disabled, seeds synthetic employees and a month of attendance,
+and compares building the row list from ORM objects (the previous code) with
+column tuples, under both the stdlib and orjson JSON providers. The full
+endpoints, which also run counts and facets, are timed separately.
+
+    python benchmarks/json_benchmark.py --employees 5000 --days 30 --repeat 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+
+def seed(app_module, employees, days):
+    db, Attendance, Employee = app_module.db, app_module.Attendance, app_module.Employee
+    statuses = ['present', 'late', 'leave', 'remote']
+    with app_module.app.app_context():
+        db.session.execute(Employee.__table__.insert(), [{
+            'employee_id': f'BEN{str(i).zfill(6)}',
+            'name': f'Bench Employee {i}',
+            'title': 'Engineer',
+            'email': f'bench{i}@company.in',
+            'department': f'Department {i % 10}',
+            'location': 'Bengaluru',
+            'avatar': 'https://via.placeholder.com/150',
+        } for i in range(employees)])
+        first_id = db.session.query(db.func.min(Employee.id)).filter(Employee.employee_id.like('BEN%')).scalar()
+        end = app_module.REFERENCE_DATE
+        for day in range(days):
+            db.session.execute(Attendance.__table__.insert(), [{
+                'employee_id': first_id + i,
+                'clock_in': '09:00',
+                'clock_out': '17:30',
+                'status': statuses[(i + day) % 4],
+                'date': end - timedelta(days=day),
+            } for i in range(employees)])
+        db.session.commit()
+
+
+def orm_attendance(app_module, start_date, end_date):
+    # The previous implementation: Attendance objects with their employee, one dict each
+    Attendance = app_module.Attendance
+    records = Attendance.query.join(Attendance.employee).options(
+        app_module.contains_eager(Attendance.employee)
+    ).filter(Attendance.date.between(start_date, end_date)).all()
+    return app_module.jsonify({'records': [{
+        'id': record.id,
+        'employee_id': record.employee.employee_id,
+        'name': record.employee.name,
+        'date': record.date.strftime('%d-%m-%Y'),
+        'status': record.status.capitalize(),
+        'image': record.employee.avatar
+    } for record in records]})
+
+
+def orm_employees(app_module, per_page):
+    Employee = app_module.Employee
+    employees = Employee.query.order_by(Employee.name, Employee.id).limit(per_page).all()
+    return app_module.jsonify({'employees': [{
+        'id': emp.id,
+        'employee_id': emp.employee_id,
+        'name': emp.name,
+        'title': emp.title,
+        'email': emp.email,
+        'department': emp.department,
+        'location': emp.location,
+        'avatar': emp.avatar
+    } for emp in employees]})
+
+
+def tuple_employees(app_module, per_page):
+    Employee = app_module.Employee
+    employees = app_module.db.session.query(*app_module.EMPLOYEE_COLUMNS).order_by(
+        Employee.name, Employee.id
+    ).limit(per_page).all()
+    return app_module.jsonify({'employees': [dict(zip(app_module.EMPLOYEE_FIELDS, emp)) for emp in employees]})
+
+
+def measure(label, rows, repeat, func):
+    func()  # Warm up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"{label:<40} {elapsed * 1000:>9.1f} ms/request {rows / elapsed:>12,.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    os.environ['CACHE_MAX_ENTRIES'] = '0'
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as app_module
+    from flask.json.provider import DefaultJSONProvider
+    with app_module.app.app_context():
+        app_module.init_db()
+
+    seed(app_module, args.employees, args.days)
+    app = app_module.app
+    providers = {'stdlib': DefaultJSONProvider(app)}
+    if isinstance(app.json, app_module.OrjsonProvider):
+        providers['orjson'] = app.json
+    else:
+        print("orjson is not installed; skipping the orjson runs")
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_email'] = 'bench@company.in'
+    start_date = app_module.REFERENCE_DATE - timedelta(days=args.days - 1)
+    attendance_url = f'/api/attendance?start={start_date}&end={app_module.REFERENCE_DATE}'
+    attendance_rows = len(client.get(attendance_url).get_json()['records'])
+    employees_url = '/api/employees?per_page=100'
+    employee_rows = len(client.get(employees_url).get_json()['employees'])
+
+    def in_request(func):
+        def run():
+            with app.test_request_context():
+                func().get_data()
+        return run
+
+    for name, provider in providers.items():
+        app.json = provider
+        measure(f'attendance orm objects ({name})', attendance_rows, args.repeat,
+                in_request(lambda: orm_attendance(app_module, start_date, app_module.REFERENCE_DATE)))
+        measure(f'attendance column tuples ({name})', attendance_rows, args.repeat,
+                in_request(lambda: app_module.jsonify({'records': app_module.attendance_records(
+                    start_date, app_module.REFERENCE_DATE)})))
+        measure(f'GET /api/attendance ({name})', attendance_rows, args.repeat,
+                lambda: client.get(attendance_url).get_data())
+        measure(f'employees orm objects ({name})', employee_rows, args.repeat * 20,
+                in_request(lambda: orm_employees(app_module, 100)))
+        measure(f'employees column tuples ({name})', employee_rows, args.repeat * 20,
+                in_request(lambda: tuple_employees(app_module, 100)))
+        measure(f'GET /api/employees ({name})', employee_rows, args.repeat * 20,
+                lambda: client.get(employees_url).get_data())
+
+
+if __name__ == '__main__':
+    main()
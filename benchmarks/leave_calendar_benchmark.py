@@ -0,0 +1,117 @@
+"""Measure /api/leave_calendar month views and leave overlap checks at scale.
+
+Runs the app against a throwaway SQLite database (via DATABASE_URL) with the
+response cache disabled, seeds synthetic employees with several approved and
+pending leaves each across a year, plus one long rejected leave that must not
+widen the scans, then times a month view for every month and the overlap check
+run by POST /api/leave_requests.
+
+    python benchmarks/leave_calendar_benchmark.py --employees 10000 --leaves 6
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+
+def seed(app_module, employees, leaves_per_employee):
+    db, Employee, LeaveRequest = app_module.db, app_module.Employee, app_module.LeaveRequest
+    random.seed(42)
+    with app_module.app.app_context():
+        db.session.execute(Employee.__table__.insert(), [{
+            'employee_id': f'BEN{str(i).zfill(6)}',
+            'name': f'Bench Employee {i}',
+            'title': 'Engineer',
+            'email': f'bench{i}@company.in',
+            'department': f'Department {i % 10}',
+            'location': 'Bengaluru',
+            'avatar': 'https://via.placeholder.com/150',
+        } for i in range(employees)])
+        first_id = db.session.query(db.func.min(Employee.id)).filter(Employee.employee_id.like('BEN%')).scalar()
+        rows = []
+        for i in range(employees):
+            # Non-overlapping leaves spread over 2025, one per slot of the year
+            slot = 365 // leaves_per_employee
+            for n in range(leaves_per_employee):
+                start = date(2025, 1, 1) + timedelta(days=n * slot + random.randrange(slot - 5))
+                days = random.randint(1, 5)
+                rows.append({
+                    'request_id': f'BL{len(rows):07d}',
+                    'employee_id': first_id + i,
+                    'leave_type': 'Casual Leave',
+                    'start_date': start,
+                    'end_date': start + timedelta(days=days - 1),
+                    'days': days,
+                    'status': 'pending' if n % 3 == 0 else 'approved',
+                    'created_at': datetime(2025, 1, 1),
+                })
+        rows.append({
+            'request_id': f'BL{len(rows):07d}',
+            'employee_id': first_id,
+            'leave_type': 'Sabbatical',
+            'start_date': date(2025, 1, 1),
+            'end_date': date(2025, 12, 31),
+            'days': 365,
+            'status': 'rejected',
+            'created_at': datetime(2025, 1, 1),
+        })
+        db.session.execute(LeaveRequest.__table__.insert(), rows)
+        db.session.commit()
+        return first_id, len(rows)
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    print(f"{label:<28} p50 {statistics.median(samples):>7.2f} ms  "
+          f"p95 {samples[max(int(len(samples) * 0.95) - 1, 0)]:>7.2f} ms  max {samples[-1]:>7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, default=10000)
+    parser.add_argument('--leaves', type=int, default=6, help='leave requests per employee')
+    parser.add_argument('--checks', type=int, default=2000, help='overlap checks to time')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    os.environ['CACHE_MAX_ENTRIES'] = '0'
+    os.environ.setdefault('SLOW_QUERY_MS', '60000')
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as app_module
+    with app_module.app.app_context():
+        app_module.init_db()
+
+    first_id, rows = seed(app_module, args.employees, args.leaves)
+    print(f"{args.employees:,} employees, {rows:,} leave requests")
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user_email'] = 'bench@company.in'
+    for label, params in (('month view', ''), ('month view, one department', '&department=Department%203')):
+        samples = []
+        for month in range(1, 13):
+            url = f'/api/leave_calendar?from=2025-{month:02d}-01&status=all{params}'
+            started = time.perf_counter()
+            response = client.get(url)
+            samples.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.get_json()
+        report(label, samples)
+
+    samples = []
+    with app_module.app.app_context():
+        for _ in range(args.checks):
+            start = date(2025, 1, 1) + timedelta(days=random.randrange(360))
+            started = time.perf_counter()
+            app_module.overlapping_leave_requests(first_id + random.randrange(args.employees), start,
+                                                  start + timedelta(days=2))
+            samples.append((time.perf_counter() - started) * 1000)
+    report('overlap check', samples)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Measure login throughput and its effect on concurrent dashboard API latency.
+
+For each PASSWORD_HASH_WORKERS value, runs the app in a fresh process against
+a throwaway SQLite database and reports dashboard API latency while idle and
+while login threads hammer POST /login, plus logins/sec.
+
+    python benchmarks/login_benchmark.py --hash-workers 1 2 8 --login-threads 16
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+DASHBOARD_URLS = [
+    '/api/attendance_stats',
+    '/api/leave_stats',
+    '/api/attendance?filter=today&limit=5',
+    '/api/leave_requests?page=1&per_page=5',
+]
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[max(int(len(samples) * fraction) - 1, 0)] if samples else 0.0
+
+
+def run_single(args):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as app_module
+    with app_module.app.app_context():
+        app_module.init_db()
+
+    client = app_module.app.test_client()
+    client.post('/signup', data={'email': 'bench@company.in', 'password': 'bench-password'})
+
+    def dashboard_latencies(stop):
+        dashboard = app_module.app.test_client()
+        with dashboard.session_transaction() as session:
+            session['user_email'] = 'bench@company.in'
+        samples = []
+        while not stop.is_set():
+            started = time.perf_counter()
+            for url in DASHBOARD_URLS:
+                dashboard.get(url)
+            samples.append((time.perf_counter() - started) * 1000)
+        return samples
+
+    def measure(login_threads):
+        stop = threading.Event()
+        logins = []
+        samples = []
+        lock = threading.Lock()
+
+        def login_worker():
+            login_client = app_module.app.test_client()
+            while not stop.is_set():
+                response = login_client.post('/login', data={'email': 'bench@company.in', 'password': 'bench-password'})
+                with lock:
+                    logins.append(response.headers.get('Location', '').endswith('/dashboard'))
+
+        def dashboard_worker():
+            samples.extend(dashboard_latencies(stop))
+
+        threads = [threading.Thread(target=login_worker) for _ in range(login_threads)]
+        threads.append(threading.Thread(target=dashboard_worker))
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return {
+            'logins_per_sec': sum(logins) / args.seconds,
+            'rejected_logins': logins.count(False),
+            'dashboard_p50_ms': statistics.median(samples) if samples else 0.0,
+            'dashboard_p95_ms': percentile(samples, 0.95),
+        }
+
+    print(json.dumps({'idle': measure(0), 'storm': measure(args.login_threads)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hash-workers', type=int, nargs='+', default=[1, 2, os.cpu_count() or 2])
+    parser.add_argument('--login-threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--single', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        run_single(args)
+        return
+
+    print(f"{'hash workers':>12} {'logins/s':>9} {'idle p50':>9} {'idle p95':>9} {'storm p50':>10} {'storm p95':>10}")
+    for workers in args.hash_workers:
+        env = dict(os.environ)
+        env['PASSWORD_HASH_WORKERS'] = str(workers)
+        env['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--single',
+             '--login-threads', str(args.login_threads), '--seconds', str(args.seconds)],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        idle, storm = result['idle'], result['storm']
+        print(f"{workers:>12} {storm['logins_per_sec']:>9.1f} {idle['dashboard_p50_ms']:>8.1f}ms "
+              f"{idle['dashboard_p95_ms']:>8.1f}ms {storm['dashboard_p50_ms']:>9.1f}ms {storm['dashboard_p95_ms']:>9.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""Run app.py under gunicorn with several workers and mix concurrent reads and writes.
+
+Sets up DATABASE_URL, or a throwaway SQLite file when unset, with flask init-db
+and seed, starts gunicorn (gunicorn.conf.py) on a free port, signs up a user and
+then runs reader and writer threads over HTTP. Reports request rates, latency
+and every failed request (e.g. "database is locked"); exits non-zero on failures.
+
+    python benchmarks/multiworker_check.py --workers 4 --seconds 10
+    DATABASE_URL=postgresql://localhost/ems python benchmarks/multiworker_check.py
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+READ_URLS = [
+    '/api/attendance_stats?filter=month',
+    '/api/attendance?filter=week&limit=20',
+    '/api/leave_requests?page=1&per_page=10',
+    '/api/leave_stats',
+    '/api/employees?per_page=20',
+]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(base, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(base + '/api/employees', timeout=1)
+            return
+        except urllib.error.HTTPError:
+            return  # Any HTTP response means a worker is serving
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise SystemExit('gunicorn did not start')
+
+
+def logged_in_opener(base):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    credentials = urllib.parse.urlencode({'email': 'loadtest@company.in', 'password': 'loadtest'}).encode()
+    for path in ('/signup', '/login'):
+        try:
+            opener.open(base + path, credentials)
+        except urllib.error.HTTPError:
+            pass  # The redirect target may fail to render; the session cookie is already set
+    return opener
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=16)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'multiworker.db')}")
+    port = free_port()
+    env.update({'BIND': f'127.0.0.1:{port}', 'WEB_CONCURRENCY': str(args.workers)})
+    for command in ('init-db', 'seed'):  # The writers clock in the demo employees EMP001-EMP012
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', command], cwd=ROOT, env=env,
+                       stdout=subprocess.DEVNULL, check=True)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base = f'http://127.0.0.1:{port}'
+    latencies = {'read': [], 'write': []}
+    failures = []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def record(kind, started, error=None):
+        with lock:
+            latencies[kind].append((time.perf_counter() - started) * 1000)
+            if error:
+                failures.append(f'{kind}: {error}')
+
+    def reader(n):
+        i = n
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                opener.open(base + READ_URLS[i % len(READ_URLS)]).read()
+                record('read', started)
+            except Exception as e:
+                record('read', started, e)
+            i += 1
+
+    def writer(n):
+        i = 0
+        while not stop.is_set():
+            body = '\n'.join(json.dumps({
+                'employee_id': f'EMP{str(emp).zfill(3)}',
+                'date': f'2025-04-{(i % 28) + 1:02d}',
+                'clock_in': '09:10' if (emp + i) % 3 else '09:50',
+            }) for emp in range(1, 13)).encode()
+            started = time.perf_counter()
+            try:
+                request = urllib.request.Request(base + '/api/attendance/bulk', body,
+                                                 {'Content-Type': 'application/x-ndjson'})
+                result = json.loads(opener.open(request).read())
+                record('write', started, result['errors'] or None)
+            except Exception as e:
+                record('write', started, e)
+            i += 1
+
+    try:
+        wait_until_up(base)
+        # One shared session: password hashing on login is not what this check measures
+        opener = logged_in_opener(base)
+        threads = [threading.Thread(target=reader, args=(n,)) for n in range(args.readers)]
+        threads += [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{args.workers} workers, {args.readers} readers, {args.writers} writers, {args.seconds:.0f}s "
+          f"on {env['DATABASE_URL'].split(':')[0]}")
+    for kind, samples in latencies.items():
+        if samples:
+            samples.sort()
+            print(f"{kind:<6} {len(samples) / args.seconds:>8.0f} req/s  p50 {statistics.median(samples):>7.1f} ms  "
+                  f"p95 {samples[int(len(samples) * 0.95) - 1]:>7.1f} ms")
+    print(f"failures: {len(failures)}")
+    for failure in failures[:5]:
+        print(f"  {failure}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
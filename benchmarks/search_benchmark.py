@@ -0,0 +1,113 @@
+"""Compare leave request search latency: LIKE '%term%' scan vs the FTS5 index.
+
+Builds a throwaway SQLite database mirroring the employee/leave_request tables
+and the employee_fts/leave_request_fts triggers from app.py, then times both
+query paths.
+
+    python benchmarks/search_benchmark.py --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+FIRST_NAMES = ['Aarav', 'Priya', 'Rohan', 'Ananya', 'Vikram', 'Sneha', 'Rahul', 'Meena',
+               'Amit', 'Riya', 'Karan', 'Pooja', 'Ishaan', 'Kavya', 'Arjun', 'Diya']
+LAST_NAMES = ['Sharma', 'Patel', 'Gupta', 'Reddy', 'Singh', 'Nair', 'Verma', 'Kumari',
+              'Joshi', 'Malhotra', 'Mehra', 'Desai', 'Iyer', 'Rao', 'Kapoor', 'Bose']
+DEPARTMENTS = ['IT', 'Product Management', 'Human Resources', 'Marketing', 'Analytics',
+               'Finance', 'Operations', 'Sales', 'Customer Service', 'Project Management']
+LEAVE_TYPES = ['Diwali Leave', 'Personal Leave', 'Holi Leave', 'Sick Leave', 'Annual Leave',
+               'Casual Leave', 'Republic Day', 'Raksha Bandhan', 'Ganesh Chaturthi']
+SEARCHES = ['Priya', 'sharma', 'LR0042', 'Mark', 'kav', 'Customer']
+
+EMPLOYEES = 5000
+
+SCHEMA = [
+    "CREATE TABLE employee (id INTEGER PRIMARY KEY, employee_id TEXT UNIQUE, name TEXT, email TEXT, "
+    "title TEXT, department TEXT, location TEXT)",
+    "CREATE TABLE leave_request (id INTEGER PRIMARY KEY, request_id TEXT UNIQUE, "
+    "employee_id INTEGER REFERENCES employee(id), leave_type TEXT, created_at TEXT)",
+    "CREATE INDEX ix_leave_request_employee_id ON leave_request (employee_id)",
+    "CREATE VIRTUAL TABLE employee_fts USING fts5(name, email, title, department, "
+    "content='employee', content_rowid='id', prefix='2 3')",
+    "CREATE TRIGGER employee_fts_ai AFTER INSERT ON employee BEGIN "
+    "INSERT INTO employee_fts(rowid, name, email, title, department) "
+    "VALUES (new.id, new.name, new.email, new.title, new.department); END",
+    "CREATE VIRTUAL TABLE leave_request_fts USING fts5(request_id, "
+    "content='leave_request', content_rowid='id', prefix='2 3')",
+    "CREATE TRIGGER leave_request_fts_ai AFTER INSERT ON leave_request BEGIN "
+    "INSERT INTO leave_request_fts(rowid, request_id) VALUES (new.id, new.request_id); END",
+]
+
+LIKE_SQL = ("SELECT l.id FROM leave_request l JOIN employee e ON e.id = l.employee_id "
+            "WHERE e.name LIKE :term OR l.request_id LIKE :term OR e.department LIKE :term "
+            "ORDER BY l.created_at DESC LIMIT 10")
+FTS_SQL = ("SELECT l.id FROM leave_request l JOIN employee e ON e.id = l.employee_id "
+           "WHERE l.id IN (SELECT rowid FROM leave_request_fts WHERE leave_request_fts MATCH :query) "
+           "OR l.employee_id IN (SELECT rowid FROM employee_fts WHERE employee_fts MATCH :employee_query) "
+           "ORDER BY l.created_at DESC LIMIT 10")
+
+
+def build_database(path, rows):
+    connection = sqlite3.connect(path)
+    for statement in SCHEMA:
+        connection.execute(statement)
+    rng = random.Random(42)
+    employees = []
+    for i in range(1, EMPLOYEES + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        employees.append((i, f'EMP{str(i).zfill(3)}', f'{first} {last}', f'{first}.{last}{i}@company.in'.lower(),
+                          'Engineer', rng.choice(DEPARTMENTS), 'Bengaluru'))
+    connection.executemany("INSERT INTO employee VALUES (?, ?, ?, ?, ?, ?, ?)", employees)
+    batch = []
+    for i in range(1, rows + 1):
+        batch.append((
+            i,
+            f'LR{str(i).zfill(7)}',
+            rng.randint(1, EMPLOYEES),
+            rng.choice(LEAVE_TYPES),
+            f'2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T09:00:00',
+        ))
+        if len(batch) == 50000:
+            connection.executemany("INSERT INTO leave_request VALUES (?, ?, ?, ?, ?)", batch)
+            batch = []
+    if batch:
+        connection.executemany("INSERT INTO leave_request VALUES (?, ?, ?, ?, ?)", batch)
+    connection.commit()
+    return connection
+
+
+def time_query(connection, sql, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        connection.execute(sql, params).fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'term':>10} {'like ms':>10} {'fts ms':>10} {'speedup':>8}")
+    for rows in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            connection = build_database(os.path.join(directory, 'bench.db'), rows)
+            for term in SEARCHES:
+                like_ms = time_query(connection, LIKE_SQL, {'term': f'%{term}%'}, args.repeat)
+                fts_ms = time_query(connection, FTS_SQL, {'query': f'"{term}"*',
+                                                          'employee_query': f'{{name department}} : ("{term}"*)'},
+                                    args.repeat)
+                print(f"{rows:>10} {term:>10} {like_ms:>10.2f} {fts_ms:>10.2f} {like_ms / fts_ms:>7.1f}x")
+            connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""Hold thousands of idle /api/stream subscribers on the ASGI server and time event fan-out.
+
+Sets up a throwaway SQLite database with the demo data, starts uvicorn
+(asgi:application, one worker) and opens --subscribers event streams. Once all
+are connected it changes attendance statuses through PUT /api/attendance/<id>
+and reports how long each event took to reach every subscriber, plus the
+server's thread count and RSS while idle and after the run. Finally one client
+reconnects with the first event's id as Last-Event-ID and must be sent all
+the later events.
+
+    python benchmarks/stream_benchmark.py --subscribers 2000 --events 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SECRET_KEY = 'stream-benchmark'
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)] if samples else 0.0
+
+
+def process_status(pid):
+    # Threads and resident memory of the server process, from /proc (Linux)
+    fields = {}
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            name, _, value = line.partition(':')
+            fields[name] = value.strip()
+    return f"{fields['Threads']} threads, {int(fields['VmRSS'].split()[0]) / 1024:.0f} MB RSS"
+
+
+async def subscribe(port, cookie, received, connected, last_event_id=None):
+    # Record the arrival time of every event id on one stream until cancelled
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    resume = f'Last-Event-ID: {last_event_id}\r\n' if last_event_id else ''
+    writer.write(f'GET /api/stream HTTP/1.1\r\nHost: 127.0.0.1\r\nCookie: session={cookie}\r\n{resume}\r\n'.encode())
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            if line.startswith(b'retry:'):
+                connected.release()
+            elif line.startswith(b'id: '):
+                received.append((line[4:].strip().decode(), time.perf_counter()))
+    finally:
+        writer.close()
+
+
+def put_status(port, cookie, attendance_id, status):
+    request = urllib.request.Request(f'http://127.0.0.1:{port}/api/attendance/{attendance_id}', method='PUT',
+                                     data=f'{{"status": "{status}"}}'.encode(),
+                                     headers={'Content-Type': 'application/json', 'Cookie': f'session={cookie}'})
+    urllib.request.urlopen(request).read()
+
+
+async def run(args, port, cookie, server):
+    loop = asyncio.get_running_loop()
+    connected = asyncio.Semaphore(0)
+    streams = [[] for _ in range(args.subscribers)]
+    started = time.perf_counter()
+    tasks = [asyncio.ensure_future(subscribe(port, cookie, received, connected)) for received in streams]
+    for _ in streams:
+        await connected.acquire()
+    print(f"{args.subscribers} subscribers connected in {time.perf_counter() - started:.1f}s; "
+          f"server idle: {process_status(server.pid)}")
+
+    sent = []
+    for n in range(args.events):
+        sent.append(time.perf_counter())
+        await loop.run_in_executor(None, put_status, port, cookie, n % 12 + 1, ['late', 'present'][n % 2])
+        await asyncio.sleep(args.interval)
+    await asyncio.sleep(1)
+
+    latencies = []
+    complete = 0
+    for received in streams:
+        complete += len(received) == args.events
+        latencies.extend((arrived - sent[n]) * 1000 for n, (_, arrived) in enumerate(received[:args.events]))
+    print(f"{complete}/{args.subscribers} subscribers received all {args.events} events; delivery after the write "
+          f"p50 {statistics.median(latencies):.1f} ms, p95 {percentile(latencies, 0.95):.1f} ms, "
+          f"max {max(latencies):.1f} ms")
+    print(f"server after the run: {process_status(server.pid)}")
+
+    resumed = []
+    tasks.append(asyncio.ensure_future(subscribe(port, cookie, resumed, connected, streams[0][0][0])))
+    await connected.acquire()
+    await asyncio.sleep(0.5)
+    print(f"resume from the first event id: {len(resumed)} events replayed (expected {args.events - 1})")
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subscribers', type=int, default=2000)
+    parser.add_argument('--events', type=int, default=20)
+    parser.add_argument('--interval', type=float, default=0.1, help='seconds between writes')
+    parser.add_argument('--port', type=int, default=8060)
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ['SECRET_KEY'] = SECRET_KEY
+    sys.path.insert(0, ROOT)
+    import app as app_module
+    with app_module.app.app_context():
+        app_module.init_db()
+        app_module.seed_demo_data()
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user_email'] = 'bench@company.in'
+    cookie = client.get_cookie('session').value
+
+    server = subprocess.Popen(['uvicorn', 'asgi:application', '--port', str(args.port), '--log-level', 'warning',
+                               '--no-access-log'], cwd=ROOT, env=dict(os.environ))
+    try:
+        for _ in range(150):
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{args.port}/api/nope')
+            except urllib.error.HTTPError:
+                break
+            except OSError:
+                time.sleep(0.2)
+        asyncio.run(run(args, args.port, cookie, server))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main()
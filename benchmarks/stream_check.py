@@ -0,0 +1,126 @@
+"""Check that the batch and bulk attendance and leave APIs publish /api/stream events.
+
+Runs the app against a throwaway SQLite database (via DATABASE_URL) with a small
+generated organisation. It makes a batch attendance update, a batch delete, a
+bulk clock-in ingest and a batch leave approval, then reads what each one
+published from /api/stream, resuming from the Last-Event-ID seen before the
+write, and checks the event types, ids and deltas. A batch of more than
+STREAM_BATCH_EVENTS rows must publish a single reset event instead. Exits
+non-zero on any mismatch.
+
+    python benchmarks/stream_check.py
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from datetime import timedelta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, default=50)
+    parser.add_argument('--batch-events', type=int, default=10, help='STREAM_BATCH_EVENTS for the run')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    os.environ['STREAM_BATCH_EVENTS'] = str(args.batch_events)
+    os.environ['STREAM_WSGI_SECONDS'] = '1'  # Each read below returns once the stream closes
+    os.environ['CACHE_REDIS_URL'] = ''
+    os.environ.setdefault('SLOW_QUERY_MS', '60000')
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app as app_module
+    import datagen
+    with app_module.app.app_context():
+        app_module.init_db()
+    datagen.generate(app_module, args.employees, 30, log=lambda message: None)
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user_email'] = 'bench@company.in'
+    with app_module.app.app_context():
+        hub = app_module.get_change_hub()
+        last_event_id = [f'{hub.stream}:{hub.last_id}']
+        Attendance, LeaveRequest = app_module.Attendance, app_module.LeaveRequest
+        records = Attendance.query.filter(Attendance.status != 'remote').order_by(Attendance.id).limit(
+            args.batch_events * 3
+        ).all()
+        attendance = {record.id: (record.status, record.date, record.employee) for record in records}
+        pending = [leave.id for leave in LeaveRequest.query.filter_by(status='pending').limit(3)]
+        reference_date = app_module.REFERENCE_DATE
+
+    # Events published since the last read, as (type, data)
+    def read_events():
+        response = client.get('/api/stream', headers={'Last-Event-ID': last_event_id[0]})
+        events = []
+        for frame in response.get_data(as_text=True).split('\n\n'):
+            fields = dict(line.split(': ', 1) for line in frame.splitlines() if ': ' in line)
+            if 'event' in fields:
+                last_event_id[0] = fields['id']
+                events.append((fields['event'], json.loads(fields['data'])))
+        return events
+
+    failures = []
+
+    def check(name, events, expected):
+        ok = events == expected
+        print(f"{name:<28} {len(events):>3} events  {'ok' if ok else 'MISMATCH'}")
+        if not ok:
+            failures.append((name, events, expected))
+
+    ids = list(attendance)
+    updated = ids[:3]
+    client.put('/api/attendance/batch', json={'ids': updated, 'status': 'remote'})
+    check('attendance batch update', read_events(), [('attendance.updated', {
+        'id': id, 'status': 'remote', 'date': attendance[id][1].isoformat(),
+        'department': attendance[id][2].department, 'delta': {attendance[id][0]: -1, 'remote': 1}
+    }) for id in updated])
+
+    deleted = ids[3:5]
+    client.delete('/api/attendance/batch', json={'ids': deleted})
+    check('attendance batch delete', read_events(), [('attendance.deleted', {
+        'id': id, 'status': None, 'date': attendance[id][1].isoformat(),
+        'department': attendance[id][2].department, 'delta': {attendance[id][0]: -1}
+    }) for id in deleted])
+
+    existing = attendance[ids[5]]
+    new_day = reference_date + timedelta(days=1)
+    body = '\n'.join(json.dumps(event) for event in [
+        {'employee_id': existing[2].employee_id, 'date': existing[1].isoformat(), 'clock_in': '08:00'},
+        {'employee_id': existing[2].employee_id, 'date': new_day.isoformat(), 'clock_in': '09:00'},
+    ])
+    client.post('/api/attendance/bulk', data=body, content_type='application/x-ndjson')
+    events = read_events()
+    with app_module.app.app_context():
+        new_id = Attendance.query.filter_by(employee_id=existing[2].id, date=new_day).one().id
+    check('bulk clock-in ingest', events, [
+        ('attendance.updated', {
+            'id': ids[5], 'status': 'present', 'date': existing[1].isoformat(), 'department': existing[2].department,
+            'delta': {} if existing[0] == 'present' else {existing[0]: -1, 'present': 1}
+        }),
+        ('attendance.created', {
+            'id': new_id, 'status': 'present', 'date': new_day.isoformat(), 'department': existing[2].department,
+            'delta': {'present': 1}
+        }),
+    ])
+
+    client.put('/api/leave_requests/batch', json={'ids': pending, 'status': 'approved'})
+    events = read_events()
+    check('leave batch approval', [(event_type, data['id'], data['status'], data['delta'].get('pending_requests'))
+                                   for event_type, data in events],
+          [('leave_request.updated', id, 'approved', -1) for id in pending])
+
+    large = ids[6:6 + args.batch_events + 1]
+    client.put('/api/attendance/batch', json={'ids': large, 'status': 'remote'})
+    check(f'batch over {args.batch_events} rows', read_events(), [('reset', {})])
+
+    for name, events, expected in failures:
+        print(f"{name}:\n  got      {events}\n  expected {expected}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
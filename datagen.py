@@ -0,0 +1,196 @@
+"""Generate a synthetic organisation for load tests: employees, attendance and leave.
+
+Bulk inserts employees spread over departments and locations, a weekday
+attendance row per employee for the period ending at REFERENCE_DATE, and
+non-overlapping leave requests per employee (approved leave days show up as
+'leave' attendance). Output is reproducible for a given --seed. Afterwards the
+attendance rollup, leave ledger and id sequences are rebuilt, so the data looks
+exactly as if it had been entered through the API. `flask seed --size` and the
+benchmarks in benchmarks/ call generate() from here.
+
+Uses DATABASE_URL, or a throwaway SQLite file (printed) when it is unset.
+
+    python datagen.py --size medium
+    DATABASE_URL=sqlite:////tmp/ems.db python datagen.py --employees 2500 --days 90
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+SIZES = {'small': 1000, 'medium': 10000, 'large': 100000}
+DEPARTMENTS = [
+    ('IT', 20), ('Operations', 14), ('Sales', 14), ('Customer Service', 12), ('Finance', 8), ('Marketing', 8),
+    ('Analytics', 7), ('Human Resources', 6), ('Product Management', 6), ('Project Management', 5),
+]
+LOCATIONS = ['Bengaluru', 'Mumbai', 'Delhi', 'Hyderabad', 'Pune', 'Chennai', 'Ahmedabad', 'Kolkata', 'Gurugram',
+             'Noida', 'Jaipur']
+TITLES = ['Engineer', 'Senior Engineer', 'Analyst', 'Manager', 'Associate', 'Specialist', 'Lead', 'Consultant']
+FIRST_NAMES = ['Aarav', 'Priya', 'Rohan', 'Ananya', 'Vikram', 'Sneha', 'Rahul', 'Meena', 'Amit', 'Riya', 'Karan',
+               'Pooja', 'Arjun', 'Divya', 'Nikhil', 'Kavya', 'Siddharth', 'Isha', 'Manish', 'Neha']
+LAST_NAMES = ['Sharma', 'Patel', 'Mehra', 'Reddy', 'Singh', 'Nair', 'Verma', 'Kumari', 'Joshi', 'Malhotra', 'Gupta',
+              'Iyer', 'Kapoor', 'Das', 'Rao', 'Bose', 'Chopra', 'Menon', 'Pillai', 'Saxena']
+LEAVE_TYPES = [('Casual Leave', 35), ('Sick Leave', 30), ('Annual Leave', 20), ('Personal Leave', 10),
+               ('Diwali Leave', 5)]
+LEAVE_LENGTHS = [(1, 40), (2, 25), (3, 15), (4, 10), (5, 10)]
+BATCH_SIZE = 50000
+
+
+def weighted(rng, choices):
+    return rng.choices([value for value, _ in choices], [weight for _, weight in choices])[0]
+
+
+def next_number(db, column, prefix):
+    highest = db.session.query(
+        db.func.max(db.cast(db.func.substr(column, len(prefix) + 1), db.Integer))
+    ).filter(column.like(f'{prefix}%')).scalar()
+    return (highest or 0) + 1
+
+
+def insert_batches(db, table, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            db.session.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+
+
+def generate(app_module, employees, days=365, leaves_per_year=8, seed=42, log=print):
+    """Insert the synthetic org into app_module's database and return row counts."""
+    db, Employee, Attendance, LeaveRequest = (app_module.db, app_module.Employee, app_module.Attendance,
+                                              app_module.LeaveRequest)
+    rng = random.Random(seed)
+    end = app_module.REFERENCE_DATE
+    start = end - timedelta(days=days - 1)
+    counts = {}
+
+    with app_module.app.app_context():
+        started = time.perf_counter()
+        first_number = next_number(db, Employee.employee_id, 'EMP')
+        employee_rows = []
+        for i in range(employees):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            number = first_number + i
+            employee_rows.append({
+                'employee_id': f'EMP{str(number).zfill(6)}',
+                'name': f'{first} {last}',
+                'title': rng.choice(TITLES),
+                'email': f'{first.lower()}.{last.lower()}.{number}@company.in',
+                'department': weighted(rng, DEPARTMENTS),
+                'location': rng.choice(LOCATIONS),
+                'avatar': 'https://via.placeholder.com/150',
+            })
+        insert_batches(db, Employee.__table__, employee_rows)
+        first_pk = db.session.query(db.func.min(Employee.id)).filter(
+            Employee.employee_id == employee_rows[0]['employee_id']
+        ).scalar()
+        counts['employees'] = employees
+        log(f"employees:  {employees:>12,} rows {time.perf_counter() - started:>7.1f}s")
+
+        # Leave requests: non-overlapping per employee, ending up to 60 days after REFERENCE_DATE
+        started = time.perf_counter()
+        request_number = next_number(db, LeaveRequest.request_id, 'LR')
+        horizon = days + 60
+        on_leave = {}
+        leave_rows = []
+        for i in range(employees):
+            count = max(0, round(rng.gauss(leaves_per_year * horizon / 365, 2)))
+            slot = horizon // max(count, 1)
+            for n in range(count):
+                length = weighted(rng, LEAVE_LENGTHS)
+                if slot <= length:
+                    break
+                first_day = start + timedelta(days=n * slot + rng.randrange(slot - length))
+                last_day = first_day + timedelta(days=length - 1)
+                if first_day > end:
+                    status = 'pending'
+                else:
+                    status = rng.choices(['approved', 'rejected', 'pending'], [85, 10, 5])[0]
+                if status == 'approved':
+                    on_leave.setdefault(i, set()).update(first_day + timedelta(days=d) for d in range(length))
+                leave_rows.append({
+                    'request_id': f'LR{str(request_number + len(leave_rows)).zfill(7)}',
+                    'employee_id': first_pk + i,
+                    'leave_type': weighted(rng, LEAVE_TYPES),
+                    'start_date': first_day,
+                    'end_date': last_day,
+                    'days': length,
+                    'status': status,
+                    'created_at': datetime.combine(first_day, datetime.min.time()) - timedelta(
+                        days=rng.randint(1, 30), minutes=rng.randrange(1440)),
+                })
+        insert_batches(db, LeaveRequest.__table__, leave_rows)
+        counts['leave_requests'] = len(leave_rows)
+        log(f"leave:      {len(leave_rows):>12,} rows {time.perf_counter() - started:>7.1f}s")
+
+        # Weekday attendance for every employee, generated a day at a time
+        started = time.perf_counter()
+
+        def attendance_rows():
+            for offset in range(days):
+                day = start + timedelta(days=offset)
+                if day.weekday() >= 5:
+                    continue
+                for i in range(employees):
+                    if day in on_leave.get(i, ()):
+                        status, clock_in, clock_out = 'leave', None, None
+                    else:
+                        status = rng.choices(['present', 'late', 'remote'], [82, 8, 10])[0]
+                        minute = rng.randrange(30)
+                        clock_in = f'09:{minute + 30 if status == "late" else minute:02d}'
+                        clock_out = f'{rng.choice([17, 18, 19])}:{rng.randrange(60):02d}'
+                    yield {'employee_id': first_pk + i, 'date': day, 'status': status,
+                           'clock_in': clock_in, 'clock_out': clock_out}
+
+        counter = [0]
+
+        def counted(rows):
+            for row in rows:
+                counter[0] += 1
+                yield row
+
+        insert_batches(db, Attendance.__table__, counted(attendance_rows()))
+        db.session.commit()
+        counts['attendance'] = counter[0]
+        log(f"attendance: {counter[0]:>12,} rows {time.perf_counter() - started:>7.1f}s")
+
+        # Derived tables the ORM events would normally maintain
+        started = time.perf_counter()
+        app_module.rebuild_attendance_rollup()
+        app_module.rebuild_leave_balances()
+        app_module.IdSequence.query.delete()
+        db.session.commit()
+        app_module.init_id_sequences()
+        log(f"rollup, ledger and id sequences rebuilt {time.perf_counter() - started:>7.1f}s")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', choices=SIZES, default='small')
+    parser.add_argument('--employees', type=int, help='overrides --size')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--leaves-per-year', type=float, default=8)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if not os.environ.get('DATABASE_URL'):
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'datagen.db')}"
+    print(f"database: {os.environ['DATABASE_URL']}")
+    os.environ.setdefault('SLOW_QUERY_MS', '60000')  # Bulk inserts would otherwise all be logged as slow
+    import app as app_module
+    with app_module.app.app_context():
+        app_module.init_db()
+
+    started = time.perf_counter()
+    generate(app_module, args.employees or SIZES[args.size], args.days, args.leaves_per_year, args.seed)
+    print(f"done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()